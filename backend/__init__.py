@@ -29,8 +29,24 @@ Author: AgriQuest Development Team
 Version: 2.0
 """
 
+import logging
+import os
 from flask import Flask
-from .config.database import init_db
+from .config.config import get_config
+from .config.database import init_db, close_request_connection
+from .config.json_provider import OrjsonProvider
+from .config.sessions import init_server_sessions
+from .utils.password_blocklist import init_common_passwords
+
+def _configure_log_level(app):
+    """Apply app.config['LOG_LEVEL'] to the backend package loggers (app.logger and
+    the module loggers under it); an unknown level name falls back to INFO"""
+    name = str(app.config['LOG_LEVEL']).upper()
+    level = logging.getLevelName(name)
+    if not isinstance(level, int):
+        app.logger.warning("Unknown LOG_LEVEL %r, using INFO", name)
+        level = logging.INFO
+    logging.getLogger(__name__).setLevel(level)
 
 def create_app():
     """Application factory pattern"""
@@ -41,9 +57,35 @@ def create_app():
     # Configuration
     app.secret_key = 'your_secret_key_here'  # Change this in production!
     
+    # Log level of the FLASK_ENV config class; the LOG_LEVEL variable overrides it
+    app.config['LOG_LEVEL'] = os.environ.get('LOG_LEVEL') or get_config().LOG_LEVEL
+    _configure_log_level(app)
+    
+    # Profile picture uploads; the directory is created once here, not per upload
+    app.config['AVATAR_DIR'] = 'frontend/static/uploads/profile_pictures'
+    os.makedirs(app.config['AVATAR_DIR'], exist_ok=True)
+    
+    # Session data in Redis (only the id in the cookie) when REDIS_URL is set
+    init_server_sessions(app)
+    
+    # Common-password blocklist (COMMON_PASSWORDS_FILE), loaded before workers fork
+    init_common_passwords()
+    
+    # Faster jsonify() when orjson is installed
+    if OrjsonProvider is not None:
+        app.json = OrjsonProvider(app)
+    
     # Initialize database
     init_db()
     
+    # One database connection per request, closed when the app context ends
+    app.teardown_appcontext(close_request_connection)
+    
+    # Development: warn when a request runs more queries than its budget
+    if os.environ.get('FLASK_ENV') == 'development':
+        from .config.query_budget import install_query_budget
+        install_query_budget(app)
+    
     # Register blueprints
     from .controllers.auth_controller import auth_bp
     from .controllers.quiz_controller import quiz_bp
@@ -186,7 +186,7 @@ def search_users(current_user):
 def list_subjects(current_user):
     """List all subjects"""
     try:
-        subjects = Subject.get_all_subjects()
+        subjects = Subject.get_all_subjects_cached()
         return jsonify({'subjects': subjects}), 200
         
     except Exception as e:
@@ -345,14 +345,12 @@ def list_notifications(current_user):
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 20))
         
-        notifications = Notification.get_user_notifications(
+        notifications, unread_count = Notification.get_notifications_with_unread(
             current_user['id'], 
             per_page, 
             (page - 1) * per_page
         )
         
-        unread_count = Notification.get_unread_count(current_user['id'])
-        
         return jsonify({
             'notifications': notifications,
             'unread_count': unread_count,
@@ -24,6 +24,9 @@ import re
 
 auth_api = Blueprint('auth_api', __name__, url_prefix='/api/auth')
 
+# Characters accepted as the "special character" in a password
+_SPECIAL_CHARS = frozenset('!@#$%^&*(),.?":{}|<>')
+
 @auth_api.route('/login', methods=['POST'])
 def login():
     """User login endpoint"""
@@ -106,7 +109,7 @@ def register():
         if not re.search(r'\d', password):
             return jsonify({'error': 'Password must contain at least one number'}), 400
         
-        if not re.search(r'[!@#$%^&*(),.?":{}|<>]', password):
+        if not any(c in _SPECIAL_CHARS for c in password):
             return jsonify({'error': 'Password must contain at least one special character'}), 400
         
         # Validate email format
@@ -174,7 +177,7 @@ def change_password(current_user):
         if not re.search(r'\d', new_password):
             return jsonify({'error': 'New password must contain at least one number'}), 400
         
-        if not re.search(r'[!@#$%^&*(),.?":{}|<>]', new_password):
+        if not any(c in _SPECIAL_CHARS for c in new_password):
             return jsonify({'error': 'New password must contain at least one special character'}), 400
         
         # Change password
@@ -55,7 +55,7 @@ def search_subjects(current_user):
             return jsonify({'error': 'Search query is required'}), 400
         
         # Get all subjects
-        all_subjects = Subject.get_all_subjects()
+        all_subjects = Subject.get_all_subjects_cached()
         
         # Filter by search query
         filtered_subjects = [
@@ -142,11 +142,11 @@ def list_subject_quizzes(current_user, subject_id):
         if not can_access_subject(current_user, subject_id):
             return jsonify({'error': 'Access denied. You must be enrolled in this subject.'}), 403
         
-        quizzes = Quiz.get_quizzes_by_subject(subject_id)
+        quizzes = [dict(quiz) for quiz in Quiz.get_quizzes_by_subject(subject_id)]
         
-        # Add enrollment status and check if quiz is open
+        # Add enrollment status and check if quiz is open (deadline is already in the row)
         for quiz in quizzes:
-            quiz['is_open'] = Quiz.is_quiz_open(quiz['id'])
+            quiz['is_open'] = Quiz.deadline_open(quiz['deadline'])
         
         return jsonify({'quizzes': quizzes}), 200
         
@@ -168,7 +168,7 @@ def submit_quiz(current_user, quiz_id):
             return jsonify({'error': 'Access denied. You must be enrolled in this subject.'}), 403
         
         # Check if quiz is still open
-        if not Quiz.is_quiz_open(quiz_id):
+        if not Quiz.deadline_open(quiz['deadline']):
             return jsonify({'error': 'Quiz is closed'}), 400
         
         data = request.get_json()
@@ -287,14 +287,12 @@ def list_notifications(current_user):
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 20))
         
-        notifications = Notification.get_user_notifications(
+        notifications, unread_count = Notification.get_notifications_with_unread(
             current_user['id'], 
             per_page, 
             (page - 1) * per_page
         )
         
-        unread_count = Notification.get_unread_count(current_user['id'])
-        
         return jsonify({
             'notifications': notifications,
             'unread_count': unread_count,
@@ -342,14 +342,12 @@ def list_notifications(current_user):
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 20))
         
-        notifications = Notification.get_user_notifications(
+        notifications, unread_count = Notification.get_notifications_with_unread(
             current_user['id'], 
             per_page, 
             (page - 1) * per_page
         )
         
-        unread_count = Notification.get_unread_count(current_user['id'])
-        
         return jsonify({
             'notifications': notifications,
             'unread_count': unread_count,
@@ -1,40 +1,162 @@
 # database.py
-import os
-import sqlite3
-from urllib.parse import urlparse
-from werkzeug.security import generate_password_hash
-
-# Optional PostgreSQL imports
-try:
-    import psycopg2
-    from psycopg2.extras import DictCursor
-    PSYCOPG2_AVAILABLE = True
-except ImportError:
-    PSYCOPG2_AVAILABLE = False
+import logging
+import threading
+from flask import g, has_app_context
+from .db import DatabaseBackend
+
+logger = logging.getLogger(__name__)
+
+# The backend is chosen from DATABASE_URL once, at import time
+_open_connection = DatabaseBackend.current().get_connection
+
+_thread_local = threading.local()
+
+def get_shared_connection():
+    """Long-lived connection owned by the current thread, for read-mostly hot paths
+    such as analytics. Callers must not close it."""
+    conn = getattr(_thread_local, 'conn', None)
+    # psycopg2 marks a connection the server dropped as closed after the failed
+    # query; reopen instead of failing every later request on this thread
+    # (sqlite3 connections have no such attribute and never go stale)
+    if conn is None or getattr(conn, 'closed', False):
+        conn = _open_connection()
+        _thread_local.conn = conn
+    return conn
+
+def _discard_shared_connection():
+    """Drop the thread's connection after it failed; the next request opens a new one"""
+    conn = getattr(_thread_local, 'conn', None)
+    _thread_local.conn = None
+    if conn is not None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+class _RequestConnection:
+    """
+    Connection shared by every model call in one Flask app context.
+    Models keep their open/close pattern: close() only rolls back what the
+    outermost caller left uncommitted. The underlying connection is the
+    thread's long-lived one, so its prepared-statement cache stays warm
+    from one request to the next.
+    """
+
+    __slots__ = ('_conn', '_opens')
+
+    def __init__(self, conn):
+        object.__setattr__(self, '_conn', conn)
+        object.__setattr__(self, '_opens', 0)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._conn, name, value)
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        return self._conn.__exit__(*exc_info)
+
+    def close(self):
+        opens = self._opens - 1
+        object.__setattr__(self, '_opens', max(opens, 0))
+        if opens <= 0:
+            # Same effect as closing a private connection: drop uncommitted work
+            self._conn.rollback()
+
 
 def get_db_connection():
-    """Get database connection based on environment"""
-    database_url = os.getenv('DATABASE_URL')
-    
-    if database_url and database_url.startswith('postgres://') and PSYCOPG2_AVAILABLE:
-        # Parse the URL
-        url = urlparse(database_url)
-        
-        # Connect to PostgreSQL
-        conn = psycopg2.connect(
-            database=url.path[1:],
-            user=url.username,
-            password=url.password,
-            host=url.hostname,
-            port=url.port
-        )
-        conn.cursor_factory = DictCursor
-        return conn
-    else:
-        # Fallback to SQLite for local development
-        conn = sqlite3.connect('agriquest.db')
-        conn.row_factory = sqlite3.Row
-        return conn
+    """Entry point used by every model. Inside a request all calls share the
+    thread's connection; elsewhere (startup, scripts, background threads) each
+    call opens its own."""
+    if not has_app_context():
+        return _open_connection()
+    conn = g.get('db')
+    if conn is None:
+        conn = g.db = _RequestConnection(get_shared_connection())
+    object.__setattr__(conn, '_opens', conn._opens + 1)
+    return conn
+
+def close_request_connection(exception=None):
+    """teardown_appcontext hook ending the request's use of the connection; the
+    connection stays open for the thread's next request"""
+    conn = g.pop('db', None)
+    if conn is not None:
+        try:
+            conn._conn.rollback()
+        except Exception as e:
+            logger.warning("Discarding broken database connection: %s", e)
+            _discard_shared_connection()
+
+def fetch_dicts(cursor, sql, params=()):
+    """Run a SELECT and return its rows as plain dicts. Rows come back as tuples and
+    are zipped with the column names read once, instead of building a sqlite3.Row
+    per row only to copy it into a dict"""
+    cursor.row_factory = None
+    cursor.execute(sql, params)
+    names = [col[0] for col in cursor.description]
+    return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+# Bumped whenever SQLITE_COLUMN_MIGRATIONS changes; stored in PRAGMA user_version
+SCHEMA_VERSION = 2
+
+# (table, column, ALTER statement, follow-up statement or None)
+SQLITE_COLUMN_MIGRATIONS = (
+    ('users', 'role', "ALTER TABLE users ADD COLUMN role TEXT NOT NULL DEFAULT 'student'", None),
+    ('users', 'email', "ALTER TABLE users ADD COLUMN email TEXT", None),
+    ('users', 'created_at', "ALTER TABLE users ADD COLUMN created_at DATETIME",
+     "UPDATE users SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL"),
+    ('quizzes', 'description', "ALTER TABLE quizzes ADD COLUMN description TEXT", None),
+    ('quizzes', 'difficulty_level', "ALTER TABLE quizzes ADD COLUMN difficulty_level TEXT DEFAULT 'beginner'", None),
+    ('quizzes', 'time_limit', "ALTER TABLE quizzes ADD COLUMN time_limit INTEGER DEFAULT 0", None),
+    ('quizzes', 'created_at', "ALTER TABLE quizzes ADD COLUMN created_at DATETIME",
+     "UPDATE quizzes SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL"),
+    ('questions', 'explanation', "ALTER TABLE questions ADD COLUMN explanation TEXT", None),
+    # Percentage score used by analytics; SQLite can only add VIRTUAL generated columns
+    ('results', 'pct', "ALTER TABLE results ADD COLUMN pct REAL GENERATED ALWAYS AS "
+                       "(score * 100.0 / NULLIF(total_questions, 0)) VIRTUAL", None),
+)
+
+# PostgreSQL can skip existing columns itself, so no introspection is needed
+POSTGRES_COLUMN_MIGRATIONS = """
+    ALTER TABLE users ADD COLUMN IF NOT EXISTS role VARCHAR(20) NOT NULL DEFAULT 'student';
+    ALTER TABLE users ADD COLUMN IF NOT EXISTS email VARCHAR(255);
+    ALTER TABLE users ADD COLUMN IF NOT EXISTS created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+    ALTER TABLE quizzes ADD COLUMN IF NOT EXISTS description TEXT;
+    ALTER TABLE quizzes ADD COLUMN IF NOT EXISTS difficulty_level VARCHAR(20) DEFAULT 'beginner';
+    ALTER TABLE quizzes ADD COLUMN IF NOT EXISTS time_limit INTEGER DEFAULT 0;
+    ALTER TABLE quizzes ADD COLUMN IF NOT EXISTS created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+    ALTER TABLE questions ADD COLUMN IF NOT EXISTS explanation TEXT;
+    ALTER TABLE results ADD COLUMN IF NOT EXISTS pct REAL
+        GENERATED ALWAYS AS (score * 100.0 / NULLIF(total_questions, 0)) STORED;
+"""
+
+def _migrate_sqlite_columns(conn):
+    """Add missing columns once per schema version instead of inspecting every table on every boot"""
+    c = conn.cursor()
+    c.execute("PRAGMA user_version")
+    if c.fetchone()[0] >= SCHEMA_VERSION:
+        return
+    
+    existing = {}
+    statements = []
+    for table, column, alter, follow_up in SQLITE_COLUMN_MIGRATIONS:
+        if table not in existing:
+            # table_xinfo also lists generated columns
+            c.execute(f"PRAGMA table_xinfo({table})")
+            existing[table] = {row[1] for row in c.fetchall()}
+        if column not in existing[table]:
+            statements.append(alter)
+            if follow_up:
+                statements.append(follow_up)
+    statements.append(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    
+    c.executescript(";\n".join(statements) + ";")
 
 def init_db():
     """Initialize the database with PostgreSQL compatible schema"""
@@ -42,17 +164,16 @@ def init_db():
     c = conn.cursor()
     
     # Determine if we're using PostgreSQL or SQLite
-    is_postgres = PSYCOPG2_AVAILABLE and hasattr(conn, 'cursor_factory')
+    is_postgres = DatabaseBackend.current().is_postgres
+    
+    if not is_postgres:
+        # WAL is stored in the database file, so this applies to every later connection
+        conn.execute('PRAGMA journal_mode = WAL')
     
     # Define ID column type based on database
     id_type = "SERIAL" if is_postgres else "INTEGER"
     auto_timestamp = "TIMESTAMP DEFAULT CURRENT_TIMESTAMP" if is_postgres else "DATETIME DEFAULT CURRENT_TIMESTAMP"
     
-    # Check if users table exists
-    if not is_postgres:
-        c.execute("PRAGMA table_info(users)")
-    columns = [column[1] for column in c.fetchall()]
-    
     # Users table
     create_users_table = f'''CREATE TABLE IF NOT EXISTS users
                  (id {id_type} PRIMARY KEY,
@@ -63,16 +184,6 @@ def init_db():
                   created_at {auto_timestamp})'''
     c.execute(create_users_table)
     
-    # Add new columns if they don't exist
-    if 'role' not in columns:
-        c.execute("ALTER TABLE users ADD COLUMN role TEXT NOT NULL DEFAULT 'student'")
-    if 'email' not in columns:
-        c.execute("ALTER TABLE users ADD COLUMN email TEXT")
-    if 'created_at' not in columns:
-        c.execute("ALTER TABLE users ADD COLUMN created_at DATETIME")
-        # Update existing records with current timestamp
-        c.execute("UPDATE users SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL")
-    
     # Subjects table
     create_subjects_table = f'''CREATE TABLE IF NOT EXISTS subjects
                  (id {id_type} PRIMARY KEY,
@@ -82,19 +193,6 @@ def init_db():
                   created_at {auto_timestamp})'''
     c.execute(create_subjects_table)
     
-    # Check if quizzes table exists and has the new columns
-    if not is_postgres:
-        c.execute("PRAGMA table_info(quizzes)")
-        quiz_columns = [column[1] for column in c.fetchall()]
-    else:
-        # For PostgreSQL, get column names differently
-        c.execute("""
-            SELECT column_name 
-            FROM information_schema.columns 
-            WHERE table_name = 'quizzes'
-        """)
-        quiz_columns = [column[0] for column in c.fetchall()]
-    
     # Quizzes table
     create_quizzes_table = f'''CREATE TABLE IF NOT EXISTS quizzes
                  (id {id_type} PRIMARY KEY,
@@ -107,36 +205,6 @@ def init_db():
                   created_at {auto_timestamp})'''
     c.execute(create_quizzes_table)
     
-    # Add new columns to quizzes table if they don't exist
-    if 'description' not in quiz_columns:
-        if is_postgres:
-            c.execute("ALTER TABLE quizzes ADD COLUMN IF NOT EXISTS description TEXT")
-        else:
-            c.execute("ALTER TABLE quizzes ADD COLUMN description TEXT")
-    if 'difficulty_level' not in quiz_columns:
-        if is_postgres:
-            c.execute("ALTER TABLE quizzes ADD COLUMN IF NOT EXISTS difficulty_level TEXT DEFAULT 'beginner'")
-        else:
-            c.execute("ALTER TABLE quizzes ADD COLUMN difficulty_level TEXT DEFAULT 'beginner'")
-    if 'time_limit' not in quiz_columns:
-        if is_postgres:
-            c.execute("ALTER TABLE quizzes ADD COLUMN IF NOT EXISTS time_limit INTEGER DEFAULT 0")
-        else:
-            c.execute("ALTER TABLE quizzes ADD COLUMN time_limit INTEGER DEFAULT 0")
-    if 'created_at' not in quiz_columns:
-        if is_postgres:
-            c.execute("ALTER TABLE quizzes ADD COLUMN IF NOT EXISTS created_at TIMESTAMP")
-        else:
-            c.execute("ALTER TABLE quizzes ADD COLUMN created_at DATETIME")
-        # Update existing records with current timestamp
-        c.execute("UPDATE quizzes SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL")
-    
-    # Check if explanation column exists in questions table
-    c.execute("PRAGMA table_info(questions)")
-    question_columns = [column[1] for column in c.fetchall()]
-    if 'explanation' not in question_columns:
-        c.execute("ALTER TABLE questions ADD COLUMN explanation TEXT")
-    
     # Questions table
     create_questions_table = f'''CREATE TABLE IF NOT EXISTS questions
                  (id {id_type} PRIMARY KEY,
@@ -160,6 +228,28 @@ def init_db():
                   timestamp {auto_timestamp})'''
     c.execute(create_results_table)
     
+    # Answers table (the option a student chose for each question of a result)
+    create_answers_table = '''CREATE TABLE IF NOT EXISTS answers
+                 (result_id INTEGER NOT NULL REFERENCES results(id),
+                  question_id INTEGER NOT NULL REFERENCES questions(id),
+                  chosen_option INTEGER NOT NULL,
+                  PRIMARY KEY (result_id, question_id))'''
+    c.execute(create_answers_table)
+    
+    # One student's attempt at one quiz (take_quiz duplicate check, view_quiz_result)
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_results_user_quiz
+                 ON results(user_id, quiz_id)''')
+    
+    # Covering index for the teacher analytics "recent activity" range scan
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_results_timestamp_covering
+                 ON results(timestamp DESC, quiz_id, user_id, score, total_questions)''')
+    
+    # Add columns introduced after the first release to databases created before them
+    if is_postgres:
+        c.execute(POSTGRES_COLUMN_MIGRATIONS)
+    else:
+        _migrate_sqlite_columns(conn)
+    
     # Update existing admin users to teacher role
     c.execute("UPDATE users SET role = 'teacher' WHERE role = 'admin'")
     
@@ -173,12 +263,9 @@ def init_db():
         ('Agricultural Extension and Communication', 'Methods of knowledge transfer, farmer education, and agricultural communication')
     ]
     
-    for subject_name, description in default_subjects:
-        try:
-            c.execute("INSERT INTO subjects (name, description, created_by) VALUES (?, ?, ?)", 
-                     (subject_name, description, 1))  # Admin user ID
-        except sqlite3.IntegrityError:
-            pass  # Subject already exists
+    # Existing subjects are skipped by the UNIQUE(name) conflict clause
+    c.executemany("INSERT INTO subjects (name, description, created_by) VALUES (?, ?, ?) ON CONFLICT(name) DO NOTHING",
+                  ((subject_name, description, 1) for subject_name, description in default_subjects))  # Admin user ID
     
     conn.commit()
     conn.close()
@@ -186,8 +273,3 @@ def init_db():
     # Migrate OTP table if needed
     from ..utils.otp_utils import migrate_otp_table
     migrate_otp_table()
-
-def get_db_connection():
-    conn = sqlite3.connect('agriquest.db')
-    conn.row_factory = sqlite3.Row
-    return conn
\ No newline at end of file
@@ -4,25 +4,70 @@ Enhanced database management with connection pooling and performance monitoring
 """
 
 import os
-import sqlite3
+import atexit
+import hashlib
 import logging
 from contextlib import contextmanager
-from functools import wraps
+from functools import wraps, lru_cache
 import time
-from typing import Optional, Dict, Any, List
-from werkzeug.security import generate_password_hash
+from typing import Optional, Dict, Any, List, Final
+from .db import DatabaseBackend
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=1024)
+def query_digest(query: str) -> bytes:
+    """Stable 8-byte BLAKE2b digest of a SQL string, computed once per unique query.
+    Unlike hash(), the value survives restarts so stats can be aggregated."""
+    return hashlib.blake2b(query.encode(), digest_size=8).digest()
+
+# Slow query/operation threshold (100ms) in nanoseconds
+SLOW_QUERY_THRESHOLD_NS = 100_000_000
+
+# Rows deleted per statement when purging expired OTP codes/sessions
+CLEANUP_BATCH_SIZE = 500
+
+# Bumped whenever the seed data changes; stored in db_meta under SEED_VERSION_KEY.
+# PRAGMA user_version belongs to database.py's column migrations
+SEED_VERSION = 1
+SEED_VERSION_KEY = 'seed_version'
+
+# Precomputed pbkdf2 hashes for the seed accounts (Admin123!, Teacher123!, Student123!)
+# so a fresh database does not spend ~1s of CPU hashing fixture passwords
+ADMIN_PWHASH = 'pbkdf2:sha256:600000$MM6Fz4MSHstAkTeo$2b64afde5e20ef1dd83c32b9a6e46e4f6706c2856f65659c6a6e70457acc73b5'
+TEACHER_PWHASH = 'pbkdf2:sha256:600000$ZSA3Yz8q7Gr9PX0b$8038056e7b9d23662775f0605abfce832d0ddc66ca66f6e048de14f6c225c72d'
+STUDENT_PWHASH = 'pbkdf2:sha256:600000$dxgHMx9mBwKakD84$ca47884d62359834613e1cef7587234de299547caf68d62c7c1f542536ce5deb'
+
+# Seed data, built once at import
+DEFAULT_SUBJECTS: Final[tuple[tuple[str, str], ...]] = (
+    ('Crop Science', 'Study of crop production, breeding, and management techniques for optimal yield and quality'),
+    ('Soil Science', 'Understanding soil properties, fertility, composition, and sustainable soil management practices'),
+    ('Crop Protection', 'Study of plant diseases, pests, weeds, and integrated pest management strategies'),
+    ('Animal Science', 'Comprehensive study of animal nutrition, breeding, health, and production systems'),
+    ('Agricultural Economics and Marketing', 'Economic principles, market analysis, and business strategies in agriculture'),
+    ('Agricultural Extension and Communication', 'Methods of knowledge transfer, farmer education, and agricultural communication'),
+)
+
+DEFAULT_CLASSES: Final[tuple[tuple[str, str], ...]] = (
+    ('Introduction to Agriculture', 'Basic concepts and principles of agriculture'),
+    ('Advanced Crop Management', 'Advanced techniques in crop production and management'),
+    ('Agricultural Technology', 'Modern technology applications in agriculture'),
+    ('Sustainable Farming', 'Environmentally sustainable farming practices'),
+    ('Agricultural Business', 'Business aspects of agricultural operations'),
+)
+
 class DatabaseManager:
     """Enhanced database manager with connection pooling and monitoring"""
     
     def __init__(self, database_url: str = None):
         self.database_url = database_url or os.getenv('DATABASE_URL', 'sqlite:///agriquest.db')
+        self.backend = DatabaseBackend.from_url(self.database_url)
         self.connection_pool = {}
         self.query_stats = {}
         self._init_database()
+        atexit.register(self.persist_query_stats)
+        atexit.register(self.optimize)
     
     def _init_database(self):
         """Initialize database with optimized schema"""
@@ -30,25 +75,42 @@ class DatabaseManager:
             self._create_tables(conn)
             self._create_indexes(conn)
             self._seed_default_data(conn)
+            # Give the planner statistics that reflect the seeded data. A fresh
+            # connection has run no queries, so optimize alone would skip every
+            # table until sqlite_stat1 exists
+            if not self.backend.is_postgres:
+                has_stats = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+                ).fetchone()
+                conn.execute('PRAGMA optimize' if has_stats else 'ANALYZE')
+    
+    def optimize(self):
+        """Let SQLite refresh planner statistics for tables that changed (runs at exit)"""
+        if self.backend.is_postgres:
+            return
+        try:
+            with self.get_connection() as conn:
+                conn.execute('PRAGMA optimize')
+        except Exception as e:
+            logger.error(f"PRAGMA optimize failed: {e}")
     
     @contextmanager
     def get_connection(self):
         """Get database connection with automatic cleanup"""
         conn = None
         try:
-            if self.database_url.startswith('sqlite'):
-                conn = sqlite3.connect(self.database_url.replace('sqlite:///', ''))
-                conn.row_factory = sqlite3.Row
+            conn = self.backend.get_connection()
+            if self.backend.is_postgres:
+                # PostgreSQL connection (for future migration)
+                conn.autocommit = False
+            else:
                 conn.execute('PRAGMA foreign_keys = ON')
                 conn.execute('PRAGMA journal_mode = WAL')
                 conn.execute('PRAGMA synchronous = NORMAL')
                 conn.execute('PRAGMA cache_size = 10000')
                 conn.execute('PRAGMA temp_store = MEMORY')
-            else:
-                # PostgreSQL connection (for future migration)
-                import psycopg2
-                conn = psycopg2.connect(self.database_url)
-                conn.autocommit = False
+                # Bound the rows sampled by ANALYZE/optimize so it stays cheap
+                conn.execute('PRAGMA analysis_limit = 1000')
             
             yield conn
             conn.commit()
@@ -237,6 +299,25 @@ class DatabaseManager:
                 FOREIGN KEY (question_id) REFERENCES questions (id)
             )
         ''')
+        
+        # Small key/value markers owned by this module (seed version)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS db_meta (
+                key VARCHAR(50) PRIMARY KEY,
+                value INTEGER NOT NULL
+            )
+        ''')
+        
+        # Query statistics aggregated across restarts (keyed by query_digest)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS query_stats (
+                digest BLOB PRIMARY KEY,
+                query TEXT NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                total_time REAL NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
     
     def _create_indexes(self, conn):
         """Create performance indexes"""
@@ -287,65 +368,67 @@ class DatabaseManager:
         """Seed database with default data"""
         cursor = conn.cursor()
         
-        # Check if data already exists
+        # Skip entirely once this database has been seeded at the current version
+        cursor.execute('SELECT value FROM db_meta WHERE key = ?', (SEED_VERSION_KEY,))
+        row = cursor.fetchone()
+        if row is not None and row[0] >= SEED_VERSION:
+            return
+        
+        # Check if data already exists (databases seeded before versioning)
         cursor.execute('SELECT COUNT(*) FROM subjects')
         if cursor.fetchone()[0] > 0:
+            self._set_seed_version(conn)
             return
         
-        # Default subjects
-        default_subjects = [
-            ('Crop Science', 'Study of crop production, breeding, and management techniques for optimal yield and quality'),
-            ('Soil Science', 'Understanding soil properties, fertility, composition, and sustainable soil management practices'),
-            ('Crop Protection', 'Study of plant diseases, pests, weeds, and integrated pest management strategies'),
-            ('Animal Science', 'Comprehensive study of animal nutrition, breeding, health, and production systems'),
-            ('Agricultural Economics and Marketing', 'Economic principles, market analysis, and business strategies in agriculture'),
-            ('Agricultural Extension and Communication', 'Methods of knowledge transfer, farmer education, and agricultural communication')
-        ]
-        
-        for subject_name, description in default_subjects:
-            cursor.execute(
-                'INSERT INTO subjects (name, description, created_by) VALUES (?, ?, ?)',
-                (subject_name, description, 1)
-            )
+        # Initial bulk load: skip fsyncs until the seed transaction is committed
+        if not self.backend.is_postgres:
+            conn.execute('PRAGMA synchronous = OFF')
         
-        # Default admin user
-        admin_password = generate_password_hash('Admin123!')
+        # Default admin user (inserted first; seeded subjects reference it as created_by)
         cursor.execute('''
-            INSERT OR IGNORE INTO users (id, username, password_hash, role, email, phone, full_name, is_active, email_verified, phone_verified)
+            INSERT INTO users (id, username, password_hash, role, email, phone, full_name, is_active, email_verified, phone_verified)
             VALUES (1, 'admin', ?, 'admin', 'admin@agriquest.com', '+1234567890', 'System Administrator', TRUE, TRUE, TRUE)
-        ''', (admin_password,))
+            ON CONFLICT DO NOTHING
+        ''', (ADMIN_PWHASH,))
         
         # Default test users
         test_users = [
-            ('teacher', 'Teacher123!', 'teacher', 'teacher@agriquest.com', '+1234567890', 'Test Teacher'),
-            ('student', 'Student123!', 'student', 'student@agriquest.com', '+1234567890', 'Test Student')
+            ('teacher', TEACHER_PWHASH, 'teacher', 'teacher@agriquest.com', '+1234567890', 'Test Teacher'),
+            ('student', STUDENT_PWHASH, 'student', 'student@agriquest.com', '+1234567890', 'Test Student')
         ]
         
-        for username, password, role, email, phone, full_name in test_users:
-            password_hash = generate_password_hash(password)
-            cursor.execute('''
-                INSERT OR IGNORE INTO users (username, password_hash, role, email, phone, full_name, is_active, email_verified, phone_verified)
-                VALUES (?, ?, ?, ?, ?, ?, TRUE, TRUE, TRUE)
-            ''', (username, password_hash, role, email, phone, full_name))
+        cursor.executemany('''
+            INSERT INTO users (username, password_hash, role, email, phone, full_name, is_active, email_verified, phone_verified)
+            VALUES (?, ?, ?, ?, ?, ?, TRUE, TRUE, TRUE)
+            ON CONFLICT DO NOTHING
+        ''', test_users)
+        
+        # Default subjects
+        cursor.executemany(
+            'INSERT INTO subjects (name, description, created_by) VALUES (?, ?, ?) ON CONFLICT(name) DO NOTHING',
+            ((subject_name, description, 1) for subject_name, description in DEFAULT_SUBJECTS)
+        )
         
         # Default classes
-        default_classes = [
-            ('Introduction to Agriculture', 'Basic concepts and principles of agriculture'),
-            ('Advanced Crop Management', 'Advanced techniques in crop production and management'),
-            ('Agricultural Technology', 'Modern technology applications in agriculture'),
-            ('Sustainable Farming', 'Environmentally sustainable farming practices'),
-            ('Agricultural Business', 'Business aspects of agricultural operations')
-        ]
+        cursor.executemany('INSERT INTO classes (name, description) VALUES (?, ?)', DEFAULT_CLASSES)
         
-        for class_name, description in default_classes:
-            cursor.execute(
-                'INSERT INTO classes (name, description) VALUES (?, ?)',
-                (class_name, description)
-            )
+        self._set_seed_version(conn)
+        
+        if not self.backend.is_postgres:
+            conn.commit()
+            conn.execute('PRAGMA synchronous = NORMAL')
+    
+    def _set_seed_version(self, conn):
+        """Stamp the database so seeding is skipped on later boots"""
+        conn.execute(
+            'INSERT INTO db_meta (key, value) VALUES (?, ?) '
+            'ON CONFLICT(key) DO UPDATE SET value = excluded.value',
+            (SEED_VERSION_KEY, SEED_VERSION)
+        )
     
     def execute_query(self, query: str, params: tuple = (), fetch: str = 'all') -> Any:
         """Execute database query with performance monitoring"""
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         
         try:
             with self.get_connection() as conn:
@@ -360,12 +443,13 @@ class DatabaseManager:
                     result = cursor.rowcount
                 
                 # Log slow queries
-                execution_time = time.time() - start_time
-                if execution_time > 0.1:  # Log queries taking more than 100ms
-                    logger.warning(f"Slow query ({execution_time:.3f}s): {query[:100]}...")
+                elapsed_ns = time.perf_counter_ns() - start_ns
+                if elapsed_ns > SLOW_QUERY_THRESHOLD_NS and logger.isEnabledFor(logging.WARNING):
+                    logger.warning("Slow query (%.3fs): %s...", elapsed_ns / 1e9, query[:100])
+                execution_time = elapsed_ns / 1e9
                 
                 # Update query statistics
-                query_hash = hash(query)
+                query_hash = query_digest(query)
                 if query_hash not in self.query_stats:
                     self.query_stats[query_hash] = {
                         'query': query,
@@ -385,22 +469,52 @@ class DatabaseManager:
             logger.error(f"Query execution error: {e}")
             raise
     
-    def get_query_stats(self) -> Dict[str, Any]:
+    def get_query_stats(self) -> Dict[bytes, Any]:
         """Get query performance statistics"""
         return self.query_stats
     
+    def persist_query_stats(self):
+        """Add this process's query statistics to the query_stats table (runs at exit)"""
+        if not self.query_stats:
+            return
+        try:
+            with self.get_connection() as conn:
+                conn.cursor().executemany('''
+                    INSERT INTO query_stats (digest, query, count, total_time) VALUES (?, ?, ?, ?)
+                    ON CONFLICT(digest) DO UPDATE SET
+                        count = count + excluded.count,
+                        total_time = total_time + excluded.total_time,
+                        updated_at = CURRENT_TIMESTAMP
+                ''', [(digest, stats['query'], stats['count'], stats['total_time'])
+                      for digest, stats in self.query_stats.items()])
+            self.query_stats.clear()
+        except Exception as e:
+            logger.error(f"Failed to persist query stats: {e}")
+    
+    def _delete_expired_in_batches(self, conn, table: str) -> int:
+        """Delete expired rows from table in small batches, committing between them
+        so the write lock is released and concurrent logins are not blocked"""
+        cursor = conn.cursor()
+        deleted = 0
+        while True:
+            cursor.execute(f'''
+                DELETE FROM {table} WHERE id IN (
+                    SELECT id FROM {table} WHERE expires_at < CURRENT_TIMESTAMP LIMIT ?
+                )
+            ''', (CLEANUP_BATCH_SIZE,))
+            deleted += cursor.rowcount
+            conn.commit()
+            if cursor.rowcount < CLEANUP_BATCH_SIZE:
+                return deleted
+    
     def cleanup_expired_data(self):
         """Clean up expired OTP codes and sessions"""
         with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
             # Clean expired OTP codes
-            cursor.execute('DELETE FROM otp_codes WHERE expires_at < CURRENT_TIMESTAMP')
-            otp_deleted = cursor.rowcount
+            otp_deleted = self._delete_expired_in_batches(conn, 'otp_codes')
             
             # Clean expired sessions
-            cursor.execute('DELETE FROM user_sessions WHERE expires_at < CURRENT_TIMESTAMP')
-            session_deleted = cursor.rowcount
+            session_deleted = self._delete_expired_in_batches(conn, 'user_sessions')
             
             logger.info(f"Cleaned up {otp_deleted} expired OTP codes and {session_deleted} expired sessions")
 
@@ -421,12 +535,12 @@ def monitor_performance(func):
     """Decorator to monitor function performance"""
     @wraps(func)
     def wrapper(*args, **kwargs):
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         result = func(*args, **kwargs)
-        execution_time = time.time() - start_time
+        elapsed_ns = time.perf_counter_ns() - start_ns
         
-        if execution_time > 0.1:  # Log slow operations
-            logger.warning(f"Slow operation in {func.__name__}: {execution_time:.3f}s")
+        if elapsed_ns > SLOW_QUERY_THRESHOLD_NS and logger.isEnabledFor(logging.WARNING):
+            logger.warning("Slow operation in %s: %.3fs", func.__name__, elapsed_ns / 1e9)
         
         return result
     return wrapper
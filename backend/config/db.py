@@ -0,0 +1,95 @@
+"""
+Database Backend Selection
+Single place that decides how database connections are opened
+
+The backend is chosen once from DATABASE_URL:
+    postgres://... or postgresql://...  -> PostgresBackend (psycopg2, imported lazily)
+    sqlite:///path                      -> SqliteBackend(path)
+    anything else / unset               -> SqliteBackend('agriquest.db')
+
+database.py, database_optimized.py and database_render.py all open their
+connections through DatabaseBackend.current() so the three modules can no
+longer drift apart.
+"""
+
+import abc
+import os
+import sqlite3
+from importlib.util import find_spec
+from urllib.parse import urlparse
+
+DEFAULT_SQLITE_PATH = 'agriquest.db'
+
+
+class DatabaseBackend(abc.ABC):
+    """Strategy object describing how to open a connection to one database"""
+
+    is_postgres = False
+    _current = None
+
+    @abc.abstractmethod
+    def get_connection(self):
+        """Open a new DB-API connection"""
+
+    @staticmethod
+    def from_url(database_url):
+        """Build the backend matching a database URL"""
+        if database_url and database_url.startswith(('postgres://', 'postgresql://')):
+            # Only use PostgreSQL when the driver is installed; probe without importing it
+            if find_spec('psycopg2') is not None:
+                return PostgresBackend(database_url)
+        elif database_url and database_url.startswith('sqlite:///'):
+            return SqliteBackend(database_url[len('sqlite:///'):])
+
+        # Fallback to SQLite for local development
+        return SqliteBackend(DEFAULT_SQLITE_PATH)
+
+    @classmethod
+    def current(cls):
+        """Backend selected from the DATABASE_URL environment variable (resolved once)"""
+        if DatabaseBackend._current is None:
+            DatabaseBackend._current = DatabaseBackend.from_url(os.getenv('DATABASE_URL'))
+        return DatabaseBackend._current
+
+
+class SqliteBackend(DatabaseBackend):
+    """SQLite database file (local development and small deployments)"""
+
+    def __init__(self, path=DEFAULT_SQLITE_PATH):
+        self.path = path
+
+    # Statements prepared per connection by the sqlite3 module (default 128)
+    CACHED_STATEMENTS = 256
+
+    def get_connection(self):
+        conn = sqlite3.connect(self.path, cached_statements=self.CACHED_STATEMENTS)
+        conn.row_factory = sqlite3.Row
+        # Safe with WAL (set by init_db): commits no longer fsync the main database file
+        conn.execute('PRAGMA synchronous = NORMAL')
+        return conn
+
+
+class PostgresBackend(DatabaseBackend):
+    """PostgreSQL database (Render deployment)"""
+
+    is_postgres = True
+
+    def __init__(self, database_url):
+        # Parse the URL once instead of on every connection
+        url = urlparse(database_url)
+        self.connect_kwargs = {
+            'database': url.path[1:],
+            'user': url.username,
+            'password': url.password,
+            'host': url.hostname,
+            'port': url.port
+        }
+
+    def get_connection(self):
+        # psycopg2 is only imported when a PostgreSQL connection is actually opened
+        import psycopg2
+        from psycopg2.extras import DictCursor
+
+        conn = psycopg2.connect(**self.connect_kwargs)
+        conn.cursor_factory = DictCursor
+        return conn
@@ -2,43 +2,66 @@
 Email and SMS configuration settings
 """
 import os
+from functools import lru_cache
 
-# Email Configuration
-EMAIL_CONFIG = {
-    'smtp_server': os.getenv('SMTP_SERVER', 'smtp.gmail.com'),
-    'smtp_port': int(os.getenv('SMTP_PORT', '587')),
-    'email_address': os.getenv('EMAIL_ADDRESS', ''),
-    'email_password': os.getenv('EMAIL_PASSWORD', ''),
-    'from_name': os.getenv('FROM_NAME', 'AgriQuest'),
-    'enabled': bool(os.getenv('EMAIL_ADDRESS') and os.getenv('EMAIL_PASSWORD'))
-}
+@lru_cache(maxsize=1)
+def get_email_config():
+    """Email configuration, read from the environment on first use"""
+    env = os.environ
+    email_address = env.get('EMAIL_ADDRESS', '')
+    email_password = env.get('EMAIL_PASSWORD', '')
+    return {
+        'smtp_server': env.get('SMTP_SERVER', 'smtp.gmail.com'),
+        'smtp_port': int(env.get('SMTP_PORT', '587')),
+        'email_address': email_address,
+        'email_password': email_password,
+        'from_name': env.get('FROM_NAME', 'AgriQuest'),
+        'enabled': bool(email_address and email_password)
+    }
 
-# SMS Configuration
-SMS_CONFIG = {
-    'service': os.getenv('SMS_SERVICE', 'console'),  # console, twilio, textbelt
-    'twilio_account_sid': os.getenv('TWILIO_ACCOUNT_SID', ''),
-    'twilio_auth_token': os.getenv('TWILIO_AUTH_TOKEN', ''),
-    'twilio_phone_number': os.getenv('TWILIO_PHONE_NUMBER', ''),
-    'textbelt_api_key': os.getenv('TEXTBELT_API_KEY', 'textbelt'),
-    'enabled': bool(
-        (os.getenv('TWILIO_ACCOUNT_SID') and os.getenv('TWILIO_AUTH_TOKEN') and os.getenv('TWILIO_PHONE_NUMBER')) or
-        (os.getenv('SMS_SERVICE') == 'textbelt')
-    )
-}
+@lru_cache(maxsize=1)
+def get_sms_config():
+    """SMS configuration, read from the environment on first use"""
+    env = os.environ
+    service = env.get('SMS_SERVICE', 'console')  # console, twilio, textbelt
+    twilio_account_sid = env.get('TWILIO_ACCOUNT_SID', '')
+    twilio_auth_token = env.get('TWILIO_AUTH_TOKEN', '')
+    twilio_phone_number = env.get('TWILIO_PHONE_NUMBER', '')
+    return {
+        'service': service,
+        'twilio_account_sid': twilio_account_sid,
+        'twilio_auth_token': twilio_auth_token,
+        'twilio_phone_number': twilio_phone_number,
+        'textbelt_api_key': env.get('TEXTBELT_API_KEY', 'textbelt'),
+        'enabled': bool(
+            (twilio_account_sid and twilio_auth_token and twilio_phone_number) or
+            (service == 'textbelt')
+        )
+    }
+
+def __getattr__(name):
+    """Keep EMAIL_CONFIG / SMS_CONFIG importable without building them at import time"""
+    if name == 'EMAIL_CONFIG':
+        return get_email_config()
+    if name == 'SMS_CONFIG':
+        return get_sms_config()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def get_email_status():
     """Get email configuration status"""
-    if EMAIL_CONFIG['enabled']:
-        return f"✅ Email configured ({EMAIL_CONFIG['email_address']})"
+    email_config = get_email_config()
+    if email_config['enabled']:
+        return f"✅ Email configured ({email_config['email_address']})"
     else:
         return "⚠️  Email not configured (set EMAIL_ADDRESS and EMAIL_PASSWORD)"
 
 def get_sms_status():
     """Get SMS configuration status"""
-    if SMS_CONFIG['enabled']:
-        if SMS_CONFIG['service'] == 'twilio':
-            return f"✅ SMS configured (Twilio: {SMS_CONFIG['twilio_phone_number']})"
-        elif SMS_CONFIG['service'] == 'textbelt':
+    sms_config = get_sms_config()
+    if sms_config['enabled']:
+        if sms_config['service'] == 'twilio':
+            return f"✅ SMS configured (Twilio: {sms_config['twilio_phone_number']})"
+        elif sms_config['service'] == 'textbelt':
             return "✅ SMS configured (TextBelt)"
         else:
             return "✅ SMS configured (Console mode)"
@@ -47,32 +70,41 @@ def get_sms_status():
 
 def print_configuration_status():
     """Print current email and SMS configuration status"""
-    print("\n" + "="*60)
-    print("📧 EMAIL & SMS CONFIGURATION STATUS")
-    print("="*60)
-    print(f"Email: {get_email_status()}")
-    print(f"SMS:   {get_sms_status()}")
-    print("="*60)
+    # Collected into one string so the block is written with a single call
+    lines = [
+        "\n" + "="*60,
+        "📧 EMAIL & SMS CONFIGURATION STATUS",
+        "="*60,
+        f"Email: {get_email_status()}",
+        f"SMS:   {get_sms_status()}",
+        "="*60,
+    ]
     
-    if not EMAIL_CONFIG['enabled']:
-        print("\n📧 To enable email sending, set these environment variables:")
-        print("   export EMAIL_ADDRESS='your-email@gmail.com'")
-        print("   export EMAIL_PASSWORD='your-app-password'")
-        print("   export SMTP_SERVER='smtp.gmail.com'")
-        print("   export SMTP_PORT='587'")
+    if not get_email_config()['enabled']:
+        lines += [
+            "\n📧 To enable email sending, set these environment variables:",
+            "   export EMAIL_ADDRESS='your-email@gmail.com'",
+            "   export EMAIL_PASSWORD='your-app-password'",
+            "   export SMTP_SERVER='smtp.gmail.com'",
+            "   export SMTP_PORT='587'",
+        ]
     
-    if not SMS_CONFIG['enabled']:
-        print("\n📱 To enable SMS sending, choose one option:")
-        print("\n   Option 1 - Twilio (Recommended):")
-        print("   export SMS_SERVICE='twilio'")
-        print("   export TWILIO_ACCOUNT_SID='your-account-sid'")
-        print("   export TWILIO_AUTH_TOKEN='your-auth-token'")
-        print("   export TWILIO_PHONE_NUMBER='+1234567890'")
-        print("\n   Option 2 - TextBelt (Free tier):")
-        print("   export SMS_SERVICE='textbelt'")
-        print("   export TEXTBELT_API_KEY='textbelt'")
+    if not get_sms_config()['enabled']:
+        lines += [
+            "\n📱 To enable SMS sending, choose one option:",
+            "\n   Option 1 - Twilio (Recommended):",
+            "   export SMS_SERVICE='twilio'",
+            "   export TWILIO_ACCOUNT_SID='your-account-sid'",
+            "   export TWILIO_AUTH_TOKEN='your-auth-token'",
+            "   export TWILIO_PHONE_NUMBER='+1234567890'",
+            "\n   Option 2 - TextBelt (Free tier):",
+            "   export SMS_SERVICE='textbelt'",
+            "   export TEXTBELT_API_KEY='textbelt'",
+        ]
     
-    print("\n💡 For Gmail, use App Passwords instead of your regular password")
-    print("   https://support.google.com/accounts/answer/185833")
-    print("="*60)
-
+    lines += [
+        "\n💡 For Gmail, use App Passwords instead of your regular password",
+        "   https://support.google.com/accounts/answer/185833",
+        "="*60,
+    ]
+    print("\n".join(lines))
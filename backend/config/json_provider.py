@@ -0,0 +1,46 @@
+"""
+JSON Provider
+Serializes jsonify() responses with orjson when it is installed
+
+The output matches Flask's DefaultJSONProvider (sorted keys, trailing
+newline, 2-space indentation when compact is False or the app is in
+debug mode, the same default() fallbacks such as HTTP dates for
+datetimes); only the encoder changes. Without orjson, create_app keeps Flask's provider.
+"""
+
+from importlib.util import find_spec
+
+from flask.json.provider import DefaultJSONProvider
+
+if find_spec('orjson') is not None:
+    import orjson
+
+    class OrjsonProvider(DefaultJSONProvider):
+        """DefaultJSONProvider with orjson doing the encoding and decoding"""
+
+        # datetimes are passed through to default() so they keep Flask's HTTP-date format
+        option = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+        def _encode(self, obj, option=0):
+            return orjson.dumps(obj, default=self.default, option=self.option | option)
+
+        def dumps(self, obj, **kwargs):
+            if kwargs:
+                # Explicit json.dumps options (indent, separators, ...) keep the stdlib path
+                return super().dumps(obj, **kwargs)
+            return self._encode(obj).decode()
+
+        def loads(self, s, **kwargs):
+            if kwargs:
+                return super().loads(s, **kwargs)
+            return orjson.loads(s)
+
+        def response(self, *args, **kwargs):
+            # orjson produces bytes, so the body needs no separate UTF-8 encode
+            obj = self._prepare_response_obj(args, kwargs)
+            # Same rule as DefaultJSONProvider for pretty-printing
+            pretty = (self.compact is None and self._app.debug) or self.compact is False
+            body = self._encode(obj, orjson.OPT_INDENT_2 if pretty else 0)
+            return self._app.response_class(body + b"\n", mimetype=self.mimetype)
+else:
+    OrjsonProvider = None
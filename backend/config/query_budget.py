@@ -0,0 +1,57 @@
+"""
+Query Budgets
+Development-only check that flags requests running more SQL than expected
+
+Every statement executed on the request's SQLite connection is counted
+through sqlite3's trace callback (no wrapper around cursors needed). When a
+request finishes above its endpoint's budget a warning is logged, so an N+1
+loop that creeps back into a route shows up immediately in the dev server
+log and in CI. The count is also returned in the X-Query-Count header.
+
+Enabled by create_app when FLASK_ENV=development; production never installs
+the trace callback.
+"""
+
+from flask import current_app, g, has_app_context, request
+from .database import get_shared_connection
+
+# Endpoint -> maximum statements per request (transaction control and PRAGMAs excluded)
+QUERY_BUDGETS = {
+    'classes.view_classes': 1,
+    'classes.manage_class': 2,
+    'classes.view_class': 2,
+    'classes.enrollment_requests': 1,
+    'classes.my_classes': 1,
+}
+DEFAULT_QUERY_BUDGET = 10
+
+# Statements that are bookkeeping rather than queries issued by the code
+_UNCOUNTED_PREFIXES = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE', 'PRAGMA', '--')
+
+def _count_statement(sql):
+    if has_app_context() and 'query_count' in g:
+        if not sql.lstrip().upper().startswith(_UNCOUNTED_PREFIXES):
+            g.query_count += 1
+
+def _start_counting():
+    g.query_count = 0
+    conn = get_shared_connection()
+    # Only sqlite3 connections support a trace callback
+    if hasattr(conn, 'set_trace_callback'):
+        conn.set_trace_callback(_count_statement)
+
+def _check_budget(response):
+    count = g.pop('query_count', None)
+    if count is None:
+        return response
+    response.headers['X-Query-Count'] = str(count)
+    budget = QUERY_BUDGETS.get(request.endpoint, DEFAULT_QUERY_BUDGET)
+    if count > budget:
+        current_app.logger.warning("Query budget exceeded: %s %s (%s) ran %d queries, budget %d",
+                                   request.method, request.path, request.endpoint, count, budget)
+    return response
+
+def install_query_budget(app):
+    """Count queries per request and warn when an endpoint goes over its budget"""
+    app.before_request(_start_counting)
+    app.after_request(_check_budget)
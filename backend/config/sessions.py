@@ -0,0 +1,34 @@
+"""
+Server-side Sessions
+Keeps session data in Redis instead of the signed session cookie
+
+take_quiz stores the quiz results, answers and flags in the session; with
+Flask's default cookie sessions all of that is serialized, signed and sent
+back and forth on every request. When REDIS_URL is set and Flask-Session and
+redis are installed, only a signed session id travels in the cookie.
+Otherwise create_app keeps Flask's cookie sessions.
+"""
+
+import os
+from importlib.util import find_spec
+
+SESSION_KEY_PREFIX = 'agriquest:session:'
+
+def init_server_sessions(app):
+    """Switch the app to Redis-backed sessions when configured; returns whether it did"""
+    redis_url = os.getenv('REDIS_URL')
+    if not redis_url or find_spec('flask_session') is None or find_spec('redis') is None:
+        return False
+
+    import redis
+    from flask_session import Session
+
+    app.config.update(
+        SESSION_TYPE='redis',
+        SESSION_REDIS=redis.from_url(redis_url),
+        SESSION_KEY_PREFIX=SESSION_KEY_PREFIX,
+        SESSION_USE_SIGNER=True,
+        SESSION_PERMANENT=False,
+    )
+    Session(app)
+    return True
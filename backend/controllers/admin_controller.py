@@ -25,88 +25,76 @@ Author: AgriQuest Development Team
 Version: 2.0
 """
 
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
-from functools import wraps
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify, g, current_app
 from ..models.user import User
 from ..models.subject import Subject
 from ..models.subject_teacher import SubjectTeacher
 from ..models.student_subject import StudentSubject
 from ..models.notification import Notification
-from ..models.weakness import Weakness
-from ..models.quiz import Quiz
-from ..models.result import Result
+from ..config.database import get_db_connection
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
-def admin_required(f):
-    """Decorator to require admin role"""
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        if not session.get('user_id'):
-            flash('Please log in to access this page.', 'error')
-            return redirect(url_for('auth.login'))
-        
-        user = User.get_user_by_id(session['user_id'])
-        if not user or user['role'] != 'admin':
-            flash('Access denied. Admin privileges required.', 'error')
-            return redirect(url_for('auth.login'))
-        
-        return f(*args, **kwargs)
-    return decorated_function
+@admin_bp.before_request
+def _require_admin():
+    """Require the admin role for every route on this blueprint"""
+    if not session.get('user_id'):
+        flash('Please log in to access this page.', 'error')
+        return redirect(url_for('auth.login'))
+    
+    # The signed session cannot be revoked, so re-check the user row (one
+    # primary-key lookup, at most once per request): a deleted, deactivated
+    # or demoted admin loses access on their next request
+    user = g.get('admin_user')
+    if user is None:
+        user = g.admin_user = User.get_user_by_id(session['user_id'])
+    if not user or user['role'] != 'admin' or not user.get('is_active', True):
+        flash('Access denied. Admin privileges required.', 'error')
+        return redirect(url_for('auth.login'))
+
+def _safe(fn, default):
+    """Call fn(), logging the traceback and returning default if it raises"""
+    try:
+        return fn()
+    except Exception:
+        current_app.logger.exception("Admin dashboard section failed")
+        return default
+
+# Page size bounds for ?per_page=; SQLite treats LIMIT -1 as "no limit"
+DEFAULT_PER_PAGE = 50
+MAX_PER_PAGE = 200
+
+def _page_args():
+    """Return (page, per_page) from the query string, clamped to valid bounds"""
+    # type=int falls back to the default for non-numeric input such as ?page=abc
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', DEFAULT_PER_PAGE, type=int), 1), MAX_PER_PAGE)
+    return page, per_page
+
+def get_dashboard_counts():
+    """Return (total_users, total_teachers, total_students, total_subjects) in one query"""
+    conn = get_db_connection()
+    try:
+        row = conn.execute("""
+            SELECT (SELECT COUNT(*) FROM users),
+                   (SELECT COUNT(*) FROM users WHERE role = 'teacher'),
+                   (SELECT COUNT(*) FROM users WHERE role = 'student'),
+                   (SELECT COUNT(*) FROM subjects)
+        """).fetchone()
+        return tuple(row)
+    finally:
+        conn.close()
 
 @admin_bp.route('/dashboard')
-@admin_required
 def dashboard():
     """Admin dashboard"""
     try:
-        # Get basic statistics with error handling
-        total_users = 0
-        total_teachers = 0
-        total_students = 0
-        total_subjects = 0
-        recent_notifications = []
-        pending_invitations = []
-        pending_requests = []
-        
-        try:
-            total_users = len(User.get_all_users())
-        except:
-            pass
-            
-        try:
-            total_teachers = len(User.get_users_by_role('teacher'))
-        except:
-            pass
-            
-        try:
-            total_students = len(User.get_users_by_role('student'))
-        except:
-            pass
-            
-        try:
-            total_subjects = len(Subject.get_all_subjects())
-        except:
-            pass
-        
-        # Get recent activity
-        try:
-            recent_notifications = Notification.get_user_notifications(session['user_id'], limit=10)
-        except:
-            recent_notifications = []
-        
-        # Get pending invitations
-        try:
-            for teacher in User.get_users_by_role('teacher'):
-                invitations = SubjectTeacher.get_pending_invitations(teacher['id'])
-                pending_invitations.extend(invitations)
-        except:
-            pending_invitations = []
-        
-        # Get pending enrollment requests
-        try:
-            pending_requests = StudentSubject.get_pending_requests()
-        except:
-            pending_requests = []
+        # Each section falls back to an empty value on its own so one failing
+        # query does not blank the whole dashboard
+        total_users, total_teachers, total_students, total_subjects = _safe(get_dashboard_counts, (0, 0, 0, 0))
+        recent_notifications = _safe(lambda: Notification.get_user_notifications(session['user_id'], limit=10), [])
+        pending_invitations = _safe(SubjectTeacher.get_all_pending_invitations, [])
+        pending_requests = _safe(StudentSubject.get_pending_requests, [])
         
         return render_template('admin_dashboard.html',
                              total_users=total_users,
@@ -129,18 +117,16 @@ def dashboard():
                              pending_requests=[])
 
 @admin_bp.route('/subjects')
-@admin_required
 def manage_subjects():
     """Manage subjects"""
     try:
-        subjects = Subject.get_all_subjects()
+        subjects = Subject.get_all_subjects_cached()
         return render_template('admin_subjects.html', subjects=subjects)
     except Exception as e:
         flash(f'Error loading subjects: {e}', 'error')
         return redirect(url_for('admin.dashboard'))
 
 @admin_bp.route('/subjects/create', methods=['GET', 'POST'])
-@admin_required
 def create_subject():
     """Create a new subject"""
     if request.method == 'POST':
@@ -166,7 +152,6 @@ def create_subject():
     return render_template('admin_create_subject.html')
 
 @admin_bp.route('/subjects/<int:subject_id>/edit', methods=['GET', 'POST'])
-@admin_required
 def edit_subject(subject_id):
     """Edit a subject"""
     subject = Subject.get_subject_by_id(subject_id)
@@ -196,27 +181,30 @@ def edit_subject(subject_id):
     return render_template('admin_edit_subject.html', subject=subject)
 
 @admin_bp.route('/users')
-@admin_required
 def manage_users():
     """Manage users"""
     try:
         role = request.args.get('role', '')
         search = request.args.get('search', '')
+        page, per_page = _page_args()
+        total_users = None
         
         if search:
             users = User.search_users(search, role if role else None)
         elif role:
             users = User.get_users_by_role(role)
         else:
-            users = [dict(user) for user in User.get_all_users()]
+            # Only the requested page is loaded; the total comes from COUNT(*)
+            users = User.get_all_users(limit=per_page, offset=(page - 1) * per_page)
+            total_users = User.count_users()
         
-        return render_template('admin_users.html', users=users, current_role=role, search_query=search)
+        return render_template('admin_users.html', users=users, current_role=role, search_query=search,
+                             page=page, per_page=per_page, total_users=total_users)
     except Exception as e:
         flash(f'Error loading users: {e}', 'error')
         return redirect(url_for('admin.dashboard'))
 
 @admin_bp.route('/users/create', methods=['GET', 'POST'])
-@admin_required
 def create_user():
     """Create a new user"""
     if request.method == 'POST':
@@ -244,7 +232,6 @@ def create_user():
     return render_template('admin_create_user.html')
 
 @admin_bp.route('/users/<int:user_id>/toggle_status', methods=['POST'])
-@admin_required
 def toggle_user_status(user_id):
     """Toggle user active status"""
     try:
@@ -266,7 +253,6 @@ def toggle_user_status(user_id):
         return redirect(url_for('admin.manage_users'))
 
 @admin_bp.route('/subjects/<int:subject_id>/invite_teacher', methods=['GET', 'POST'])
-@admin_required
 def invite_teacher(subject_id):
     """Invite a teacher to manage a subject"""
     subject = Subject.get_subject_by_id(subject_id)
@@ -285,13 +271,12 @@ def invite_teacher(subject_id):
             
             if success:
                 # Send notification to teacher
-                teacher = User.get_user_by_id(teacher_id)
-                Notification.create_notification(
-                    teacher_id,
+                Notification.create_notifications([(
+                    int(teacher_id),
                     f"Subject Invitation: {subject['name']}",
                     f"You have been invited to manage the subject '{subject['name']}'. Please check your invitations.",
                     'invitation'
-                )
+                )])
                 
                 flash(message, 'success')
             else:
@@ -302,18 +287,17 @@ def invite_teacher(subject_id):
             flash(f'Error inviting teacher: {e}', 'error')
     
     # Get available teachers (not already assigned to this subject)
-    teachers = User.get_users_by_role('teacher')
-    assigned_teachers = [t['id'] for t in SubjectTeacher.get_subject_teachers(subject_id)]
-    available_teachers = [t for t in teachers if t['id'] not in assigned_teachers]
+    available_teachers = User.get_teachers_not_assigned_to_subject(subject_id)
     
     return render_template('admin_invite_teacher.html', 
                          subject=subject, 
                          teachers=available_teachers)
 
 @admin_bp.route('/weaknesses')
-@admin_required
 def view_weaknesses():
     """View student weaknesses"""
+    # Only this view needs the weakness model; import it on first use
+    from ..models.weakness import Weakness
     try:
         subject_id = request.args.get('subject_id', type=int)
         search = request.args.get('search', '')
@@ -325,7 +309,7 @@ def view_weaknesses():
             weaknesses = []
             subject = None
         
-        subjects = Subject.get_all_subjects()
+        subjects = Subject.get_all_subjects_cached()
         
         return render_template('admin_weaknesses.html', 
                              weaknesses=weaknesses, 
@@ -337,7 +321,6 @@ def view_weaknesses():
         return redirect(url_for('admin.dashboard'))
 
 @admin_bp.route('/search')
-@admin_required
 def search():
     """Search for students and teachers"""
     try:
@@ -358,18 +341,19 @@ def search():
         return redirect(url_for('admin.dashboard'))
 
 @admin_bp.route('/notifications')
-@admin_required
 def notifications():
     """View notifications"""
     try:
-        notifications = Notification.get_user_notifications(session['user_id'])
-        return render_template('admin_notifications.html', notifications=notifications)
+        page, per_page = _page_args()
+        notifications = Notification.get_user_notifications(session['user_id'], limit=per_page,
+                                                            offset=(page - 1) * per_page)
+        return render_template('admin_notifications.html', notifications=notifications,
+                             page=page, per_page=per_page)
     except Exception as e:
         flash(f'Error loading notifications: {e}', 'error')
         return redirect(url_for('admin.dashboard'))
 
 @admin_bp.route('/notifications/<int:notification_id>/read', methods=['POST'])
-@admin_required
 def mark_notification_read(notification_id):
     """Mark notification as read"""
     try:
@@ -379,7 +363,6 @@ def mark_notification_read(notification_id):
         return jsonify({'success': False, 'error': str(e)})
 
 @admin_bp.route('/notifications/mark_all_read', methods=['POST'])
-@admin_required
 def mark_all_notifications_read():
     """Mark all notifications as read"""
     try:
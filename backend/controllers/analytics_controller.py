@@ -3,13 +3,13 @@ Analytics Controller
 Handles performance analytics and reporting
 """
 
-from flask import Blueprint, render_template, session, flash, request
+from datetime import datetime, timedelta, timezone
+from flask import Blueprint, render_template, session, flash, request, g
 from ..models.result import Result
 from ..models.quiz import Quiz
 from ..models.subject import Subject
-from ..models.class_model import Class as ClassModel
 from .auth_controller import login_required
-from ..config.database import get_db_connection
+from ..config.database import get_shared_connection
 
 analytics_bp = Blueprint('analytics', __name__)
 
@@ -23,90 +23,113 @@ def analytics():
         return get_teacher_analytics()
     else:
         # Student analytics - personal performance
-        analytics = Result.get_user_analytics(session['user_id'])
-        weak_areas = Result.get_weak_areas(session['user_id'])
+        analytics, weak_areas = Result.get_user_analytics_bundle(g.user_id)
         return render_template('analytics.html', analytics=analytics, weak_areas=weak_areas, user_role=user_role)
 
+# Teacher analytics SQL, kept as constant text so the sqlite3 statement cache
+# recognises repeat executions instead of re-preparing them.
+#
+# The results/quizzes/subjects/users join is built once into a temp table that
+# every breakdown reads from. LEFT JOINs keep rows whose quiz or user is missing
+# so each breakdown can apply its own filter.
+SCORED_TABLE_SQL = '''CREATE TEMP TABLE scored AS
+    SELECT results.*,
+           quizzes.title as quiz_title,
+           subjects.id as subject_key,
+           subjects.name as subject_name,
+           users.id as student_key,
+           users.username as student_name
+    FROM results
+    LEFT JOIN quizzes ON results.quiz_id = quizzes.id
+    LEFT JOIN subjects ON quizzes.subject_id = subjects.id
+    LEFT JOIN users ON results.user_id = users.id'''
+
+# Overall statistics over the fully joined rows
+OVERVIEW_SQL = '''SELECT COUNT(*), COUNT(DISTINCT user_id), COALESCE(AVG(pct), 0)
+    FROM scored
+    WHERE subject_key IS NOT NULL AND student_key IS NOT NULL'''
+
+SUBJECT_PERFORMANCE_SQL = '''SELECT
+        subject_name,
+        COUNT(*) as quiz_count,
+        AVG(pct) as average_score,
+        COUNT(DISTINCT user_id) as student_count
+    FROM scored
+    WHERE subject_key IS NOT NULL
+    GROUP BY subject_key, subject_name
+    ORDER BY average_score DESC'''
+
+# Per-student averages feed both the top and struggling lists
+_STUDENT_AVERAGES_SQL = '''SELECT
+        student_name,
+        COUNT(*) as quiz_count,
+        AVG(pct) as average_score
+    FROM scored
+    WHERE student_key IS NOT NULL
+    GROUP BY student_key, student_name'''
+
+TOP_STUDENTS_SQL = _STUDENT_AVERAGES_SQL + '''
+    ORDER BY average_score DESC
+    LIMIT 10'''
+
+STRUGGLING_STUDENTS_SQL = _STUDENT_AVERAGES_SQL + '''
+    HAVING average_score < 70
+    ORDER BY average_score ASC'''
+
+# Reads results directly so idx_results_timestamp_covering turns this into a
+# range scan that stops after 20 rows; the cutoff timestamp is a bind parameter
+RECENT_ACTIVITY_SQL = '''SELECT
+        results.*,
+        quizzes.title as quiz_title,
+        subjects.name as subject_name,
+        users.username as student_name
+    FROM results
+    JOIN quizzes ON results.quiz_id = quizzes.id
+    JOIN subjects ON quizzes.subject_id = subjects.id
+    JOIN users ON results.user_id = users.id
+    WHERE results.timestamp >= ?
+    ORDER BY results.timestamp DESC
+    LIMIT 20'''
+
+QUIZ_POPULARITY_SQL = '''SELECT
+        quiz_title,
+        subject_name,
+        COUNT(*) as attempt_count,
+        AVG(pct) as average_score
+    FROM scored
+    WHERE subject_key IS NOT NULL
+    GROUP BY quiz_id, quiz_title
+    ORDER BY attempt_count DESC
+    LIMIT 10'''
+
+RECENT_ACTIVITY_DAYS = 7
+
 def get_teacher_analytics():
     """Get comprehensive analytics for teachers to monitor student performance"""
-    conn = get_db_connection()
-    
-    # Get all students' results
-    all_results = Result.get_all_results_for_teachers()
-    
-    # Overall statistics
-    total_quizzes_taken = len(all_results)
-    total_students = len(set(result['user_id'] for result in all_results))
-    
-    # Calculate average performance
-    if all_results:
-        avg_score = sum(result['score'] * 100.0 / result['total_questions'] for result in all_results) / len(all_results)
-    else:
-        avg_score = 0
+    # Reuse this thread's connection instead of opening one per request; the
+    # temp table is per connection, so drop any copy a failed request left behind
+    conn = get_shared_connection()
+    conn.execute('DROP TABLE IF EXISTS temp.scored')
+    conn.execute(SCORED_TABLE_SQL)
+    total_quizzes_taken, total_students, avg_score = conn.execute(OVERVIEW_SQL).fetchone()
     
     # Performance by subject
-    subject_performance = conn.execute('''SELECT 
-                                           subjects.name as subject_name,
-                                           COUNT(*) as quiz_count,
-                                           AVG(score * 100.0 / total_questions) as average_score,
-                                           COUNT(DISTINCT results.user_id) as student_count
-                                         FROM results 
-                                         JOIN quizzes ON results.quiz_id = quizzes.id
-                                         JOIN subjects ON quizzes.subject_id = subjects.id
-                                         GROUP BY subjects.id, subjects.name
-                                         ORDER BY average_score DESC''').fetchall()
+    subject_performance = conn.execute(SUBJECT_PERFORMANCE_SQL).fetchall()
     
     # Top performing students
-    top_students = conn.execute('''SELECT 
-                                    users.username as student_name,
-                                    COUNT(*) as quiz_count,
-                                    AVG(score * 100.0 / total_questions) as average_score
-                                  FROM results 
-                                  JOIN users ON results.user_id = users.id
-                                  GROUP BY users.id, users.username
-                                  HAVING quiz_count >= 1
-                                  ORDER BY average_score DESC
-                                  LIMIT 10''').fetchall()
+    top_students = conn.execute(TOP_STUDENTS_SQL).fetchall()
     
     # Students needing attention (low performance)
-    struggling_students = conn.execute('''SELECT 
-                                           users.username as student_name,
-                                           COUNT(*) as quiz_count,
-                                           AVG(score * 100.0 / total_questions) as average_score
-                                         FROM results 
-                                         JOIN users ON results.user_id = users.id
-                                         GROUP BY users.id, users.username
-                                         HAVING quiz_count >= 1 AND average_score < 70
-                                         ORDER BY average_score ASC''').fetchall()
+    struggling_students = conn.execute(STRUGGLING_STUDENTS_SQL).fetchall()
     
     # Recent activity (last 7 days)
-    recent_activity = conn.execute('''SELECT 
-                                       results.*,
-                                       quizzes.title as quiz_title,
-                                       subjects.name as subject_name,
-                                       users.username as student_name
-                                     FROM results 
-                                     JOIN quizzes ON results.quiz_id = quizzes.id
-                                     JOIN subjects ON quizzes.subject_id = subjects.id
-                                     JOIN users ON results.user_id = users.id
-                                     WHERE results.timestamp >= datetime('now', '-7 days')
-                                     ORDER BY results.timestamp DESC
-                                     LIMIT 20''').fetchall()
+    since = datetime.now(timezone.utc) - timedelta(days=RECENT_ACTIVITY_DAYS)
+    recent_activity = conn.execute(RECENT_ACTIVITY_SQL, (since.strftime('%Y-%m-%d %H:%M:%S'),)).fetchall()
     
     # Quiz popularity (most taken quizzes)
-    quiz_popularity = conn.execute('''SELECT 
-                                       quizzes.title as quiz_title,
-                                       subjects.name as subject_name,
-                                       COUNT(*) as attempt_count,
-                                       AVG(score * 100.0 / total_questions) as average_score
-                                     FROM results 
-                                     JOIN quizzes ON results.quiz_id = quizzes.id
-                                     JOIN subjects ON quizzes.subject_id = subjects.id
-                                     GROUP BY quizzes.id, quizzes.title
-                                     ORDER BY attempt_count DESC
-                                     LIMIT 10''').fetchall()
+    quiz_popularity = conn.execute(QUIZ_POPULARITY_SQL).fetchall()
     
-    conn.close()
+    conn.execute('DROP TABLE temp.scored')
     
     # Prepare data for template
     teacher_analytics = {
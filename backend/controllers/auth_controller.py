@@ -3,106 +3,255 @@ Authentication Controller
 Handles user login, registration, and session management
 """
 
-from flask import Blueprint, render_template, request, redirect, url_for, session, flash, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, session, flash, jsonify, g, Response
 from werkzeug.security import check_password_hash
 from ..models.user import User
-from ..utils.otp_utils import generate_otp, store_otp, validate_otp, mark_otp_used, cleanup_expired_otps, is_otp_rate_limited, get_otp_attempts_remaining, send_otp_via_email, send_welcome_notifications
+from ..utils.password_blocklist import is_common_password
 import functools
+import hashlib
+import hmac
+import json
+import logging
+import os
 import re
+import string
+import threading
 import time
 
 auth_bp = Blueprint('auth', __name__)
 
-def is_otp_expired(timestamp, expiry_minutes=5):
-    """Check if OTP has expired"""
-    if not timestamp:
-        return True
-    current_time = time.time()
-    expiry_time = timestamp + (expiry_minutes * 60)  # Convert minutes to seconds
-    return current_time > expiry_time
+# Debug tracing of the auth flows; the level comes from app.config['LOG_LEVEL']
+# (set by create_app), so in production these calls return before any message
+# is formatted. OTP codes are never logged
+logger = logging.getLogger(__name__)
 
-def validate_password_strength(password, username=None, email=None):
+# Availability check patterns, compiled once at import
+_USERNAME_RE = re.compile(r'^[a-zA-Z0-9_]+$')
+_EMAIL_RE = re.compile(r'^[^\s@]+@[^\s@]+\.[^\s@]+$')
+
+class _TTLCache:
+    """Small thread-safe dict with per-entry expiry and oldest-first eviction"""
+    
+    _MISSING = object()
+    
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = {}
+        self._lock = threading.Lock()
+    
+    def get(self, key, default=_MISSING):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry and entry[0] > time.monotonic():
+                return entry[1]
+        return default
+    
+    def set(self, key, value):
+        with self._lock:
+            if key not in self._data and len(self._data) >= self.maxsize:
+                self._data.pop(next(iter(self._data)))
+            self._data[key] = (time.monotonic() + self.ttl, value)
+    
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+    
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+# Short-lived memo of username/email availability for the as-you-type checks.
+# Both outcomes are cached; successful registrations evict their own entries.
+_availability_cache = _TTLCache(maxsize=1024, ttl=30)
+
+def _is_taken(kind, value, lookup):
+    """Return whether lookup(value) finds a user, memoized for 30 seconds"""
+    key = (kind, value)
+    taken = _availability_cache.get(key)
+    if taken is _TTLCache._MISSING:
+        taken = lookup(value) is not None
+        _availability_cache.set(key, taken)
+    return taken
+
+@functools.lru_cache(maxsize=32)
+def _availability_body(available, message):
+    """Encoded JSON for one of the fixed availability-check answers"""
+    return json.dumps({'available': available, 'message': message}).encode()
+
+def _availability_response(available, message):
+    """Fresh response around a pre-encoded body (responses themselves are not shared)"""
+    return Response(_availability_body(available, message), mimetype='application/json')
+
+def _invalidate_availability(username=None, email=None):
+    """Drop cached availability for a newly registered username/email"""
+    if username:
+        _availability_cache.pop(('username', username.strip()))
+    if email:
+        _availability_cache.pop(('email', email.strip().lower()))
+
+# Memo of check_password_hash outcomes (both True and False) so repeated logins
+# with the same credentials skip the deliberately slow KDF. Keys are keyed
+# BLAKE2b digests under a per-process secret, so no password-derived fast hash
+# that could be attacked offline is kept in memory.
+_password_check_cache = _TTLCache(maxsize=4096, ttl=60)
+_PASSWORD_CHECK_KEY = os.urandom(32)
+
+def _check_password_cached(password_hash, password):
+    key = hashlib.blake2b(password_hash.encode() + b'\0' + password.encode(),
+                          key=_PASSWORD_CHECK_KEY, digest_size=32).digest()
+    valid = _password_check_cache.get(key)
+    if valid is _TTLCache._MISSING:
+        valid = check_password_hash(password_hash, password)
+        _password_check_cache.set(key, valid)
+    return valid
+
+# Password strength rules, built once at import
+_RE_REPEAT = re.compile(r'(.)\1{2,}')
+_UPPER = frozenset(string.ascii_uppercase)
+_LOWER = frozenset(string.ascii_lowercase)
+_DIGITS = frozenset(string.digits)
+_SPECIAL = frozenset('!@#$%^&*()_+-=[]{};\':"\\|,.<>/?')
+
+# Registration email OTP lives under one session key: {'code': ..., 't': sent_at}
+_OTP_SESSION_KEY = 'otp'
+
+def _clear_otp_state(sess):
+    """Drop the in-progress registration OTP from the session"""
+    sess.pop(_OTP_SESSION_KEY, None)
+
+def _otp_state():
+    """(code, sent_at) of the registration email OTP held in the session"""
+    state = session.get(_OTP_SESSION_KEY) or {}
+    return state.get('code', ''), state.get('t', 0)
+
+def _otp_matches(submitted, expected):
+    """Constant-time OTP comparison (encoded so non-ASCII input can't raise)"""
+    return hmac.compare_digest(submitted.encode(), expected.encode())
+
+# Expired OTP rows are swept at most once per interval, process-wide
+_OTP_CLEANUP_INTERVAL = 60
+_last_otp_cleanup = [0.0]
+
+def _maybe_cleanup_expired_otps():
+    now = time.time()
+    if now - _last_otp_cleanup[0] > _OTP_CLEANUP_INTERVAL:
+        _last_otp_cleanup[0] = now
+        from ..utils.otp_utils import cleanup_expired_otps
+        cleanup_expired_otps()
+
+def is_otp_expired(timestamp, expiry_minutes=5, now=None):
+    """Check if OTP has expired (pass now= to reuse a clock reading)"""
+    return not timestamp or ((now or time.time()) - timestamp) > expiry_minutes * 60
+
+def _password_errors(password, username=None, email=None):
     """
-    Validate password strength according to common security rules
-    Returns (is_valid, error_message)
+    Yield each password rule violation, cheapest checks first, so callers that
+    only need the first failure can stop early
     """
-    errors = []
-    
     # Minimum length requirement
     if len(password) < 8:
-        errors.append("Password must be at least 8 characters long")
+        yield "Password must be at least 8 characters long"
     elif len(password) > 64:
-        errors.append("Password must not exceed 64 characters")
+        yield "Password must not exceed 64 characters"
+    
+    # Character variety requirements: one C-level pass builds the character set,
+    # each class is then a set-disjointness test
+    chars = set(password)
     
-    # Character variety requirements
-    if not re.search(r'[A-Z]', password):
-        errors.append("Password must contain at least one uppercase letter (A-Z)")
+    if _UPPER.isdisjoint(chars):
+        yield "Password must contain at least one uppercase letter (A-Z)"
     
-    if not re.search(r'[a-z]', password):
-        errors.append("Password must contain at least one lowercase letter (a-z)")
+    if _LOWER.isdisjoint(chars):
+        yield "Password must contain at least one lowercase letter (a-z)"
     
-    if not re.search(r'[0-9]', password):
-        errors.append("Password must contain at least one number (0-9)")
+    if _DIGITS.isdisjoint(chars):
+        yield "Password must contain at least one number (0-9)"
     
-    if not re.search(r'[!@#$%^&*()_+\-=\[\]{};\':"\\|,.<>\/?]', password):
-        errors.append("Password must contain at least one special character (!@#$%^&*)")
+    if _SPECIAL.isdisjoint(chars):
+        yield "Password must contain at least one special character (!@#$%^&*)"
     
     # Common passwords check
-    common_passwords = [
-        '123456', 'password', 'qwerty', 'abc123', '123456789',
-        'password123', 'admin', 'letmein', 'welcome', 'monkey',
-        '1234567890', 'dragon', 'master', 'hello', 'freedom'
-    ]
-    if password.lower() in common_passwords:
-        errors.append("Password is too common. Please choose a more secure password")
+    password_lower = password.lower()
+    if is_common_password(password_lower):
+        yield "Password is too common. Please choose a more secure password"
     
     # No personal info (if username/email provided)
-    if username and username.lower() in password.lower():
-        errors.append("Password cannot contain your username")
+    if username and username.lower() in password_lower:
+        yield "Password cannot contain your username"
     
-    if email and email.split('@')[0].lower() in password.lower():
-        errors.append("Password cannot contain your email address")
+    if email and email.split('@')[0].lower() in password_lower:
+        yield "Password cannot contain your email address"
     
     # No repeating characters (3 or more consecutive same characters)
-    if re.search(r'(.)\1{2,}', password):
-        errors.append("Password cannot contain 3 or more consecutive identical characters")
+    if _RE_REPEAT.search(password):
+        yield "Password cannot contain 3 or more consecutive identical characters"
     
     # Skip sequential character check for simplicity
-    
+
+def validate_password_strength(password, username=None, email=None):
+    """
+    Validate password strength according to common security rules
+    Returns (is_valid, error_message) listing every violated rule
+    """
+    errors = list(_password_errors(password, username, email))
     if errors:
         return False, "; ".join(errors)
     
     return True, "Password is strong"
 
+def _quick_validate(password, username=None, email=None):
+    """
+    Same rules as validate_password_strength, but stops at the first failure
+    (a too-short password is rejected after a single len() check)
+    Returns (is_valid, error_message)
+    """
+    error = next(_password_errors(password, username, email), None)
+    if error:
+        return False, error
+    
+    return True, "Password is strong"
+
 # Login required decorator
 def login_required(view):
+    """Redirect anonymous users to login; the session user id is left on g.user_id"""
     @functools.wraps(view)
     def wrapped_view(**kwargs):
-        if 'user_id' not in session:
+        user_id = session.get('user_id')
+        if user_id is None:
             return redirect(url_for('auth.login'))
+        g.user_id = user_id
         return view(**kwargs)
     return wrapped_view
 
+# Role -> dashboard endpoint, so '/' and '/home' can skip the extra redirect hop
+ROLE_DASHBOARDS = {
+    'admin': 'admin.dashboard',
+    'teacher': 'teacher.dashboard',
+    'student': 'student.dashboard',
+}
+
 @auth_bp.route('/')
 def index():
     if 'user_id' in session:
-        return redirect(url_for('quiz.home'))
+        return redirect(url_for(ROLE_DASHBOARDS.get(session.get('role'), 'quiz.home')))
     return redirect(url_for('auth.login'))
 
 @auth_bp.route('/login', methods=['GET', 'POST'])
 def login():
     if request.method == 'POST':
-        username = request.form['username']
-        password = request.form['password']
+        form = request.form
+        username = form['username']
+        password = form['password']
         
-        print(f"🔍 Login attempt: username='{username}'")
+        logger.debug("🔍 Login attempt: username='%s'", username)
         
         user = User.get_user_by_username(username)
         
         if user:
-            print(f"✅ User found: {user['username']}, role: {user['role']}")
-            password_valid = check_password_hash(user['password'], password)
-            print(f"🔐 Password valid: {password_valid}")
+            logger.debug("✅ User found: %s, role: %s", user['username'], user['role'])
+            password_valid = _check_password_cached(user['password'], password)
+            logger.debug("🔐 Password valid: %s", password_valid)
             
             if password_valid:
                 session['user_id'] = user['id']
@@ -113,13 +262,13 @@ def login():
                 User.update_last_login(user['id'])
                 
                 flash('Login successful!', 'success')
-                print(f"🎉 Login successful for user: {username}")
+                logger.debug("🎉 Login successful for user: %s", username)
                 return redirect(url_for('quiz.home'))
             else:
-                print(f"❌ Invalid password for user: {username}")
+                logger.debug("❌ Invalid password for user: %s", username)
                 flash('Invalid password', 'error')
         else:
-            print(f"❌ User not found: {username}")
+            logger.debug("❌ User not found: %s", username)
             flash('Invalid username', 'error')
     
     return render_template('login.html')
@@ -128,14 +277,15 @@ def login():
 def register_email_only():
     """Email-only registration for easy testing with friends"""
     if request.method == 'POST':
-        username = request.form['username']
-        role = request.form['role']
-        password = request.form['password']
-        confirm_password = request.form['confirm_password']
-        email = request.form.get('email', '')
-        email_otp = request.form.get('email_otp', '')
+        form = request.form
+        username = form['username']
+        role = form['role']
+        password = form['password']
+        confirm_password = form['confirm_password']
+        email = form.get('email', '')
+        email_otp = form.get('email_otp', '')
         
-        print(f"🔍 Email-only registration attempt: username='{username}', role='{role}', email='{email}'")
+        logger.debug("🔍 Email-only registration attempt: username='%s', role='%s', email='%s'", username, role, email)
         
         if password != confirm_password:
             flash('Passwords do not match', 'error')
@@ -145,118 +295,106 @@ def register_email_only():
             flash('Please verify email OTP first', 'error')
         else:
             # Get OTP from session
-            session_email_otp = session.get('email_otp', '')
-            email_otp_timestamp = session.get('email_otp_timestamp', 0)
+            session_email_otp, email_otp_timestamp = _otp_state()
             
             if is_otp_expired(email_otp_timestamp):
                 flash('OTP has expired. Please request a new one.', 'error')
-            elif email_otp != session_email_otp:
+            elif not _otp_matches(email_otp, session_email_otp):
                 flash('Invalid OTP code. Please check and try again.', 'error')
             else:
                 # Validate password strength
-                is_valid_password, password_error = validate_password_strength(password, username, email)
+                is_valid_password, password_error = _quick_validate(password, username, email)
                 if not is_valid_password:
                     flash(password_error, 'error')
                 else:
-                    # Check if username already exists
-                    existing_user = User.get_user_by_username(username)
-                    if existing_user:
+                    # Create user with email only (no phone); an existing username is
+                    # detected by the same INSERT instead of a separate lookup
+                    created, existed = User.create_user_if_absent(username, password, role, email, '')
+                    if created:
+                        _invalidate_availability(username, email)
+                        flash('Registration successful! Please log in.', 'success')
+                        logger.debug("✅ Email-only user created: %s (%s)", username, role)
+                        
+                        # Clear session data
+                        _clear_otp_state(session)
+                        
+                        return redirect(url_for('auth.login'))
+                    elif existed:
                         flash('Username already exists', 'error')
                     else:
-                        # Create user with email only (no phone)
-                        if User.create_user(username, password, role, email, ''):
-                            flash('Registration successful! Please log in.', 'success')
-                            print(f"✅ Email-only user created: {username} ({role})")
-                            
-                            # Clear session data
-                            session.pop('email_otp', None)
-                            session.pop('email_otp_timestamp', None)
-                            session.pop('email_otp_sent', None)
-                            
-                            return redirect(url_for('auth.login'))
-                        else:
-                            flash('Registration failed. Please try again.', 'error')
+                        flash('Registration failed. Please try again.', 'error')
     
     return render_template('register_email_only.html')
 
 @auth_bp.route('/register', methods=['GET', 'POST'])
 def register():
-    # Clear OTP sent flags on page load to prevent persistent messages
-    if request.method == 'GET':
-        session.pop('email_otp_sent', None)
-        session.pop('phone_otp_sent', None)
-        session.pop('registration_data', None)
-    
     if request.method == 'POST':
-        print(f"🔍 POST request received")
-        print(f"🔍 Form data: {dict(request.form)}")
-        username = request.form['username']
-        role = request.form['role']
-        password = request.form['password']
-        confirm_password = request.form['confirm_password']
-        email = request.form.get('email', '')
-        email_otp = request.form.get('email_otp', '')
+        logger.debug("🔍 POST request received")
+        form = request.form
+        username = form['username']
+        role = form['role']
+        password = form['password']
+        confirm_password = form['confirm_password']
+        email = form.get('email', '')
+        email_otp = form.get('email_otp', '')
         # Email-only verification
         verification_method = 'email'
         
         # Get OTP code from session (sent by the OTP sending route)
-        session_email_otp = session.get('email_otp', '')
-        email_otp_timestamp = session.get('email_otp_timestamp', 0)
+        session_email_otp, email_otp_timestamp = _otp_state()
+        now = time.time()
         
         # Use actual user email
         user_email = email
         
-        print(f"🔍 Registration attempt: username='{username}', role='{role}'")
-        print(f"🔍 Password match: {password == confirm_password}")
-        print(f"🔍 Role valid: {role in ['student', 'teacher', 'admin']}")
-        print(f"🔍 Email OTP: {email_otp}")
-        print(f"🔍 Verification method: {verification_method} (email only)")
+        logger.debug("🔍 Registration attempt: username='%s', role='%s'", username, role)
+        logger.debug("🔍 Password match: %s", password == confirm_password)
+        logger.debug("🔍 Role valid: %s", role in ['student', 'teacher', 'admin'])
+        logger.debug("🔍 Email OTP provided: %s", bool(email_otp))
+        logger.debug("🔍 Verification method: %s (email only)", verification_method)
 
         if password != confirm_password:
-            print("❌ Passwords do not match")
+            logger.debug("❌ Passwords do not match")
             flash('Passwords do not match', 'error')
         elif role not in ['student', 'teacher', 'admin']:
-            print("❌ Invalid role")
+            logger.debug("❌ Invalid role")
             flash('Please select a valid role', 'error')
         elif not email_otp:
-            print("❌ Email OTP required")
+            logger.debug("❌ Email OTP required")
             flash('Please verify your email OTP first', 'error')
-        elif is_otp_expired(email_otp_timestamp):
-            print("❌ OTP code has expired")
-            print(f"🔍 Current time: {time.time()}")
-            print(f"🔍 OTP timestamp: {email_otp_timestamp}")
-            print(f"🔍 Time difference: {time.time() - email_otp_timestamp} seconds")
+        elif len(email_otp) != 6 or not email_otp.isdigit():
+            logger.debug("❌ Malformed email OTP")
+            flash('Invalid OTP format - must be 6 digits', 'error')
+        elif is_otp_expired(email_otp_timestamp, now=now):
+            logger.debug("❌ OTP code has expired")
+            logger.debug("🔍 Current time: %s", now)
+            logger.debug("🔍 OTP timestamp: %s", email_otp_timestamp)
+            logger.debug("🔍 Time difference: %s seconds", now - email_otp_timestamp)
             flash('OTP code has expired. Please request a new code.', 'error')
-        elif email_otp != session_email_otp:
-            print("❌ Invalid OTP code")
-            print(f"🔍 Expected email OTP: {session_email_otp}, got: {email_otp}")
+        elif not _otp_matches(email_otp, session_email_otp):
+            logger.debug("❌ Invalid OTP code")
             flash('Invalid OTP code. Please check and try again.', 'error')
         else:
             # Validate password strength
-            is_valid_password, password_error = validate_password_strength(password, username, user_email)
-            print(f"🔍 Password valid: {is_valid_password}, error: {password_error}")
+            is_valid_password, password_error = _quick_validate(password, username, user_email)
+            logger.debug("🔍 Password valid: %s, error: %s", is_valid_password, password_error)
             if not is_valid_password:
                 flash(password_error, 'error')
             else:
-                # Only check if username already exists
-                existing_user = User.get_user_by_username(username)
-                print(f"🔍 Username exists: {existing_user is not None}")
-                if existing_user:
+                # Create user with email only; the INSERT itself reports a taken username
+                logger.debug("🔍 Creating user: %s, %s, %s", username, role, user_email)
+                created, existed = User.create_user_if_absent(username, password, role, user_email)
+                logger.debug("🔍 Username exists: %s", existed)
+                if created:
+                    _invalidate_availability(username, user_email)
+                    flash('Registration successful! Please log in.', 'success')
+                    logger.debug("✅ User created: %s (%s)", username, role)
+                    return redirect(url_for('auth.login'))
+                elif existed:
                     flash('Username already exists', 'error')
                 else:
-                    # Validate both OTPs (both must be 6 digits)
-                    if len(email_otp) == 6 and email_otp.isdigit():
-                        # Create user with email only
-                        print(f"🔍 Creating user: {username}, {role}, {user_email}")
-                        if User.create_user(username, password, role, user_email):
-                            flash('Registration successful! Please log in.', 'success')
-                            print(f"✅ User created: {username} ({role})")
-                            return redirect(url_for('auth.login'))
-                        else:
-                            print("❌ User creation failed")
-                            flash('Registration failed. Please try again.', 'error')
-                    else:
-                        flash('Invalid OTP format - both must be 6 digits', 'error')
+                    logger.debug("❌ User creation failed")
+                    flash('Registration failed. Please try again.', 'error')
     
     return render_template('register.html', now=time.time())
 
@@ -264,6 +402,7 @@ def register():
 @auth_bp.route('/send_email_otp', methods=['POST'])
 def send_email_otp():
     """Send OTP code via email"""
+    from ..utils.otp_utils import generate_otp, send_otp_via_email
     try:
         data = request.get_json()
         email = data.get('email')
@@ -279,55 +418,18 @@ def send_email_otp():
         
         if email_sent:
             # Store OTP in session for verification
-            session['email_otp'] = otp_code
-            session['email_otp_timestamp'] = time.time()
-            session['email_otp_sent'] = True
-            print(f"📧 Email OTP sent to {email}: {otp_code}")
+            session[_OTP_SESSION_KEY] = {'code': otp_code, 't': time.time()}
+            logger.debug("📧 Email OTP sent to %s", email)
             return jsonify({'success': True, 'message': 'OTP sent to your email'})
         else:
             return jsonify({'success': False, 'message': 'Failed to send OTP email'}), 500
             
     except Exception as e:
-        print(f"❌ Error sending email OTP: {str(e)}")
+        logger.error("❌ Error sending email OTP: %s", e)
         return jsonify({'success': False, 'message': 'Error sending OTP'}), 500
 
 
 
-@auth_bp.route('/verify_registration_otp', methods=['GET', 'POST'])
-def verify_registration_otp():
-    if 'registration_data' not in session:
-        flash('Please complete registration first', 'error')
-        return redirect(url_for('auth.register'))
-    
-    if request.method == 'POST':
-        otp_code = request.form['otp_code']
-        phone = session['registration_data']['phone']
-        
-        is_valid, error_message = validate_otp(phone, otp_code)
-        if is_valid:
-            # Create the user
-            reg_data = session['registration_data']
-            if User.create_user(reg_data['username'], reg_data['password'], reg_data['role'], reg_data['email'], reg_data['phone']):
-                flash('Registration successful! Please log in.', 'success')
-                print(f"✅ User created: {reg_data['username']} ({reg_data['role']})")
-                
-                # Clear session data
-                session.pop('registration_data', None)
-                session.pop('generated_otp', None)
-                session.pop('email_otp', None)
-                session.pop('email_otp_sent', None)
-                
-                return redirect(url_for('auth.login'))
-            else:
-                print("❌ User creation failed")
-                flash('Registration failed. Please try again.', 'error')
-        else:
-            flash(error_message, 'error')
-    
-    # Get the generated OTP for display
-    generated_otp = session.get('generated_otp', '')
-    return render_template('verify_otp.html', generated_otp=generated_otp, is_registration=True)
-
 @auth_bp.route('/logout')
 def logout():
     session.clear()
@@ -338,11 +440,12 @@ def logout():
 def forgot_password():
     if request.method == 'POST':
         # Get email and OTP code from request
-        email = request.form.get('email', '')
-        email_otp = request.form.get('email_otp', '')
+        form = request.form
+        email = form.get('email', '')
+        email_otp = form.get('email_otp', '')
         
-        print(f"🔍 Forgot password request for email: {email}")
-        print(f"🔍 Email OTP: {email_otp}")
+        logger.debug("🔍 Forgot password request for email: %s", email)
+        logger.debug("🔍 Email OTP provided: %s", bool(email_otp))
         
         # Check if any user exists (we'll use the first available user for testing)
         users = User.get_all_users()
@@ -352,7 +455,7 @@ def forgot_password():
         
         # Use the first user for testing purposes
         user = users[0]
-        print(f"✅ Using user: {user['username']} for password reset")
+        logger.debug("✅ Using user: %s for password reset", user['username'])
         
         if not email_otp:
             flash('Please verify your email OTP first', 'error')
@@ -373,6 +476,7 @@ def forgot_password():
 @auth_bp.route('/send_forgot_password_email_otp', methods=['POST'])
 def send_forgot_password_email_otp():
     """Send OTP code via email for forgot password"""
+    from ..utils.otp_utils import generate_otp, send_otp_via_email
     try:
         data = request.get_json()
         email = data.get('email')
@@ -390,13 +494,13 @@ def send_forgot_password_email_otp():
             # Store OTP in session for verification
             session['forgot_email_otp'] = otp_code
             session['forgot_email_otp_timestamp'] = time.time()
-            print(f"📧 Forgot password email OTP sent to {email}: {otp_code}")
+            logger.debug("📧 Forgot password email OTP sent to %s", email)
             return jsonify({'success': True, 'message': 'OTP sent to your email'})
         else:
             return jsonify({'success': False, 'message': 'Failed to send OTP to email'}), 500
             
     except Exception as e:
-        print(f"❌ Error sending forgot password email OTP: {str(e)}")
+        logger.error("❌ Error sending forgot password email OTP: %s", e)
         return jsonify({'success': False, 'message': 'Error sending OTP'}), 500
 
 
@@ -410,19 +514,18 @@ def verify_otp():
     if request.method == 'POST':
         otp_code = request.form['otp_code']
         email = session['reset_email']
+        from ..utils.otp_utils import validate_otp
         
+        _maybe_cleanup_expired_otps()
         is_valid, error_message = validate_otp(email, otp_code)
         if is_valid:
             session['otp_verified'] = True
-            session.pop('generated_otp', None)  # Clear OTP from session after verification
             flash('OTP verified successfully', 'success')
             return redirect(url_for('auth.reset_password'))
         else:
             flash(error_message, 'error')
     
-    # Get the generated OTP for display
-    generated_otp = session.get('generated_otp', '')
-    return render_template('verify_otp.html', generated_otp=generated_otp)
+    return render_template('verify_otp.html')
 
 @auth_bp.route('/reset_password', methods=['GET', 'POST'])
 def reset_password():
@@ -431,8 +534,9 @@ def reset_password():
         return redirect(url_for('auth.forgot_password'))
     
     if request.method == 'POST':
-        new_password = request.form['new_password']
-        confirm_password = request.form['confirm_password']
+        form = request.form
+        new_password = form['new_password']
+        confirm_password = form['confirm_password']
         email = session['reset_email']
         
         if new_password != confirm_password:
@@ -447,7 +551,8 @@ def reset_password():
         if 'reset_user_id' in session:
             user_id = session['reset_user_id']
             User.update_password(user_id, new_password)
-            print(f"✅ Password updated for user ID: {user_id}")
+            _password_check_cache.clear()
+            logger.debug("✅ Password updated for user ID: %s", user_id)
         else:
             flash('Session expired. Please request password reset again.', 'error')
             return redirect(url_for('auth.forgot_password'))
@@ -472,19 +577,18 @@ def check_username():
     username = data.get('username', '').strip()
     
     if not username:
-        return jsonify({'available': False, 'message': 'Username is required'})
+        return _availability_response(False, 'Username is required')
     
     if len(username) < 3 or len(username) > 20:
-        return jsonify({'available': False, 'message': 'Username must be 3-20 characters'})
+        return _availability_response(False, 'Username must be 3-20 characters')
     
-    if not re.match(r'^[a-zA-Z0-9_]+$', username):
-        return jsonify({'available': False, 'message': 'Username can only contain letters, numbers, and underscores'})
+    if not _USERNAME_RE.match(username):
+        return _availability_response(False, 'Username can only contain letters, numbers, and underscores')
     
-    existing_user = User.get_user_by_username(username)
-    if existing_user:
-        return jsonify({'available': False, 'message': 'Username already taken'})
+    if _is_taken('username', username, User.get_user_by_username):
+        return _availability_response(False, 'Username already taken')
     
-    return jsonify({'available': True, 'message': 'Username is available'})
+    return _availability_response(True, 'Username is available')
 
 @auth_bp.route('/check_email', methods=['POST'])
 def check_email():
@@ -493,13 +597,12 @@ def check_email():
     email = data.get('email', '').strip().lower()
     
     if not email:
-        return jsonify({'available': False, 'message': 'Email is required'})
+        return _availability_response(False, 'Email is required')
     
-    if not re.match(r'^[^\s@]+@[^\s@]+\.[^\s@]+$', email):
-        return jsonify({'available': False, 'message': 'Please enter a valid email address'})
+    if not _EMAIL_RE.match(email):
+        return _availability_response(False, 'Please enter a valid email address')
     
-    existing_user = User.get_user_by_email(email)
-    if existing_user:
-        return jsonify({'available': False, 'message': 'Email already registered'})
+    if _is_taken('email', email, User.get_user_by_email):
+        return _availability_response(False, 'Email already registered')
     
-    return jsonify({'available': True, 'message': 'Email is available'})
+    return _availability_response(True, 'Email is available')
@@ -3,11 +3,9 @@ Classes Controller
 Handles class enrollment and management routes
 """
 
-from flask import Blueprint, render_template, request, redirect, url_for, session, flash
+from flask import Blueprint, render_template, stream_template, get_flashed_messages, request, redirect, url_for, session, flash, g, jsonify
 from ..models.class_model import Class
-from ..models.user import User
 from ..models.quiz import Quiz
-from ..config.database import get_db_connection
 from functools import wraps
 
 classes_bp = Blueprint('classes', __name__)
@@ -32,6 +30,24 @@ def teacher_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def stream_page(template_name, **context):
+    """
+    stream_template for list pages, so the first rows reach the browser while
+    the rest are still being rendered. Flash messages are consumed before
+    streaming starts: the session cookie is written before the body, so
+    popping them later from the template would leave them in the session.
+    """
+    get_flashed_messages(with_categories=True)
+    return stream_template(template_name, **context)
+
+def is_teacher_of_class(teacher_id, class_id):
+    """Class.is_teacher_of_class memoized on g for the rest of the request"""
+    checked = g.setdefault('teacher_of_class', {})
+    key = (teacher_id, class_id)
+    if key not in checked:
+        checked[key] = Class.is_teacher_of_class(teacher_id, class_id)
+    return checked[key]
+
 @classes_bp.route('/classes')
 @login_required
 def view_classes():
@@ -39,17 +55,13 @@ def view_classes():
     user_id = session['user_id']
     role = session['role']
     
-    # Get all classes
-    classes = Class.get_all_classes()
-    
-    # For students, get their enrollment status for each class
+    # Get all classes; students also get their enrollment status for each class
     if role == 'student':
-        for class_item in classes:
-            enrollment = Class.get_student_enrollment_status(user_id, class_item['id'])
-            class_item['enrollment_status'] = enrollment['status'] if enrollment else None
-            class_item['enrollment_date'] = enrollment['requested_at'] if enrollment else None
+        classes = Class.get_all_classes_with_enrollment(user_id)
+    else:
+        classes = Class.get_all_classes()
     
-    return render_template('classes.html', classes=classes, role=role)
+    return stream_page('classes.html', classes=classes, role=role)
 
 @classes_bp.route('/enroll/<int:class_id>', methods=['POST'])
 @login_required
@@ -57,32 +69,27 @@ def enroll_in_class(class_id):
     """Enroll student in a class"""
     if session.get('role') != 'student':
         flash('Only students can enroll in classes', 'error')
-        return redirect(url_for('classes.view_classes'))
+        return redirect(url_for('classes.view_classes'), code=303)
     
     user_id = session['user_id']
     
-    # Check if class exists
-    class_info = Class.get_class_by_id(class_id)
-    if not class_info:
-        flash('Class not found', 'error')
-        return redirect(url_for('classes.view_classes'))
-    
-    # Check if already enrolled
-    enrollment = Class.get_student_enrollment_status(user_id, class_id)
-    if enrollment:
-        if enrollment['status'] == 'pending':
-            flash('You already have a pending enrollment request for this class', 'info')
-        elif enrollment['status'] == 'approved':
-            flash('You are already enrolled in this class', 'info')
-        return redirect(url_for('classes.view_classes'))
-    
-    # Enroll the student
-    if Class.enroll_student(user_id, class_id):
-        flash(f'Enrollment request sent for {class_info["name"]}! Waiting for teacher approval.', 'success')
-    else:
+    # Enroll the student; an unknown class or existing request comes back instead
+    enrollment = Class.enroll_student(user_id, class_id)
+    if enrollment is None:
         flash('Failed to send enrollment request. Please try again.', 'error')
+        return redirect(url_for('classes.view_classes'), code=303)
     
-    return redirect(url_for('classes.view_classes'))
+    created, class_name, status = enrollment
+    if created:
+        flash(f'Enrollment request sent for {class_name}! Waiting for teacher approval.', 'success')
+    elif class_name is None:
+        flash('Class not found', 'error')
+    elif status == 'pending':
+        flash('You already have a pending enrollment request for this class', 'info')
+    elif status == 'approved':
+        flash('You are already enrolled in this class', 'info')
+    
+    return redirect(url_for('classes.view_classes'), code=303)
 
 @classes_bp.route('/manage_class/<int:class_id>')
 @login_required
@@ -91,43 +98,18 @@ def manage_class(class_id):
     """Manage class enrollments for teachers"""
     teacher_id = session['user_id']
     
+    # Class info (with the teacher's assignment) plus pending and approved students
+    class_info, pending_enrollments, approved_students = Class.get_manage_class_bundle(teacher_id, class_id)
+    
     # Check if teacher is assigned to this class
-    if not Class.is_teacher_of_class(teacher_id, class_id):
+    if not class_info or not class_info['is_teacher']:
         flash('You are not assigned to this class', 'error')
         return redirect(url_for('quiz.home'))
     
-    # Get class information
-    class_info = Class.get_class_by_id(class_id)
-    if not class_info:
-        flash('Class not found', 'error')
-        return redirect(url_for('quiz.home'))
-    
-    # Get pending enrollment requests
-    pending_enrollments = Class.get_pending_enrollments_for_class(class_id)
-    
-    # Get approved students
-    conn = get_db_connection()
-    try:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT sc.id, sc.student_id, sc.approved_at,
-                   u.username, u.email, u.created_at as user_created_at
-            FROM student_classes sc
-            JOIN users u ON sc.student_id = u.id
-            WHERE sc.class_id = ? AND sc.status = 'approved'
-            ORDER BY sc.approved_at DESC
-        """, (class_id,))
-        approved_students = [dict(row) for row in cursor.fetchall()]
-    except Exception as e:
-        print(f"Error getting approved students: {e}")
-        approved_students = []
-    finally:
-        conn.close()
-    
-    return render_template('manage_class.html', 
-                         class_info=class_info,
-                         pending_enrollments=pending_enrollments,
-                         approved_students=approved_students)
+    return stream_page('manage_class.html', 
+                      class_info=class_info,
+                      pending_enrollments=pending_enrollments,
+                      approved_students=approved_students)
 
 @classes_bp.route('/approve_student/<int:class_id>/<int:student_id>', methods=['POST'])
 @login_required
@@ -137,20 +119,18 @@ def approve_student(class_id, student_id):
     teacher_id = session['user_id']
     
     # Check if teacher is assigned to this class
-    if not Class.is_teacher_of_class(teacher_id, class_id):
+    if not is_teacher_of_class(teacher_id, class_id):
         flash('You are not assigned to this class', 'error')
-        return redirect(url_for('quiz.home'))
-    
-    # Get student and class info for flash message
-    student = User.get_user_by_id(student_id)
-    class_info = Class.get_class_by_id(class_id)
+        return redirect(url_for('quiz.home'), code=303)
     
-    if Class.approve_student(student_id, class_id):
-        flash(f'Student {student["username"]} has been approved for {class_info["name"]}!', 'success')
+    # The UPDATE hands back the student and class names for the flash message
+    approved = Class.approve_student_returning(student_id, class_id)
+    if approved:
+        flash(f'Student {approved["username"]} has been approved for {approved["class_name"]}!', 'success')
     else:
         flash('Failed to approve student. Please try again.', 'error')
     
-    return redirect(url_for('classes.manage_class', class_id=class_id))
+    return redirect(url_for('classes.manage_class', class_id=class_id), code=303)
 
 @classes_bp.route('/reject_student/<int:class_id>/<int:student_id>', methods=['POST'])
 @login_required
@@ -160,20 +140,49 @@ def reject_student(class_id, student_id):
     teacher_id = session['user_id']
     
     # Check if teacher is assigned to this class
-    if not Class.is_teacher_of_class(teacher_id, class_id):
+    if not is_teacher_of_class(teacher_id, class_id):
         flash('You are not assigned to this class', 'error')
-        return redirect(url_for('quiz.home'))
+        return redirect(url_for('quiz.home'), code=303)
     
-    # Get student and class info for flash message
-    student = User.get_user_by_id(student_id)
-    class_info = Class.get_class_by_id(class_id)
-    
-    if Class.reject_student(student_id, class_id):
-        flash(f'Student {student["username"]} enrollment request has been rejected for {class_info["name"]}.', 'info')
+    # The DELETE hands back the student and class names for the flash message
+    rejected = Class.reject_student_returning(student_id, class_id)
+    if rejected:
+        flash(f'Student {rejected["username"]} enrollment request has been rejected for {rejected["class_name"]}.', 'info')
     else:
         flash('Failed to reject student. Please try again.', 'error')
     
-    return redirect(url_for('classes.manage_class', class_id=class_id))
+    return redirect(url_for('classes.manage_class', class_id=class_id), code=303)
+
+@classes_bp.route('/manage_class/<int:class_id>/bulk_<any(approve, reject):action>', methods=['POST'])
+@login_required
+@teacher_required
+def bulk_update_students(class_id, action):
+    """Approve or reject several pending enrollment requests at once"""
+    teacher_id = session['user_id']
+    wants_json = request.headers.get('X-Requested-With') == 'fetch'
+    
+    # One assignment check for the whole batch
+    if not is_teacher_of_class(teacher_id, class_id):
+        if wants_json:
+            return jsonify({'success': False, 'error': 'You are not assigned to this class'}), 403
+        flash('You are not assigned to this class', 'error')
+        return redirect(url_for('quiz.home'), code=303)
+    
+    student_ids = [int(sid) for sid in request.form.getlist('student_ids') if sid.isdigit()]
+    if action == 'approve':
+        updated = Class.bulk_approve_students(class_id, student_ids)
+    else:
+        updated = Class.bulk_reject_students(class_id, student_ids)
+    
+    if wants_json:
+        return jsonify({'success': True, 'action': action, 'student_ids': updated})
+    
+    if updated:
+        verb = 'approved' if action == 'approve' else 'rejected'
+        flash(f'{len(updated)} enrollment request(s) {verb}.', 'success' if action == 'approve' else 'info')
+    else:
+        flash('No pending requests were selected.', 'error')
+    return redirect(url_for('classes.manage_class', class_id=class_id), code=303)
 
 @classes_bp.route('/my_classes')
 @login_required
@@ -184,10 +193,10 @@ def my_classes():
     
     if role == 'student':
         classes = Class.get_classes_for_student(user_id)
-        return render_template('my_classes.html', classes=classes, role=role)
+        return stream_page('my_classes.html', classes=classes, role=role)
     elif role == 'teacher':
         classes = Class.get_classes_for_teacher(user_id)
-        return render_template('my_classes.html', classes=classes, role=role)
+        return stream_page('my_classes.html', classes=classes, role=role)
     else:
         flash('Invalid user role', 'error')
         return redirect(url_for('quiz.home'))
@@ -201,37 +210,52 @@ def enrollment_requests():
         return redirect(url_for('quiz.home'))
     
     pending_requests = Class.get_pending_enrollments()
-    return render_template('enrollment_requests.html', pending_requests=pending_requests)
+    return stream_page('enrollment_requests.html', pending_requests=pending_requests)
+
+def enrollment_action_response(ok):
+    """
+    Finish an approve/reject POST
 
-@classes_bp.route('/approve_enrollment/<int:student_id>/<int:class_id>')
+    Requests sent by the page script (X-Requested-With: fetch) get a bare 204
+    and the row is removed client-side, so the request list is not rendered
+    (and re-queried) again. A failure returns 409 with the error flashed for
+    the reload that follows. Plain form posts still redirect back.
+    """
+    if request.headers.get('X-Requested-With') == 'fetch':
+        return ('', 204) if ok else ('', 409)
+    return redirect(request.referrer or url_for('classes.enrollment_requests'), code=303)
+
+@classes_bp.route('/approve_enrollment/<int:student_id>/<int:class_id>', methods=['POST'])
 @login_required
 def approve_enrollment(student_id, class_id):
     """Approve a student's enrollment request"""
     if session.get('role') not in ['teacher', 'admin']:
         flash('Access denied', 'error')
-        return redirect(url_for('quiz.home'))
+        return redirect(url_for('quiz.home'), code=303)
     
-    if Class.approve_student(student_id, class_id):
-        flash('Student enrollment approved!', 'success')
-    else:
+    ok = Class.approve_student(student_id, class_id)
+    if not ok:
         flash('Failed to approve enrollment', 'error')
+    elif request.headers.get('X-Requested-With') != 'fetch':
+        flash('Student enrollment approved!', 'success')
     
-    return redirect(url_for('classes.enrollment_requests'))
+    return enrollment_action_response(ok)
 
-@classes_bp.route('/reject_enrollment/<int:student_id>/<int:class_id>')
+@classes_bp.route('/reject_enrollment/<int:student_id>/<int:class_id>', methods=['POST'])
 @login_required
 def reject_enrollment(student_id, class_id):
     """Reject a student's enrollment request"""
     if session.get('role') not in ['teacher', 'admin']:
         flash('Access denied', 'error')
-        return redirect(url_for('quiz.home'))
+        return redirect(url_for('quiz.home'), code=303)
     
-    if Class.reject_student(student_id, class_id):
-        flash('Student enrollment rejected', 'info')
-    else:
+    ok = Class.reject_student(student_id, class_id)
+    if not ok:
         flash('Failed to reject enrollment', 'error')
+    elif request.headers.get('X-Requested-With') != 'fetch':
+        flash('Student enrollment rejected', 'info')
     
-    return redirect(url_for('classes.enrollment_requests'))
+    return enrollment_action_response(ok)
 
 @classes_bp.route('/view_class/<int:class_id>')
 @login_required
@@ -241,17 +265,12 @@ def view_class(class_id):
         flash('Access denied', 'error')
         return redirect(url_for('quiz.home'))
     
-    class_info = Class.get_class_by_id(class_id)
+    # Class info, enrolled students and pending requests in one round trip
+    class_info, students, pending_requests = Class.get_view_class_bundle(class_id)
     if not class_info:
         flash('Class not found', 'error')
         return redirect(url_for('classes.my_classes'))
     
-    # Get students enrolled in this class
-    students = Class.get_students_in_class(class_id)
-    
-    # Get pending requests for this class
-    pending_requests = Class.get_pending_enrollments_for_class(class_id)
-    
     return render_template('view_class.html', 
                          class_info=class_info, 
                          students=students,
@@ -23,15 +23,21 @@ Author: AgriQuest Development Team
 Version: 2.0
 """
 
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify, make_response, current_app
 from functools import wraps
-from werkzeug.utils import secure_filename
+import hashlib
 import os
+import shutil
+import uuid
 from ..models.user import User
 from ..models.notification import Notification
 
 profile_bp = Blueprint('profile', __name__, url_prefix='/profile')
 
+# Profile picture uploads (stored in app.config['AVATAR_DIR'], created by create_app)
+ALLOWED_EXTENSIONS = frozenset({'png', 'jpg', 'jpeg', 'gif', 'webp'})
+UPLOAD_BUFFER_SIZE = 1 << 20  # 1 MiB chunks when copying the upload to disk
+
 def login_required(f):
     """Decorator to require login"""
     @wraps(f)
@@ -54,11 +60,26 @@ def view_profile():
             flash('User not found.', 'error')
             return redirect(url_for('quiz.home'))
         
-        return render_template('profile_view_profile.html', user=user)
+        # Unchanged page: answer 304 and skip rendering (unless flashes are waiting to be shown)
+        etag = _profile_etag(user)
+        if '_flashes' not in session and request.if_none_match.contains(etag):
+            response = make_response('', 304)
+        else:
+            response = make_response(render_template('profile_view_profile.html', user=user))
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
     except Exception as e:
         flash(f'Error loading profile: {e}', 'error')
         return redirect(url_for('quiz.home'))
 
+def _profile_etag(user):
+    """Validator for the profile page: the user row plus the session fields base.html shows"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(sorted(user.items())).encode())
+    digest.update(repr((session.get('username'), session.get('role'))).encode())
+    return digest.hexdigest()
+
 @profile_bp.route('/edit', methods=['GET', 'POST'])
 @login_required
 def edit_profile():
@@ -146,22 +167,17 @@ def upload_avatar():
         if file.filename == '':
             return jsonify({'success': False, 'error': 'No file selected'})
         
-        if file and allowed_file(file.filename):
-            filename = secure_filename(file.filename)
-            # Create unique filename
-            import uuid
-            unique_filename = f"user_{user_id}_{uuid.uuid4().hex[:12]}.{filename.rsplit('.', 1)[1].lower()}"
-            
-            # Create uploads directory if it doesn't exist
-            upload_dir = 'frontend/static/uploads/profile_pictures'
-            os.makedirs(upload_dir, exist_ok=True)
-            
-            file_path = os.path.join(upload_dir, unique_filename)
-            file.save(file_path)
+        extension = file_extension(file.filename)
+        if extension in ALLOWED_EXTENSIONS:
+            # Create unique filename; only the (whitelisted) extension comes from the upload
+            unique_filename = f"user_{user_id}_{uuid.uuid4().hex[:12]}.{extension}"
             
-            # Update user profile with new picture path
+            file_path = os.path.join(current_app.config['AVATAR_DIR'], unique_filename)
             relative_path = f"static/uploads/profile_pictures/{unique_filename}"
-            User.update_profile(user_id, profile_picture=relative_path)
+            
+            # Only report success once the file is on disk and the profile points at it
+            if not _store_avatar(file.stream, file_path, user_id, relative_path):
+                return jsonify({'success': False, 'error': 'Could not save profile picture'})
             
             return jsonify({'success': True, 'file_path': relative_path})
         else:
@@ -170,10 +186,31 @@ def upload_avatar():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+def _store_avatar(stream, file_path, user_id, relative_path):
+    """Copy an upload to disk in chunks and point the user's profile at it.
+    Returns False (leaving no file behind) if either step fails"""
+    try:
+        with open(file_path, 'wb', buffering=UPLOAD_BUFFER_SIZE) as dst:
+            shutil.copyfileobj(stream, dst, length=UPLOAD_BUFFER_SIZE)
+        if User.update_profile(user_id, profile_picture=relative_path):
+            return True
+    except Exception:
+        current_app.logger.exception("Storing profile picture for user %s failed", user_id)
+    else:
+        current_app.logger.error("Profile update for user %s's new picture failed", user_id)
+    try:
+        os.remove(file_path)
+    except OSError:
+        pass
+    return False
+
+def file_extension(filename):
+    """Lower-cased extension without the dot ('' when there is none)"""
+    return os.path.splitext(filename)[1][1:].lower()
+
 def allowed_file(filename):
     """Check if file extension is allowed"""
-    ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+    return file_extension(filename) in ALLOWED_EXTENSIONS
 
 @profile_bp.route('/notifications')
 @login_required
@@ -181,9 +218,10 @@ def notifications():
     """View user notifications"""
     try:
         user_id = session['user_id']
-        notifications = Notification.get_user_notifications(user_id)
+        notifications, unread_count = Notification.get_notifications_with_unread(user_id)
         
-        return render_template('profile_notifications.html', notifications=notifications)
+        return render_template('profile_notifications.html', notifications=notifications,
+                               unread_count=unread_count)
     except Exception as e:
         flash(f'Error loading notifications: {e}', 'error')
         return redirect(url_for('profile.view_profile'))
@@ -3,22 +3,52 @@ Quiz Controller
 Handles quiz creation, taking, and management
 """
 
-from flask import Blueprint, render_template, request, redirect, url_for, session, flash
+from flask import Blueprint, render_template, request, redirect, url_for, session, flash, g, current_app
 from ..models.user import User
 from ..models.quiz import Quiz
 from ..models.subject import Subject
 from ..models.result import Result
 from ..models.class_model import Class as ClassModel
-from .auth_controller import login_required
+from .auth_controller import login_required, ROLE_DASHBOARDS
+from functools import wraps
 
 quiz_bp = Blueprint('quiz', __name__)
 
+def require_enrolled_if_student(action):
+    """Decorator sending students without an approved class to my_classes;
+    action completes the message ('accessing subjects', 'taking quizzes', ...)"""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if session.get('role') == 'student' and not ClassModel.has_any_enrollment(session['user_id']):
+                flash(f'You must enroll in a class before {action}. Please enroll in a class first.', 'error')
+                return redirect(url_for('classes.my_classes'))
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+def get_quiz_cached(quiz_id):
+    """Quiz.get_quiz_by_id memoized on g for the rest of the request"""
+    cache = g.setdefault('quiz_cache', {})
+    if quiz_id not in cache:
+        cache[quiz_id] = Quiz.get_quiz_by_id(quiz_id)
+    return cache[quiz_id]
+
+def get_question_cached(question_id):
+    """Quiz.get_question_by_id memoized on g for the rest of the request"""
+    cache = g.setdefault('question_cache', {})
+    if question_id not in cache:
+        cache[question_id] = Quiz.get_question_by_id(question_id)
+    return cache[question_id]
+
 @quiz_bp.route('/')
 def public_home():
     """Public home page - redirects to login if not authenticated"""
     if 'user_id' in session:
-        # User is logged in, show home page
+        # User is logged in, go straight to the role dashboard
         user_role = session.get('role', 'student')
+        if user_role in ROLE_DASHBOARDS:
+            return redirect(url_for(ROLE_DASHBOARDS[user_role]))
         return render_template('home.html', user_role=user_role)
     else:
         # User is not logged in, redirect to login
@@ -30,12 +60,8 @@ def home():
     """Home page - redirect to role-specific dashboard"""
     user_role = session.get('role')
     
-    if user_role == 'admin':
-        return redirect(url_for('admin.dashboard'))
-    elif user_role == 'teacher':
-        return redirect(url_for('teacher.dashboard'))
-    elif user_role == 'student':
-        return redirect(url_for('student.dashboard'))
+    if user_role in ROLE_DASHBOARDS:
+        return redirect(url_for(ROLE_DASHBOARDS[user_role]))
     else:
         # Fallback to old home page for unknown roles
         user_id = session['user_id']
@@ -48,29 +74,15 @@ def home():
 
 @quiz_bp.route('/subjects')
 @login_required
+@require_enrolled_if_student('accessing subjects')
 def subjects():
-    # Check if user is a student and enrolled in any class
-    if session.get('role') == 'student':
-        from ..models.class_model import Class
-        student_classes = Class.get_classes_for_student(session['user_id'])
-        if not student_classes:
-            flash('You must enroll in a class before accessing subjects. Please enroll in a class first.', 'error')
-            return redirect(url_for('classes.my_classes'))
-    
-    subjects = Subject.get_all_subjects()
+    subjects = Subject.get_all_subjects_cached()
     return render_template('subjects.html', subjects=subjects)
 
 @quiz_bp.route('/subject/<int:subject_id>')
 @login_required
+@require_enrolled_if_student('accessing quizzes')
 def subject_quizzes(subject_id):
-    # Check if user is a student and enrolled in any class
-    if session.get('role') == 'student':
-        from ..models.class_model import Class
-        student_classes = Class.get_classes_for_student(session['user_id'])
-        if not student_classes:
-            flash('You must enroll in a class before accessing quizzes. Please enroll in a class first.', 'error')
-            return redirect(url_for('classes.my_classes'))
-    
     subject = Subject.get_subject_by_id(subject_id)
     quizzes = Quiz.get_quizzes_by_subject(subject_id)
     from datetime import datetime
@@ -82,6 +94,18 @@ def create_quiz_short():
     """Short route for /quiz/create that redirects to create_quiz"""
     return redirect(url_for('quiz.create_quiz'))
 
+def decorate_description(description, time_limit_minutes, teacher_name):
+    """Append the time limit and "Created by" notes to a quiz description unless
+    it already mentions them"""
+    description = description or ''
+    if time_limit_minutes > 0 and 'minute' not in description.lower():
+        note = f"Time limit: {time_limit_minutes} minutes"
+        description = f"{description} ({note})" if description else note
+    if 'Created by' not in description:
+        note = f"Created by: {teacher_name}"
+        description = f"{description} | {note}" if description else note
+    return description
+
 @quiz_bp.route('/create_quiz', methods=['GET', 'POST'])
 @login_required
 def create_quiz():
@@ -100,49 +124,41 @@ def create_quiz():
         # Convert minutes to seconds for storage
         time_limit_seconds = time_limit * 60
         
-        # Get teacher's name
-        teacher = User.get_user_by_id(session['user_id'])
-        teacher_name = teacher['username'] if teacher else 'Unknown Teacher'
+        # Teacher's name, stored in the session at login
+        teacher_name = session.get('username', 'Unknown Teacher')
         
         # Add time limit and teacher name to description
-        if time_limit > 0 and 'minute' not in description.lower():
-            if description:
-                description += f" (Time limit: {time_limit} minutes)"
-            else:
-                description = f"Time limit: {time_limit} minutes"
-        
-        # Add teacher name to description
-        if 'Created by' not in description:
-            if description:
-                description += f" | Created by: {teacher_name}"
-            else:
-                description = f"Created by: {teacher_name}"
+        description = decorate_description(description, time_limit, teacher_name)
         
         quiz_id = Quiz.create_quiz(title, subject_id, session['user_id'], 
                                   description, difficulty_level, time_limit_seconds, deadline)
         
-        # Process questions
-        question_count = int(request.form['question_count'])
+        # Process questions, inserted together in one transaction
+        form = request.form
+        question_count = int(form['question_count'])
+        questions = []
         for i in range(1, question_count + 1):
-            question_text = request.form[f'question_{i}']
-            options = [
-                request.form[f'question_{i}_option1'],
-                request.form[f'question_{i}_option2'],
-                request.form[f'question_{i}_option3'],
-                request.form[f'question_{i}_option4']
-            ]
-            correct_option = int(request.form[f'question_{i}_correct'])
-            
-            Quiz.add_question(quiz_id, question_text, options, correct_option)
+            prefix = f'question_{i}'
+            questions.append((
+                form[prefix],
+                form[prefix + '_option1'],
+                form[prefix + '_option2'],
+                form[prefix + '_option3'],
+                form[prefix + '_option4'],
+                int(form[prefix + '_correct']),
+                ''
+            ))
+        Quiz.add_questions_bulk(quiz_id, questions)
         
         flash('Quiz created successfully!', 'success')
         return redirect(url_for('quiz.home'))
     
-    subjects = Subject.get_all_subjects()
+    subjects = Subject.get_all_subjects_cached()
     return render_template('create_quiz.html', subjects=subjects)
 
 @quiz_bp.route('/take_quiz/<int:quiz_id>', methods=['GET', 'POST'])
 @login_required
+@require_enrolled_if_student('taking quizzes')
 def take_quiz(quiz_id):
     quiz, questions = Quiz.get_quiz_with_questions(quiz_id)
     
@@ -150,54 +166,30 @@ def take_quiz(quiz_id):
         flash('Quiz not found', 'error')
         return redirect(url_for('quiz.home'))
     
-    # Check if user is a student and enrolled in any class
-    if session.get('role') == 'student':
-        from ..models.class_model import Class
-        student_classes = Class.get_classes_for_student(session['user_id'])
-        if not student_classes:
-            flash('You must enroll in a class before taking quizzes. Please enroll in a class first.', 'error')
-            return redirect(url_for('classes.my_classes'))
-    
     # Check if quiz is still open
-    if not Quiz.is_quiz_open(quiz_id):
+    if not Quiz.deadline_open(quiz['deadline']):
         flash('This quiz has closed. The deadline has passed.', 'error')
         return redirect(url_for('quiz.home'))
     
     # Check if user already took this quiz
-    existing_result = Result.get_user_quiz_result(session['user_id'], quiz_id)
-    if existing_result:
+    if Result.user_has_attempted(session['user_id'], quiz_id):
         # User already took this quiz, show results instead
         flash('You have already completed this quiz. Here are your results:', 'info')
         return redirect(url_for('quiz.view_quiz_result', quiz_id=quiz_id))
     
-    # Convert Row objects to dictionaries for JSON serialization
-    questions = [dict(question) for question in questions]
-    quiz = dict(quiz)
-    
     if request.method == 'POST':
         # Handle quiz submission
         if 'submit_quiz' in request.form:
-            score = 0
-            detailed_results = []
-            
+            chosen = {}
             for question in questions:
                 user_answer = request.form.get(f'question_{question["id"]}')
-                is_correct = user_answer and int(user_answer) == question['correct_option']
-                
-                if is_correct:
-                    score += 1
-                
-                # Store detailed result for each question
-                detailed_results.append({
-                    'question': question,
-                    'user_answer': int(user_answer) if user_answer else None,
-                    'correct_answer': question['correct_option'],
-                    'is_correct': is_correct,
-                    'explanation': question['explanation'] if 'explanation' in question.keys() else ''
-                })
+                if user_answer:
+                    chosen[question['id']] = int(user_answer)
             
-            # Save overall result
-            Result.save_result(session['user_id'], quiz_id, score, len(questions))
+            # Store the answers and let the database count the correct ones
+            _, score = Result.save_result_with_answers(session['user_id'], quiz_id,
+                                                       list(chosen.items()), len(questions))
+            detailed_results = build_detailed_results(questions, chosen)
             
             # Store detailed results in session for display
             session['quiz_results'] = {
@@ -296,6 +288,23 @@ def quiz_results():
     
     return render_template('quiz_results.html', results=results)
 
+def build_detailed_results(questions, chosen):
+    """Per-question rows for quiz_results.html; chosen maps question id to the
+    chosen option (None when the answers are unknown). is_correct stays None for
+    unanswered questions, which the template shows neutrally"""
+    chosen = chosen or {}
+    detailed_results = []
+    for question in questions:
+        user_answer = chosen.get(question['id'])
+        detailed_results.append({
+            'question': question,
+            'user_answer': user_answer,
+            'correct_answer': question['correct_option'],
+            'is_correct': None if user_answer is None else user_answer == question['correct_option'],
+            'explanation': question.get('explanation') or ''
+        })
+    return detailed_results
+
 @quiz_bp.route('/view_quiz_result/<int:quiz_id>')
 @login_required
 def view_quiz_result(quiz_id):
@@ -312,22 +321,9 @@ def view_quiz_result(quiz_id):
         flash('Quiz not found', 'error')
         return redirect(url_for('quiz.home'))
     
-    # Convert to dictionaries
-    quiz = dict(quiz)
-    questions = [dict(question) for question in questions]
-    
-    # Create detailed results structure similar to quiz_results
-    detailed_results = []
-    for question in questions:
-        # For existing results, we don't have individual question answers stored
-        # So we'll show the question without user's specific answer
-        detailed_results.append({
-            'question': question,
-            'user_answer': None,  # We don't store individual answers
-            'correct_answer': question['correct_option'],
-            'is_correct': None,  # Can't determine without stored answers
-            'explanation': question['explanation'] if 'explanation' in question.keys() else ''
-        })
+    # Results saved before answers were stored have none; their questions are
+    # shown without the student's choice
+    detailed_results = build_detailed_results(questions, Result.get_answers(result['id']))
     
     results = {
         'quiz': quiz,
@@ -342,10 +338,10 @@ def view_quiz_result(quiz_id):
 @quiz_bp.route('/results')
 @login_required
 def view_results():
-    results = Result.get_user_results(session['user_id'])
-    analytics = Result.get_user_analytics(session['user_id'])
-    weak_areas = Result.get_weak_areas(session['user_id'])
-    return render_template('results.html', results=results, analytics=analytics, weak_areas=weak_areas)
+    # results.html builds its summary cards from the rows themselves; the
+    # per-subject analytics live on the analytics page
+    results = Result.get_user_results(g.user_id)
+    return render_template('results.html', results=results)
 
 @quiz_bp.route('/view_quizzes/<int:subject_id>')
 @quiz_bp.route('/view_quizzes/<int:subject_id>/<int:class_id>')
@@ -365,9 +361,9 @@ def view_quizzes_for_subject(subject_id, class_id=None):
     
     # Convert Row objects to dictionaries and add total_questions to each quiz
     quizzes = [dict(quiz) for quiz in quizzes]
+    counts = Quiz.get_question_counts_for_quizzes([quiz['id'] for quiz in quizzes])
     for quiz in quizzes:
-        questions = Quiz.get_questions_by_quiz_id(quiz['id'])
-        quiz['total_questions'] = len(questions)
+        quiz['total_questions'] = counts.get(quiz['id'], 0)
     
     from datetime import datetime
     return render_template('view_quizzes.html', subject=subject, quizzes=quizzes, class_id=class_id, now=datetime.now())
@@ -380,13 +376,13 @@ def edit_quiz(quiz_id):
         flash('Access denied. Teacher role required.', 'error')
         return redirect(url_for('quiz.home'))
     
-    quiz = Quiz.get_quiz_by_id(quiz_id)
+    quiz = get_quiz_cached(quiz_id)
     if not quiz:
         flash('Quiz not found', 'error')
         return redirect(url_for('quiz.home'))
     
     questions = Quiz.get_questions_by_quiz_id(quiz_id)
-    subjects = Subject.get_all_subjects()
+    subjects = Subject.get_all_subjects_cached()
     return render_template('edit_quiz.html', quiz=quiz, questions=questions, subjects=subjects)
 
 @quiz_bp.route('/update_quiz/<int:quiz_id>', methods=['POST'])
@@ -397,7 +393,7 @@ def update_quiz(quiz_id):
         flash('Access denied. Teacher role required.', 'error')
         return redirect(url_for('quiz.home'))
     
-    quiz = Quiz.get_quiz_by_id(quiz_id)
+    quiz = get_quiz_cached(quiz_id)
     if not quiz:
         flash('Quiz not found', 'error')
         return redirect(url_for('quiz.home'))
@@ -419,27 +415,16 @@ def update_quiz(quiz_id):
         return redirect(url_for('quiz.edit_quiz', quiz_id=quiz_id))
     
     # Get teacher's name
-    teacher = User.get_user_by_id(session['user_id'])
-    teacher_name = teacher['username'] if teacher else 'Unknown Teacher'
+    teacher_name = session.get('username', 'Unknown Teacher')
     
     # Add time limit and teacher name to description if not already present
-    if time_limit_minutes > 0 and 'minute' not in description.lower():
-        if description:
-            description += f" (Time limit: {time_limit_minutes} minutes)"
-        else:
-            description = f"Time limit: {time_limit_minutes} minutes"
-    
-    # Add teacher name to description if not already present
-    if 'Created by' not in description:
-        if description:
-            description += f" | Created by: {teacher_name}"
-        else:
-            description = f"Created by: {teacher_name}"
+    description = decorate_description(description, time_limit_minutes, teacher_name)
     
     # Update quiz
-    print(f"Updating quiz {quiz_id}: title='{title}', description='{description}', difficulty='{difficulty_level}', time_limit={time_limit_seconds}s")
+    current_app.logger.debug("Updating quiz %s: title=%r, description=%r, difficulty=%r, time_limit=%ss",
+                             quiz_id, title, description, difficulty_level, time_limit_seconds)
     Quiz.update_quiz(quiz_id, title, description, difficulty_level, time_limit_seconds, deadline)
-    print(f"Quiz {quiz_id} updated successfully")
+    g.quiz_cache.pop(quiz_id, None)
     flash('Quiz updated successfully!', 'success')
     return redirect(url_for('quiz.view_quizzes_for_subject', subject_id=subject_id))
 
@@ -451,13 +436,14 @@ def delete_quiz(quiz_id):
         flash('Access denied. Teacher role required.', 'error')
         return redirect(url_for('quiz.home'))
     
-    quiz = Quiz.get_quiz_by_id(quiz_id)
+    quiz = get_quiz_cached(quiz_id)
     if not quiz:
         flash('Quiz not found', 'error')
         return redirect(url_for('quiz.home'))
     
     subject_id = quiz['subject_id']
     Quiz.delete_quiz(quiz_id)
+    g.quiz_cache.pop(quiz_id, None)
     flash('Quiz deleted successfully!', 'success')
     return redirect(url_for('quiz.view_quizzes_for_subject', subject_id=subject_id))
 
@@ -469,45 +455,25 @@ def quiz_analytics(quiz_id):
         flash('Access denied. Teacher role required.', 'error')
         return redirect(url_for('quiz.home'))
     
-    quiz = Quiz.get_quiz_by_id(quiz_id)
+    quiz = get_quiz_cached(quiz_id)
     if not quiz:
         flash('Quiz not found', 'error')
         return redirect(url_for('quiz.home'))
     
     # Convert Row object to dictionary and get questions count for this quiz
     quiz = dict(quiz)
-    questions = Quiz.get_questions_by_quiz_id(quiz_id)
-    quiz['total_questions'] = len(questions)
+    quiz['total_questions'] = Quiz.get_question_counts_for_quizzes([quiz_id]).get(quiz_id, 0)
     
-    # Get quiz results
+    # Get quiz results (listed individually on the page)
     results = Result.get_quiz_results(quiz_id)
     
-    # Calculate analytics
-    total_attempts = len(results)
-    if total_attempts > 0:
-        scores = [result['score'] for result in results]
-        avg_score = sum(scores) / len(scores)
-        max_score = max(scores)
-        min_score = min(scores)
-        
-        # Calculate pass rate (80% or higher)
-        pass_threshold = quiz['total_questions'] * 0.8
-        passed = sum(1 for score in scores if score >= pass_threshold)
-        pass_rate = (passed / total_attempts) * 100
-    else:
-        avg_score = 0
-        max_score = 0
-        min_score = 0
-        pass_rate = 0
+    # Aggregates computed by the database; pass = 80% or higher
+    analytics = Result.get_quiz_analytics(quiz_id, quiz['total_questions'] * 0.8)
     
     return render_template('quiz_analytics.html', 
                          quiz=quiz, 
                          results=results,
-                         total_attempts=total_attempts,
-                         avg_score=avg_score,
-                         max_score=max_score,
-                         min_score=min_score,
-                         pass_rate=pass_rate)
+                         **analytics)
 
 @quiz_bp.route('/student_performance/<int:quiz_id>')
 @login_required
@@ -517,23 +483,21 @@ def student_performance(quiz_id):
         flash('Access denied. Teacher role required.', 'error')
         return redirect(url_for('quiz.home'))
     
-    quiz = Quiz.get_quiz_by_id(quiz_id)
+    quiz = get_quiz_cached(quiz_id)
     if not quiz:
         flash('Quiz not found', 'error')
         return redirect(url_for('quiz.home'))
     
-    # Convert Row object to dictionary and get questions for this quiz
+    # Convert Row object to dictionary and get questions count for this quiz
     quiz = dict(quiz)
-    questions = Quiz.get_questions_by_quiz_id(quiz_id)
-    quiz['total_questions'] = len(questions)
+    quiz['total_questions'] = Quiz.get_question_counts_for_quizzes([quiz_id]).get(quiz_id, 0)
     
-    # Get detailed results with user information
+    # Get detailed results with user information (results joined to users in one query)
     results = Result.get_detailed_quiz_results(quiz_id)
     
     return render_template('student_performance.html', 
                          quiz=quiz, 
-                         results=results,
-                         questions=questions)
+                         results=results)
 
 @quiz_bp.route('/edit_question/<int:question_id>')
 @login_required
@@ -543,12 +507,12 @@ def edit_question(question_id):
         flash('Access denied. Teacher role required.', 'error')
         return redirect(url_for('quiz.home'))
     
-    question = Quiz.get_question_by_id(question_id)
+    question = get_question_cached(question_id)
     if not question:
         flash('Question not found', 'error')
         return redirect(url_for('quiz.home'))
     
-    quiz = Quiz.get_quiz_by_id(question['quiz_id'])
+    quiz = get_quiz_cached(question['quiz_id'])
     return render_template('edit_question.html', question=question, quiz=quiz)
 
 @quiz_bp.route('/update_question/<int:question_id>', methods=['POST'])
@@ -559,7 +523,7 @@ def update_question(question_id):
         flash('Access denied. Teacher role required.', 'error')
         return redirect(url_for('quiz.home'))
     
-    question = Quiz.get_question_by_id(question_id)
+    question = get_question_cached(question_id)
     if not question:
         flash('Question not found', 'error')
         return redirect(url_for('quiz.home'))
@@ -578,6 +542,7 @@ def update_question(question_id):
     
     # Update question
     Quiz.update_question(question_id, question_text, [option1, option2, option3, option4], correct_option, explanation)
+    g.question_cache.pop(question_id, None)
     flash('Question updated successfully!', 'success')
     return redirect(url_for('quiz.edit_quiz', quiz_id=question['quiz_id']))
 
@@ -589,13 +554,14 @@ def delete_question(question_id):
         flash('Access denied. Teacher role required.', 'error')
         return redirect(url_for('quiz.home'))
     
-    question = Quiz.get_question_by_id(question_id)
+    question = get_question_cached(question_id)
     if not question:
         flash('Question not found', 'error')
         return redirect(url_for('quiz.home'))
     
     quiz_id = question['quiz_id']
     Quiz.delete_question(question_id)
+    g.question_cache.pop(question_id, None)
     flash('Question deleted successfully!', 'success')
     return redirect(url_for('quiz.edit_quiz', quiz_id=quiz_id))
 
@@ -607,7 +573,7 @@ def add_question(quiz_id):
         flash('Access denied. Teacher role required.', 'error')
         return redirect(url_for('quiz.home'))
     
-    quiz = Quiz.get_quiz_by_id(quiz_id)
+    quiz = get_quiz_cached(quiz_id)
     if not quiz:
         flash('Quiz not found', 'error')
         return redirect(url_for('quiz.home'))
@@ -73,7 +73,7 @@ def dashboard():
         weaknesses = Weakness.get_student_weaknesses(student_id)
         
         # Get available subjects for enrollment
-        all_subjects = Subject.get_all_subjects()
+        all_subjects = Subject.get_all_subjects_cached()
         enrolled_subject_ids = [s['id'] for s in enrolled_subjects]
         available_subjects = [s for s in all_subjects if s['id'] not in enrolled_subject_ids]
         
@@ -321,7 +321,7 @@ def search_subjects():
             return render_template('student_search.html', results=[], query=query)
         
         # Search subjects by name or description
-        all_subjects = Subject.get_all_subjects()
+        all_subjects = Subject.get_all_subjects_cached()
         results = [s for s in all_subjects if query.lower() in s['name'].lower() or 
                   (s['description'] and query.lower() in s['description'].lower())]
         
@@ -117,13 +117,13 @@ def accept_invitation(subject_id):
         
         if success:
             # Send notification to admin
-            subject = Subject.get_subject_by_id(subject_id)
+            subject_name = Subject.get_subject_name(subject_id)
             admin_users = User.get_users_by_role('admin')
             for admin in admin_users:
                 Notification.create_notification(
                     admin['id'],
-                    f"Invitation Accepted: {subject['name']}",
-                    f"Teacher {session.get('username', 'Unknown')} has accepted the invitation to manage {subject['name']}.",
+                    f"Invitation Accepted: {subject_name}",
+                    f"Teacher {session.get('username', 'Unknown')} has accepted the invitation to manage {subject_name}.",
                     'success'
                 )
             
@@ -218,12 +218,11 @@ def approve_student(student_id, subject_id):
         
         if success:
             # Send notification to student
-            student = User.get_user_by_id(student_id)
-            subject = Subject.get_subject_by_id(subject_id)
+            subject_name = Subject.get_subject_name(subject_id)
             Notification.create_notification(
                 student_id,
-                f"Enrollment Approved: {subject['name']}",
-                f"Your enrollment request for {subject['name']} has been approved.",
+                f"Enrollment Approved: {subject_name}",
+                f"Your enrollment request for {subject_name} has been approved.",
                 'success'
             )
             
@@ -252,12 +251,11 @@ def reject_student(student_id, subject_id):
         
         if success:
             # Send notification to student
-            student = User.get_user_by_id(student_id)
-            subject = Subject.get_subject_by_id(subject_id)
+            subject_name = Subject.get_subject_name(subject_id)
             Notification.create_notification(
                 student_id,
-                f"Enrollment Rejected: {subject['name']}",
-                f"Your enrollment request for {subject['name']} has been rejected.",
+                f"Enrollment Rejected: {subject_name}",
+                f"Your enrollment request for {subject_name} has been rejected.",
                 'error'
             )
             
@@ -3,7 +3,8 @@ Class Model
 Handles class-related database operations
 """
 
-from ..config.database import get_db_connection
+from flask import g, has_app_context
+from ..config.database import get_db_connection, fetch_dicts
 
 class Class:
     @staticmethod
@@ -12,7 +13,7 @@ class Class:
         conn = get_db_connection()
         try:
             cursor = conn.cursor()
-            cursor.execute("""
+            return fetch_dicts(cursor, """
                 SELECT c.id, c.name, c.description, c.created_at,
                        COUNT(tc.teacher_id) as teacher_count
                 FROM classes c
@@ -20,14 +21,35 @@ class Class:
                 GROUP BY c.id, c.name, c.description, c.created_at
                 ORDER BY c.name
             """)
-            classes = cursor.fetchall()
-            return [dict(row) for row in classes]
         except Exception as e:
             print(f"Error getting classes: {e}")
             return []
         finally:
             conn.close()
     
+    @staticmethod
+    def get_all_classes_with_enrollment(student_id):
+        """Get all available classes with one student's enrollment status/date in each row"""
+        conn = get_db_connection()
+        try:
+            cursor = conn.cursor()
+            return fetch_dicts(cursor, """
+                SELECT c.id, c.name, c.description, c.created_at,
+                       COUNT(tc.teacher_id) as teacher_count,
+                       sc.status as enrollment_status,
+                       sc.requested_at as enrollment_date
+                FROM classes c
+                LEFT JOIN teacher_classes tc ON c.id = tc.class_id
+                LEFT JOIN student_classes sc ON sc.class_id = c.id AND sc.student_id = ?
+                GROUP BY c.id, c.name, c.description, c.created_at, sc.status, sc.requested_at
+                ORDER BY c.name
+            """, (student_id,))
+        except Exception as e:
+            print(f"Error getting classes with enrollment: {e}")
+            return []
+        finally:
+            conn.close()
+    
     @staticmethod
     def get_class_by_id(class_id):
         """Get a specific class by ID"""
@@ -56,7 +78,7 @@ class Class:
         conn = get_db_connection()
         try:
             cursor = conn.cursor()
-            cursor.execute("""
+            return fetch_dicts(cursor, """
                 SELECT c.id, c.name, c.description, c.created_at,
                        tc.created_at as assigned_at
                 FROM classes c
@@ -64,8 +86,6 @@ class Class:
                 WHERE tc.teacher_id = ?
                 ORDER BY c.name
             """, (teacher_id,))
-            classes = cursor.fetchall()
-            return [dict(row) for row in classes]
         except Exception as e:
             print(f"Error getting teacher classes: {e}")
             return []
@@ -78,7 +98,7 @@ class Class:
         conn = get_db_connection()
         try:
             cursor = conn.cursor()
-            cursor.execute("""
+            return fetch_dicts(cursor, """
                 SELECT c.id, c.name, c.description, c.created_at,
                        sc.status, sc.approved_at
                 FROM classes c
@@ -86,14 +106,35 @@ class Class:
                 WHERE sc.student_id = ? AND sc.status = 'approved'
                 ORDER BY c.name
             """, (student_id,))
-            classes = cursor.fetchall()
-            return [dict(row) for row in classes]
         except Exception as e:
             print(f"Error getting student classes: {e}")
             return []
         finally:
             conn.close()
     
+    @staticmethod
+    def has_any_enrollment(student_id):
+        """Whether the student has at least one approved class (memoized on g for
+        the rest of the request, so every worker sees approvals and rejections
+        from the next request on)"""
+        cache = g.setdefault('enrolled_students', {}) if has_app_context() else {}
+        if student_id in cache:
+            return cache[student_id]
+        conn = get_db_connection()
+        try:
+            row = conn.execute("""
+                SELECT 1 FROM student_classes
+                WHERE student_id = ? AND status = 'approved'
+                LIMIT 1
+            """, (student_id,)).fetchone()
+        except Exception as e:
+            print(f"Error checking student enrollment: {e}")
+            return False
+        finally:
+            conn.close()
+        cache[student_id] = row is not None
+        return cache[student_id]
+    
     @staticmethod
     def get_student_enrollment_status(student_id, class_id):
         """Get the enrollment status of a student for a specific class"""
@@ -115,19 +156,41 @@ class Class:
     
     @staticmethod
     def enroll_student(student_id, class_id):
-        """Enroll a student in a class (status: pending)"""
+        """
+        Request enrollment in a class (status: pending) unless the student already
+        has a request for it. Returns (created, class_name, existing_status);
+        class_name is None when the class does not exist, and the whole result
+        is None on a database error
+        """
         conn = get_db_connection()
         try:
             cursor = conn.cursor()
+            # A single statement checks the class exists, inserts, and reports a duplicate
             cursor.execute("""
-                INSERT OR REPLACE INTO student_classes (student_id, class_id, status, requested_at)
-                VALUES (?, ?, 'pending', CURRENT_TIMESTAMP)
+                INSERT INTO student_classes (student_id, class_id, status, requested_at)
+                SELECT ?, c.id, 'pending', CURRENT_TIMESTAMP FROM classes c WHERE c.id = ?
+                ON CONFLICT(student_id, class_id) DO NOTHING
+                RETURNING (SELECT name FROM classes WHERE id = student_classes.class_id) as class_name
             """, (student_id, class_id))
+            created = cursor.fetchone()
             conn.commit()
-            return True
+            if created:
+                return True, created['class_name'], None
+            
+            # Rare path: unknown class or an existing request
+            cursor.execute("""
+                SELECT c.name, sc.status
+                FROM classes c
+                LEFT JOIN student_classes sc ON sc.class_id = c.id AND sc.student_id = ?
+                WHERE c.id = ?
+            """, (student_id, class_id))
+            existing = cursor.fetchone()
+            if not existing:
+                return False, None, None
+            return False, existing['name'], existing['status']
         except Exception as e:
             print(f"Error enrolling student: {e}")
-            return False
+            return None
         finally:
             conn.close()
     
@@ -168,13 +231,103 @@ class Class:
         finally:
             conn.close()
     
+    @staticmethod
+    def approve_student_returning(student_id, class_id):
+        """Approve an enrollment; returns {'username', 'class_name'} or None if no request matched"""
+        conn = get_db_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE student_classes
+                SET status = 'approved', approved_at = CURRENT_TIMESTAMP
+                WHERE student_id = ? AND class_id = ?
+                RETURNING (SELECT username FROM users WHERE id = student_classes.student_id) as username,
+                          (SELECT name FROM classes WHERE id = student_classes.class_id) as class_name
+            """, (student_id, class_id))
+            result = cursor.fetchone()
+            conn.commit()
+            return dict(result) if result else None
+        except Exception as e:
+            print(f"Error approving student: {e}")
+            return None
+        finally:
+            conn.close()
+    
+    @staticmethod
+    def reject_student_returning(student_id, class_id):
+        """Reject (delete) an enrollment; returns {'username', 'class_name'} or None if no request matched"""
+        conn = get_db_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                DELETE FROM student_classes
+                WHERE student_id = ? AND class_id = ?
+                RETURNING (SELECT username FROM users WHERE id = student_classes.student_id) as username,
+                          (SELECT name FROM classes WHERE id = student_classes.class_id) as class_name
+            """, (student_id, class_id))
+            result = cursor.fetchone()
+            conn.commit()
+            return dict(result) if result else None
+        except Exception as e:
+            print(f"Error rejecting student: {e}")
+            return None
+        finally:
+            conn.close()
+    
+    # Largest IN (...) list per statement; stays under SQLite's default bound-parameter limit
+    BULK_CHUNK_SIZE = 500
+    
+    @staticmethod
+    def _bulk_update_pending(sql, class_id, student_ids):
+        """Run a RETURNING student_id statement over pending requests for many students,
+        in IN-list chunks inside one transaction; returns the student ids affected"""
+        student_ids = list(dict.fromkeys(student_ids))
+        if not student_ids:
+            return []
+        conn = get_db_connection()
+        try:
+            cursor = conn.cursor()
+            affected = []
+            for start in range(0, len(student_ids), Class.BULK_CHUNK_SIZE):
+                chunk = student_ids[start:start + Class.BULK_CHUNK_SIZE]
+                placeholders = ', '.join('?' * len(chunk))
+                cursor.execute(sql.format(placeholders=placeholders), (class_id, *chunk))
+                affected.extend(row[0] for row in cursor.fetchall())
+            conn.commit()
+            return affected
+        except Exception as e:
+            print(f"Error updating enrollments in bulk: {e}")
+            conn.rollback()
+            return []
+        finally:
+            conn.close()
+    
+    @staticmethod
+    def bulk_approve_students(class_id, student_ids):
+        """Approve many pending requests for one class; returns the approved student ids"""
+        return Class._bulk_update_pending("""
+            UPDATE student_classes
+            SET status = 'approved', approved_at = CURRENT_TIMESTAMP
+            WHERE class_id = ? AND status = 'pending' AND student_id IN ({placeholders})
+            RETURNING student_id
+        """, class_id, student_ids)
+    
+    @staticmethod
+    def bulk_reject_students(class_id, student_ids):
+        """Reject (delete) many pending requests for one class; returns the rejected student ids"""
+        return Class._bulk_update_pending("""
+            DELETE FROM student_classes
+            WHERE class_id = ? AND status = 'pending' AND student_id IN ({placeholders})
+            RETURNING student_id
+        """, class_id, student_ids)
+    
     @staticmethod
     def get_pending_enrollments_for_class(class_id):
         """Get all pending enrollment requests for a specific class"""
         conn = get_db_connection()
         try:
             cursor = conn.cursor()
-            cursor.execute("""
+            return fetch_dicts(cursor, """
                 SELECT sc.id, sc.student_id, sc.requested_at,
                        u.username, u.email, u.created_at as user_created_at
                 FROM student_classes sc
@@ -182,14 +335,102 @@ class Class:
                 WHERE sc.class_id = ? AND sc.status = 'pending'
                 ORDER BY sc.requested_at
             """, (class_id,))
-            enrollments = cursor.fetchall()
-            return [dict(row) for row in enrollments]
         except Exception as e:
             print(f"Error getting pending enrollments: {e}")
             return []
         finally:
             conn.close()
     
+    @staticmethod
+    def get_manage_class_bundle(teacher_id, class_id):
+        """
+        Everything the manage-class page needs over one connection:
+        (class_info with is_teacher, pending_enrollments, approved_students).
+        class_info is None when the class does not exist
+        """
+        conn = get_db_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT c.id, c.name, c.description, c.created_at,
+                       COUNT(tc.teacher_id) as teacher_count,
+                       COALESCE(MAX(tc.teacher_id = ?), 0) as is_teacher
+                FROM classes c
+                LEFT JOIN teacher_classes tc ON c.id = tc.class_id
+                WHERE c.id = ?
+                GROUP BY c.id, c.name, c.description, c.created_at
+            """, (teacher_id, class_id))
+            row = cursor.fetchone()
+            if not row:
+                return None, [], []
+            class_info = dict(row)
+            
+            enrollments = fetch_dicts(cursor, """
+                SELECT sc.id, sc.student_id, sc.status, sc.requested_at, sc.approved_at,
+                       u.username, u.email, u.created_at as user_created_at
+                FROM student_classes sc
+                JOIN users u ON sc.student_id = u.id
+                WHERE sc.class_id = ? AND sc.status IN ('pending', 'approved')
+                ORDER BY sc.status DESC,
+                         CASE WHEN sc.status = 'pending' THEN sc.requested_at END,
+                         sc.approved_at DESC
+            """, (class_id,))
+            pending, approved = [], []
+            for enrollment in enrollments:
+                (pending if enrollment['status'] == 'pending' else approved).append(enrollment)
+            return class_info, pending, approved
+        except Exception as e:
+            print(f"Error getting class management data: {e}")
+            return None, [], []
+        finally:
+            conn.close()
+    
+    @staticmethod
+    def get_view_class_bundle(class_id):
+        """
+        Everything the view-class page needs over one connection:
+        (class_info, approved_students, pending_enrollments), with both lists
+        split from a single student_classes/users join.
+        class_info is None when the class does not exist
+        """
+        conn = get_db_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT c.id, c.name, c.description, c.created_at,
+                       COUNT(tc.teacher_id) as teacher_count
+                FROM classes c
+                LEFT JOIN teacher_classes tc ON c.id = tc.class_id
+                WHERE c.id = ?
+                GROUP BY c.id, c.name, c.description, c.created_at
+            """, (class_id,))
+            row = cursor.fetchone()
+            if not row:
+                return None, [], []
+            class_info = dict(row)
+            
+            # approved_at doubles as enrolled_at (student_classes has no separate column)
+            enrollments = fetch_dicts(cursor, """
+                SELECT u.id, sc.student_id, u.username, u.email, u.full_name,
+                       u.created_at as user_created_at, sc.status,
+                       sc.requested_at, sc.approved_at, sc.approved_at as enrolled_at
+                FROM student_classes sc
+                JOIN users u ON sc.student_id = u.id
+                WHERE sc.class_id = ? AND sc.status IN ('pending', 'approved')
+                ORDER BY sc.status,
+                         CASE WHEN sc.status = 'approved' THEN u.username END,
+                         sc.requested_at
+            """, (class_id,))
+            students, pending = [], []
+            for enrollment in enrollments:
+                (students if enrollment['status'] == 'approved' else pending).append(enrollment)
+            return class_info, students, pending
+        except Exception as e:
+            print(f"Error getting class details: {e}")
+            return None, [], []
+        finally:
+            conn.close()
+    
     @staticmethod
     def is_teacher_of_class(teacher_id, class_id):
         """Check if a teacher is assigned to a specific class"""
@@ -214,15 +455,13 @@ class Class:
         conn = get_db_connection()
         try:
             cursor = conn.cursor()
-            cursor.execute("""
+            return fetch_dicts(cursor, """
                 SELECT u.id, u.username, u.email, tc.created_at as assigned_at
                 FROM users u
                 JOIN teacher_classes tc ON u.id = tc.teacher_id
                 WHERE tc.class_id = ?
                 ORDER BY u.username
             """, (class_id,))
-            teachers = cursor.fetchall()
-            return [dict(row) for row in teachers]
         except Exception as e:
             print(f"Error getting class teachers: {e}")
             return []
@@ -235,7 +474,7 @@ class Class:
         conn = get_db_connection()
         try:
             cursor = conn.cursor()
-            cursor.execute("""
+            return fetch_dicts(cursor, """
                 SELECT sc.id, sc.student_id, sc.class_id, sc.requested_at,
                        u.username, u.email, u.full_name,
                        c.name as class_name, c.description as class_description
@@ -245,8 +484,6 @@ class Class:
                 WHERE sc.status = 'pending'
                 ORDER BY sc.requested_at DESC
             """)
-            enrollments = cursor.fetchall()
-            return [dict(row) for row in enrollments]
         except Exception as e:
             print(f"Error getting pending enrollments: {e}")
             return []
@@ -259,7 +496,7 @@ class Class:
         conn = get_db_connection()
         try:
             cursor = conn.cursor()
-            cursor.execute("""
+            return fetch_dicts(cursor, """
                 SELECT u.id, u.username, u.email, u.full_name,
                        sc.status, sc.approved_at, sc.enrolled_at
                 FROM users u
@@ -267,8 +504,6 @@ class Class:
                 WHERE sc.class_id = ? AND sc.status = 'approved'
                 ORDER BY u.username
             """, (class_id,))
-            students = cursor.fetchall()
-            return [dict(row) for row in students]
         except Exception as e:
             print(f"Error getting students in class: {e}")
             return []
@@ -10,7 +10,9 @@ Classes:
 
 Methods:
     create_notification: Create a new notification
+    create_notifications: Create several notifications in one transaction
     get_user_notifications: Get notifications for a specific user
+    get_notifications_with_unread: Get a page of notifications and the unread count together
     mark_as_read: Mark a notification as read
     mark_all_as_read: Mark all notifications as read for a user
     delete_notification: Delete a specific notification
@@ -41,6 +43,24 @@ class Notification:
         finally:
             conn.close()
     
+    @staticmethod
+    def create_notifications(rows):
+        """Create several notifications in one transaction.
+        rows: iterable of (user_id, title, message, notification_type)"""
+        conn = get_db_connection()
+        try:
+            with conn:
+                conn.executemany("""
+                    INSERT INTO notifications (user_id, title, message, type, created_at) 
+                    VALUES (?, ?, ?, ?, datetime('now'))
+                """, rows)
+            return True
+        except sqlite3.Error as e:
+            print(f"Error creating notifications: {e}")
+            return False
+        finally:
+            conn.close()
+    
     @staticmethod
     def get_user_notifications(user_id, limit=50, offset=0):
         """Get notifications for a specific user"""
@@ -59,6 +79,34 @@ class Notification:
         finally:
             conn.close()
     
+    @staticmethod
+    def get_notifications_with_unread(user_id, limit=50, offset=0):
+        """Get a page of notifications and the user's unread count in one query.
+        Returns (notifications, unread_count)"""
+        conn = get_db_connection()
+        try:
+            rows = conn.execute("""
+                SELECT *, SUM(CASE WHEN is_read = 0 THEN 1 ELSE 0 END) OVER () AS unread_count
+                FROM notifications 
+                WHERE user_id = ? 
+                ORDER BY created_at DESC 
+                LIMIT ? OFFSET ?
+            """, (user_id, limit, offset)).fetchall()
+        except sqlite3.Error as e:
+            print(f"Error getting notifications: {e}")
+            return [], 0
+        finally:
+            conn.close()
+        
+        if not rows:
+            # Page past the end: the window had no row to carry the count
+            return [], Notification.get_unread_count(user_id)
+        notifications = [dict(row) for row in rows]
+        unread_count = notifications[0]['unread_count']
+        for notification in notifications:
+            del notification['unread_count']
+        return notifications, unread_count
+    
     @staticmethod
     def mark_as_read(notification_id, user_id):
         """Mark a specific notification as read"""
@@ -4,8 +4,13 @@ Handles quiz-related database operations
 """
 
 from ..config.database import get_db_connection
+from datetime import datetime
 import sqlite3
 
+# Columns of the questions table, in schema order
+QUESTION_COLUMNS = ('id', 'quiz_id', 'question_text', 'option1', 'option2', 'option3',
+                    'option4', 'correct_option', 'explanation')
+
 class Quiz:
     @staticmethod
     def create_quiz(title, subject_id, creator_id, description="", difficulty_level="beginner", time_limit=0, deadline=None):
@@ -34,6 +39,18 @@ class Quiz:
         conn.commit()
         conn.close()
     
+    @staticmethod
+    def add_questions_bulk(quiz_id, questions):
+        """Insert many questions in one transaction; questions are
+        (question_text, option1, option2, option3, option4, correct_option, explanation) tuples"""
+        conn = get_db_connection()
+        conn.executemany('''INSERT INTO questions 
+                            (quiz_id, question_text, option1, option2, option3, option4, correct_option, explanation)
+                            VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
+                        [(quiz_id, *question) for question in questions])
+        conn.commit()
+        conn.close()
+    
     @staticmethod
     def get_all_quizzes():
         conn = get_db_connection()
@@ -76,10 +93,26 @@ class Quiz:
     
     @staticmethod
     def get_quiz_with_questions(quiz_id):
+        """Quiz and its questions from one LEFT JOIN: (quiz dict or None, [question dicts])"""
         conn = get_db_connection()
-        quiz = conn.execute("SELECT * FROM quizzes WHERE id = ?", (quiz_id,)).fetchone()
-        questions = conn.execute("SELECT * FROM questions WHERE quiz_id = ?", (quiz_id,)).fetchall()
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        # Question columns come first and are listed explicitly, so both tables'
+        # id/created_at columns can be told apart; the quiz columns follow
+        cursor.execute(f"""SELECT {', '.join('qu.' + col for col in QUESTION_COLUMNS)}, q.*
+                           FROM quizzes q
+                           LEFT JOIN questions qu ON qu.quiz_id = q.id
+                           WHERE q.id = ?
+                           ORDER BY qu.id""", (quiz_id,))
+        rows = cursor.fetchall()
+        quiz_columns = [col[0] for col in cursor.description[len(QUESTION_COLUMNS):]]
         conn.close()
+        if not rows:
+            return None, []
+        split = len(QUESTION_COLUMNS)
+        quiz = dict(zip(quiz_columns, rows[0][split:]))
+        # A quiz without questions comes back as one row of NULL question columns
+        questions = [dict(zip(QUESTION_COLUMNS, row[:split])) for row in rows if row[0] is not None]
         return quiz, questions
     
     @staticmethod
@@ -96,6 +129,19 @@ class Quiz:
         conn.close()
         return [dict(question) for question in questions]
     
+    @staticmethod
+    def get_question_counts_for_quizzes(quiz_ids):
+        """Number of questions per quiz for many quizzes in one query: {quiz_id: count}
+        (quizzes without questions are absent)"""
+        if not quiz_ids:
+            return {}
+        conn = get_db_connection()
+        placeholders = ', '.join('?' * len(quiz_ids))
+        rows = conn.execute(f"SELECT quiz_id, COUNT(*) FROM questions WHERE quiz_id IN ({placeholders}) GROUP BY quiz_id",
+                            tuple(quiz_ids)).fetchall()
+        conn.close()
+        return {row[0]: row[1] for row in rows}
+    
     @staticmethod
     def update_quiz(quiz_id, title, description, difficulty_level, time_limit, deadline=None):
         conn = get_db_connection()
@@ -109,7 +155,9 @@ class Quiz:
     @staticmethod
     def delete_quiz(quiz_id):
         conn = get_db_connection()
-        # Delete questions first (foreign key constraint)
+        # Delete the stored answers first (foreign keys to results and questions)
+        conn.execute("DELETE FROM answers WHERE question_id IN (SELECT id FROM questions WHERE quiz_id = ?)", (quiz_id,))
+        # Delete questions (foreign key constraint)
         conn.execute("DELETE FROM questions WHERE quiz_id = ?", (quiz_id,))
         # Delete results
         conn.execute("DELETE FROM results WHERE quiz_id = ?", (quiz_id,))
@@ -140,6 +188,7 @@ class Quiz:
     @staticmethod
     def delete_question(question_id):
         conn = get_db_connection()
+        conn.execute("DELETE FROM answers WHERE question_id = ?", (question_id,))
         conn.execute("DELETE FROM questions WHERE id = ?", (question_id,))
         conn.commit()
         conn.close()
@@ -150,13 +199,15 @@ class Quiz:
         conn = get_db_connection()
         quiz = conn.execute("SELECT deadline FROM quizzes WHERE id = ?", (quiz_id,)).fetchone()
         conn.close()
-        
-        if not quiz or not quiz[0]:  # No deadline set
+        return Quiz.deadline_open(quiz[0] if quiz else None)
+    
+    @staticmethod
+    def deadline_open(deadline):
+        """Whether a quiz with this deadline (ISO string or None) is still open; for
+        callers that already loaded the quiz row"""
+        if not deadline:  # No deadline set
             return True
-        
-        from datetime import datetime
-        deadline = datetime.fromisoformat(quiz[0])
-        return datetime.now() < deadline
+        return datetime.now() < datetime.fromisoformat(deadline)
     
     @staticmethod
     def get_quizzes_by_creator(creator_id):
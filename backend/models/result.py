@@ -15,6 +15,48 @@ class Result:
         conn.commit()
         conn.close()
     
+    @staticmethod
+    def save_result_with_answers(user_id, quiz_id, answers, total_questions):
+        """
+        Save a submission and score it in SQL, in one transaction.
+        answers is a list of (question_id, chosen_option) for the answered
+        questions; they are stored in the answers table and the score is the
+        number of them matching questions.correct_option. Returns (result_id, score)
+        """
+        conn = get_db_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''INSERT INTO results (user_id, quiz_id, score, total_questions)
+                              VALUES (?, ?, 0, ?) RETURNING id''', (user_id, quiz_id, total_questions))
+            result_id = cursor.fetchone()[0]
+            cursor.executemany("INSERT INTO answers (result_id, question_id, chosen_option) VALUES (?, ?, ?)",
+                               [(result_id, question_id, chosen) for question_id, chosen in answers])
+            cursor.execute('''UPDATE results
+                              SET score = (SELECT COUNT(*) FROM answers
+                                           JOIN questions ON questions.id = answers.question_id
+                                           WHERE answers.result_id = results.id
+                                             AND answers.chosen_option = questions.correct_option)
+                              WHERE id = ?
+                              RETURNING score''', (result_id,))
+            score = cursor.fetchone()[0]
+            conn.commit()
+            return result_id, score
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+    
+    @staticmethod
+    def get_answers(result_id):
+        """Options chosen in a submission: {question_id: chosen_option} (empty for
+        results saved before answers were stored)"""
+        conn = get_db_connection()
+        rows = conn.execute("SELECT question_id, chosen_option FROM answers WHERE result_id = ?",
+                            (result_id,)).fetchall()
+        conn.close()
+        return {row[0]: row[1] for row in rows}
+    
     @staticmethod
     def get_user_results(user_id):
         conn = get_db_connection()
@@ -26,6 +68,15 @@ class Result:
         conn.close()
         return results
     
+    @staticmethod
+    def user_has_attempted(user_id, quiz_id):
+        """Whether the user already has a result for the quiz (index lookup, no row fetched)"""
+        conn = get_db_connection()
+        row = conn.execute("SELECT 1 FROM results WHERE user_id = ? AND quiz_id = ? LIMIT 1",
+                           (user_id, quiz_id)).fetchone()
+        conn.close()
+        return row is not None
+    
     @staticmethod
     def get_user_quiz_result(user_id, quiz_id):
         conn = get_db_connection()
@@ -77,6 +128,16 @@ class Result:
             'recent_trend': recent_trend
         }
     
+    @staticmethod
+    def get_user_analytics_bundle(user_id):
+        """get_user_analytics and get_weak_areas together: (analytics, weak_areas).
+        Weak areas are the per-subject rows under 70%, taken from by_subject
+        instead of grouping the user's results a second time"""
+        analytics = Result.get_user_analytics(user_id)
+        weak_areas = [row for row in analytics['by_subject']
+                      if row['average_score'] is not None and row['average_score'] < 70]
+        return analytics, weak_areas
+    
     @staticmethod
     def get_weak_areas(user_id):
         conn = get_db_connection()
@@ -121,6 +182,26 @@ class Result:
         conn.close()
         return [dict(result) for result in results]
     
+    @staticmethod
+    def get_quiz_analytics(quiz_id, pass_threshold):
+        """Attempt count, average/max/min score and pass rate (% of scores >= pass_threshold)
+        for one quiz, aggregated in SQL; all zero when nobody has attempted it"""
+        conn = get_db_connection()
+        row = conn.execute('''SELECT COUNT(*), AVG(score), MAX(score), MIN(score),
+                                      SUM(CASE WHEN score >= ? THEN 1 ELSE 0 END)
+                               FROM results WHERE quiz_id = ?''', (pass_threshold, quiz_id)).fetchone()
+        conn.close()
+        total_attempts, avg_score, max_score, min_score, passed = row
+        if not total_attempts:
+            return {'total_attempts': 0, 'avg_score': 0, 'max_score': 0, 'min_score': 0, 'pass_rate': 0}
+        return {
+            'total_attempts': total_attempts,
+            'avg_score': avg_score,
+            'max_score': max_score,
+            'min_score': min_score,
+            'pass_rate': (passed / total_attempts) * 100
+        }
+    
     @staticmethod
     def get_detailed_quiz_results(quiz_id):
         conn = get_db_connection()
@@ -145,6 +226,7 @@ class Result:
     @staticmethod
     def delete_result(result_id):
         conn = get_db_connection()
+        conn.execute("DELETE FROM answers WHERE result_id = ?", (result_id,))
         conn.execute("DELETE FROM results WHERE id = ?", (result_id,))
         conn.commit()
         conn.close()
@@ -5,6 +5,20 @@ Handles subject-related database operations
 
 from ..config.database import get_db_connection
 import sqlite3
+import time
+
+# get_all_subjects_cached() state: writes bump the version, which invalidates
+# the cached (version, timestamp, subjects) entry
+_subjects_version = 0
+_subjects_cache = None
+
+# get_subject_name() memo: subject_id -> (timestamp, name), cleared on every write
+_subject_names = {}
+
+def _invalidate_subjects_cache():
+    global _subjects_version
+    _subjects_version += 1
+    _subject_names.clear()
 
 class Subject:
     @staticmethod
@@ -14,6 +28,7 @@ class Subject:
             conn.execute("INSERT INTO subjects (name, description, created_by, year, code) VALUES (?, ?, ?, ?, ?)",
                         (name, description, created_by, year, code))
             conn.commit()
+            _invalidate_subjects_cache()
             return True
         except sqlite3.IntegrityError:
             return False
@@ -47,6 +62,18 @@ class Subject:
         
         return subject_dicts
     
+    @staticmethod
+    def get_all_subjects_cached(ttl=60):
+        """get_all_subjects() memoized for ttl seconds; treat the result as read-only"""
+        global _subjects_cache
+        cached = _subjects_cache
+        if cached and cached[0] == _subjects_version and time.monotonic() - cached[1] < ttl:
+            return cached[2]
+        version = _subjects_version
+        subjects = Subject.get_all_subjects()
+        _subjects_cache = (version, time.monotonic(), subjects)
+        return subjects
+    
     @staticmethod
     def get_subject_by_id(subject_id):
         conn = get_db_connection()
@@ -54,6 +81,20 @@ class Subject:
         conn.close()
         return dict(subject) if subject else None
     
+    @staticmethod
+    def get_subject_name(subject_id, ttl=3600):
+        """Subject name only (memoized for ttl seconds), for notification and flash text"""
+        cached = _subject_names.get(subject_id)
+        if cached and time.monotonic() - cached[0] < ttl:
+            return cached[1]
+        conn = get_db_connection()
+        row = conn.execute("SELECT name FROM subjects WHERE id = ?", (subject_id,)).fetchone()
+        conn.close()
+        if row is None:
+            return None
+        _subject_names[subject_id] = (time.monotonic(), row[0])
+        return row[0]
+    
     @staticmethod
     def update_subject(subject_id, name, description):
         conn = get_db_connection()
@@ -61,6 +102,7 @@ class Subject:
                     (name, description, subject_id))
         conn.commit()
         conn.close()
+        _invalidate_subjects_cache()
     
     @staticmethod
     def delete_subject(subject_id):
@@ -68,3 +110,4 @@ class Subject:
         conn.execute("DELETE FROM subjects WHERE id = ?", (subject_id,))
         conn.commit()
         conn.close()
+        _invalidate_subjects_cache()
@@ -16,14 +16,19 @@ Methods:
     get_subject_teachers: Get teachers assigned to a subject
     remove_teacher: Remove teacher from subject
     get_pending_invitations: Get pending invitations for a teacher
+    get_all_pending_invitations: Get pending invitations for all teachers
 
 Author: AgriQuest Development Team
 Version: 2.0
 """
 
 from ..config.database import get_db_connection
+from collections import namedtuple
 import sqlite3
 
+# Lightweight row for the admin dashboard's pending invitation list
+PendingInvite = namedtuple('PendingInvite', 'id teacher_id teacher_name subject_id subject_name invited_at')
+
 class SubjectTeacher:
     @staticmethod
     def invite_teacher(teacher_id, subject_id):
@@ -172,6 +177,26 @@ class SubjectTeacher:
         finally:
             conn.close()
     
+    @staticmethod
+    def get_all_pending_invitations():
+        """Get pending invitations for every teacher in one query (for admin)"""
+        conn = get_db_connection()
+        try:
+            cursor = conn.execute("""
+                SELECT st.id, st.teacher_id, u.username, s.id, s.name, st.invited_at
+                FROM subject_teachers st
+                JOIN users u ON st.teacher_id = u.id
+                JOIN subjects s ON st.subject_id = s.id
+                WHERE st.status = 'pending' AND u.role = 'teacher'
+                ORDER BY st.invited_at DESC
+            """)
+            return [PendingInvite(*row) for row in cursor]
+        except sqlite3.Error as e:
+            print(f"Error getting all pending invitations: {e}")
+            return []
+        finally:
+            conn.close()
+    
     @staticmethod
     def get_all_invitations():
         """Get all invitations (for admin)"""
@@ -11,10 +11,12 @@ Classes:
 
 Methods:
     create_user: Create a new user with role-based user_id generation
+    create_user_if_absent: Create a user in one statement unless the username is taken
     get_user_by_username: Retrieve user by username
     get_user_by_id: Retrieve user by database ID
     get_user_by_user_id: Retrieve user by role-based user_id (A001, T001, S001)
-    get_all_users: Get all users in the system
+    get_all_users: Get all users in the system (optionally one page)
+    count_users: Count all users in the system
     get_users_by_role: Get users filtered by role
     search_users: Search users by name, username, or email
     update_last_login: Update user's last login timestamp
@@ -32,6 +34,13 @@ from werkzeug.security import generate_password_hash, check_password_hash
 import sqlite3
 
 class User:
+    @staticmethod
+    def _next_user_id(conn, role):
+        """Generate the display user_id (A001, T001, S001, ...) for a new user"""
+        count = conn.execute("SELECT COUNT(*) FROM users WHERE role = ?", (role,)).fetchone()[0]
+        prefix = {'admin': 'A', 'teacher': 'T', 'student': 'S'}.get(role, 'U')
+        return f"{prefix}{count + 1:03d}"
+    
     @staticmethod
     def create_user(username, password, role='student', email=None, full_name=None, user_id=None):
         conn = get_db_connection()
@@ -39,19 +48,7 @@ class User:
         try:
             # Generate user_id if not provided
             if not user_id:
-                # Get the next ID for the role
-                cursor = conn.cursor()
-                cursor.execute("SELECT COUNT(*) FROM users WHERE role = ?", (role,))
-                count = cursor.fetchone()[0]
-                
-                if role == 'admin':
-                    user_id = f"A{count + 1:03d}"
-                elif role == 'teacher':
-                    user_id = f"T{count + 1:03d}"
-                elif role == 'student':
-                    user_id = f"S{count + 1:03d}"
-                else:
-                    user_id = f"U{count + 1:03d}"
+                user_id = User._next_user_id(conn, role)
             
             conn.execute("""
                 INSERT INTO users (username, password, role, email, full_name, user_id, is_active, created_at) 
@@ -64,6 +61,29 @@ class User:
         finally:
             conn.close()
     
+    @staticmethod
+    def create_user_if_absent(username, password, role='student', email=None, full_name=None):
+        """
+        Insert a user unless the username is taken, in a single statement
+        Returns (created, existed)
+        """
+        conn = get_db_connection()
+        hashed_password = generate_password_hash(password)
+        try:
+            user_id = User._next_user_id(conn, role)
+            row = conn.execute("""
+                INSERT INTO users (username, password, role, email, full_name, user_id, is_active, created_at) 
+                VALUES (?, ?, ?, ?, ?, ?, 1, datetime('now'))
+                ON CONFLICT(username) DO NOTHING
+                RETURNING id
+            """, (username, hashed_password, role, email, full_name or username, user_id)).fetchone()
+            conn.commit()
+            return (row is not None, row is None)
+        except sqlite3.IntegrityError:
+            return (False, False)
+        finally:
+            conn.close()
+    
     @staticmethod
     def get_user_by_username(username):
         conn = get_db_connection()
@@ -90,13 +110,26 @@ class User:
         return dict(user) if user else None
     
     @staticmethod
-    def get_all_users():
+    def get_all_users(limit=None, offset=0):
+        """Get all users, newest first; pass limit/offset to fetch a single page"""
         conn = get_db_connection()
         conn.row_factory = sqlite3.Row
-        users = conn.execute("SELECT * FROM users ORDER BY created_at DESC").fetchall()
+        if limit is None:
+            users = conn.execute("SELECT * FROM users ORDER BY created_at DESC").fetchall()
+        else:
+            users = conn.execute("SELECT * FROM users ORDER BY created_at DESC LIMIT ? OFFSET ?",
+                                 (limit, offset)).fetchall()
         conn.close()
         return [dict(user) for user in users]
     
+    @staticmethod
+    def count_users():
+        """Count all users without loading them"""
+        conn = get_db_connection()
+        count = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+        conn.close()
+        return count
+    
     @staticmethod
     def get_users_by_role(role):
         """Get all users with a specific role"""
@@ -106,6 +139,22 @@ class User:
         conn.close()
         return [dict(user) for user in users]
     
+    @staticmethod
+    def get_teachers_not_assigned_to_subject(subject_id):
+        """Get teachers with no invitation or assignment for a subject"""
+        conn = get_db_connection()
+        conn.row_factory = sqlite3.Row
+        users = conn.execute("""
+            SELECT u.* FROM users u
+            WHERE u.role = 'teacher' AND NOT EXISTS (
+                SELECT 1 FROM subject_teachers st
+                WHERE st.teacher_id = u.id AND st.subject_id = ?
+            )
+            ORDER BY u.full_name
+        """, (subject_id,)).fetchall()
+        conn.close()
+        return [dict(user) for user in users]
+    
     @staticmethod
     def search_users(query, role=None):
         """Search users by username, full_name, or email"""
@@ -0,0 +1,132 @@
+"""
+Common Password Blocklist
+Membership test for known-weak passwords backed by a Bloom filter
+
+The handful of built-in passwords is always blocked. A larger list can be
+supplied through the COMMON_PASSWORDS_FILE environment variable, loaded once
+by create_app (before gunicorn forks its workers, with preload_app):
+
+    * a prebuilt filter file (preferred), memory-mapped so workers share its
+      pages and startup costs no hashing. Build it offline from a password
+      list (one per line, e.g. a SecLists top-N file) with
+          python build_password_filter.py common_passwords.txt common_passwords.bloom
+    * a plain password list, streamed into a filter sized from its line count
+
+A million entries cost about 1.2 MB instead of a set of strings. False
+positives only ask the user to pick another password.
+"""
+
+import hashlib
+import logging
+import math
+import mmap
+import os
+import struct
+
+logger = logging.getLogger(__name__)
+
+# Always blocked, whether or not a larger list is configured
+BUILTIN_COMMON_PASSWORDS = frozenset({
+    '123456', 'password', 'qwerty', 'abc123', '123456789',
+    'password123', 'admin', 'letmein', 'welcome', 'monkey',
+    '1234567890', 'dragon', 'master', 'hello', 'freedom'
+})
+
+# Prebuilt filter file: magic, then num_bits and num_hashes, then the bit array
+BLOOM_MAGIC = b'AQBLOOM1'
+_BLOOM_HEADER = struct.Struct('<8sQI')
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (k bit positions by double hashing)"""
+
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(1, capacity)
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    @classmethod
+    def from_bits(cls, bits, num_bits, num_hashes):
+        """Filter over an existing bit array (bytearray, bytes or a memoryview of an mmap)"""
+        bloom = cls.__new__(cls)
+        bloom.num_bits = num_bits
+        bloom.num_hashes = num_hashes
+        bloom.bits = bits
+        return bloom
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, item):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item):
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def save(self, path):
+        """Write the filter in the prebuilt format read by load_bloom_file()"""
+        with open(path, 'wb') as f:
+            f.write(_BLOOM_HEADER.pack(BLOOM_MAGIC, self.num_bits, self.num_hashes))
+            f.write(self.bits)
+
+
+def _password_lines(path):
+    """Non-empty lowercased lines of a password list, streamed"""
+    with open(path, encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            entry = line.strip()
+            if entry:
+                yield entry.lower()
+
+def build_bloom_filter(path, error_rate=0.01):
+    """Build a Bloom filter from a newline-separated password file (lowercased).
+    The file is read twice, once to size the filter and once to fill it, so no
+    entries are held in memory; duplicates only make the filter a little larger"""
+    bloom = BloomFilter(sum(1 for _ in _password_lines(path)), error_rate)
+    for entry in _password_lines(path):
+        bloom.add(entry)
+    return bloom
+
+def load_bloom_file(path):
+    """Memory-map a filter written by BloomFilter.save()"""
+    with open(path, 'rb') as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, num_bits, num_hashes = _BLOOM_HEADER.unpack_from(data)
+    if magic != BLOOM_MAGIC or len(data) - _BLOOM_HEADER.size < (num_bits + 7) // 8:
+        raise ValueError(f"{path} is not a complete prebuilt password filter")
+    return BloomFilter.from_bits(memoryview(data)[_BLOOM_HEADER.size:], num_bits, num_hashes)
+
+def load_common_passwords(path):
+    """Load a prebuilt filter or a plain password list (None if the file cannot be used)"""
+    try:
+        with open(path, 'rb') as f:
+            prebuilt = f.read(len(BLOOM_MAGIC)) == BLOOM_MAGIC
+        return load_bloom_file(path) if prebuilt else build_bloom_filter(path)
+    except (OSError, ValueError, struct.error) as e:
+        logger.warning("Common password list %s not loaded: %s", path, e)
+        return None
+
+
+_bloom = None
+
+def init_common_passwords(path=None):
+    """Load COMMON_PASSWORDS_FILE (or path) into the blocklist; called by create_app.
+    Unset or unusable files leave only the built-in passwords blocked"""
+    global _bloom
+    path = path if path is not None else os.getenv('COMMON_PASSWORDS_FILE')
+    _bloom = load_common_passwords(path) if path else None
+    return _bloom
+
+def is_common_password(password_lower):
+    """Whether an already-lowercased password is on the blocklist"""
+    if password_lower in BUILTIN_COMMON_PASSWORDS:
+        return True
+    bloom = _bloom
+    return bloom is not None and password_lower in bloom
+
@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+"""
+Build the prebuilt common-password filter loaded through COMMON_PASSWORDS_FILE
+
+Usage: python build_password_filter.py <password-list.txt> <output.bloom>
+"""
+
+import sys
+
+from backend.utils.password_blocklist import build_bloom_filter
+
+def main():
+    if len(sys.argv) != 3:
+        sys.exit("usage: python build_password_filter.py <password-list.txt> <output.bloom>")
+    bloom = build_bloom_filter(sys.argv[1])
+    bloom.save(sys.argv[2])
+    print(f"✅ Wrote {sys.argv[2]} ({len(bloom.bits)} bytes, {bloom.num_hashes} hashes)")
+
+if __name__ == "__main__":
+    main()
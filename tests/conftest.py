@@ -0,0 +1,67 @@
+"""
+Shared pytest fixtures backed by a throwaway SQLite database
+"""
+
+import pytest
+
+# Tables and columns the models use that init_db does not create
+EXTRA_SCHEMA = """
+    ALTER TABLE users ADD COLUMN full_name TEXT;
+    ALTER TABLE users ADD COLUMN user_id TEXT;
+    ALTER TABLE users ADD COLUMN is_active BOOLEAN DEFAULT 1;
+    ALTER TABLE users ADD COLUMN profile_picture TEXT;
+    ALTER TABLE quizzes ADD COLUMN subject TEXT;
+    ALTER TABLE quizzes ADD COLUMN deadline TEXT;
+    ALTER TABLE subjects ADD COLUMN year INTEGER;
+    ALTER TABLE subjects ADD COLUMN code VARCHAR(10);
+    CREATE TABLE IF NOT EXISTS classes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name VARCHAR(100) NOT NULL,
+        description TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE IF NOT EXISTS teacher_classes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        teacher_id INTEGER,
+        class_id INTEGER,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(teacher_id, class_id)
+    );
+    CREATE TABLE IF NOT EXISTS student_classes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        student_id INTEGER,
+        class_id INTEGER,
+        status VARCHAR(20) DEFAULT 'pending',
+        requested_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        approved_at TIMESTAMP,
+        UNIQUE(student_id, class_id)
+    );
+"""
+
+@pytest.fixture
+def sqlite_db(tmp_path, monkeypatch):
+    """Point get_db_connection() at a fresh SQLite file with the full schema.
+    Yields a function opening a private connection to that file."""
+    from backend.config import database
+    from backend.config.db import SqliteBackend
+
+    backend = SqliteBackend(str(tmp_path / 'test.db'))
+    monkeypatch.setattr(database, '_open_connection', backend.get_connection)
+    # Never reuse a connection a previous test left on this thread
+    database._discard_shared_connection()
+
+    database.init_db()
+    conn = backend.get_connection()
+    conn.executescript(EXTRA_SCHEMA)
+    conn.close()
+
+    yield backend.get_connection
+    database._discard_shared_connection()
+
+@pytest.fixture
+def flask_app(sqlite_db):
+    """Application created against the sqlite_db database"""
+    from backend import create_app
+    app = create_app()
+    app.config['TESTING'] = True
+    return app
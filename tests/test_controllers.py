@@ -5,6 +5,7 @@ Integration tests for Flask routes and controllers
 
 import pytest
 import json
+import os
 from unittest.mock import patch, Mock
 from backend.controllers.auth_controller import auth_bp
 from backend.controllers.quiz_controller import quiz_bp
@@ -427,3 +428,326 @@ class TestErrorHandling:
             
             assert response.status_code == 500
 
+
+def _login_admin(flask_app, sqlite_db):
+    """Create an active admin and return (client logged in as them, admin id)"""
+    conn = sqlite_db()
+    admin_id = conn.execute(
+        "INSERT INTO users (username, password, role, is_active) VALUES ('boss', 'x', 'admin', 1)"
+    ).lastrowid
+    conn.commit()
+    conn.close()
+    
+    client = flask_app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = admin_id
+        sess['username'] = 'boss'
+        sess['role'] = 'admin'
+    return client, admin_id
+
+class TestRequireEnrolledIfStudent:
+    """Test students need an approved class before reaching subjects and quizzes"""
+    
+    def _client(self, flask_app, sqlite_db, role, status=None):
+        conn = sqlite_db()
+        user_id = conn.execute(
+            "INSERT INTO users (username, password, role) VALUES ('someone', 'x', ?)", (role,)
+        ).lastrowid
+        if status:
+            class_id = conn.execute("INSERT INTO classes (name) VALUES ('Soil Basics')").lastrowid
+            conn.execute("INSERT INTO student_classes (student_id, class_id, status) VALUES (?, ?, ?)",
+                         (user_id, class_id, status))
+        conn.commit()
+        conn.close()
+        
+        client = flask_app.test_client()
+        with client.session_transaction() as sess:
+            sess['user_id'] = user_id
+            sess['username'] = 'someone'
+            sess['role'] = role
+        return client, user_id
+    
+    @pytest.mark.parametrize('status', [None, 'pending'])
+    def test_unenrolled_student_redirected(self, flask_app, sqlite_db, status):
+        """Test a student without an approved class is sent to my_classes"""
+        client, _ = self._client(flask_app, sqlite_db, 'student', status)
+        for path in ('/subjects', '/take_quiz/1'):
+            response = client.get(path)
+            assert response.status_code == 302
+            assert response.headers['Location'].endswith('/my_classes')
+    
+    def test_approved_student_allowed(self, flask_app, sqlite_db):
+        """Test an approved student reaches the subjects page"""
+        client, _ = self._client(flask_app, sqlite_db, 'student', 'approved')
+        response = client.get('/subjects')
+        assert response.status_code == 200
+    
+    def test_teacher_not_checked(self, flask_app, sqlite_db):
+        """Test non-students are not held to the enrollment check"""
+        client, _ = self._client(flask_app, sqlite_db, 'teacher')
+        response = client.get('/subjects')
+        assert response.status_code == 200
+    
+    def test_rejection_applies_to_next_request(self, flask_app, sqlite_db):
+        """Test a student loses access as soon as their approved enrollment is deleted"""
+        client, user_id = self._client(flask_app, sqlite_db, 'student', 'approved')
+        assert client.get('/subjects').status_code == 200
+        
+        conn = sqlite_db()
+        conn.execute("DELETE FROM student_classes WHERE student_id = ?", (user_id,))
+        conn.commit()
+        conn.close()
+        
+        response = client.get('/subjects')
+        assert response.status_code == 302
+        assert response.headers['Location'].endswith('/my_classes')
+
+class TestAdminAccess:
+    """Test the admin blueprint re-checks the user row on every request"""
+    
+    def _run(self, sqlite_db, sql, params):
+        conn = sqlite_db()
+        conn.execute(sql, params)
+        conn.commit()
+        conn.close()
+    
+    def test_active_admin_allowed(self, flask_app, sqlite_db):
+        """Test an active admin reaches the admin pages"""
+        client, _ = _login_admin(flask_app, sqlite_db)
+        response = client.get('/admin/dashboard')
+        assert response.status_code == 200
+    
+    def test_demoted_admin_denied(self, flask_app, sqlite_db):
+        """Test a demoted admin loses access despite session['role']"""
+        client, admin_id = _login_admin(flask_app, sqlite_db)
+        self._run(sqlite_db, "UPDATE users SET role = 'teacher' WHERE id = ?", (admin_id,))
+        
+        response = client.get('/admin/dashboard')
+        assert response.status_code == 302
+        assert '/login' in response.headers['Location']
+    
+    def test_deactivated_admin_denied(self, flask_app, sqlite_db):
+        """Test a deactivated admin loses access"""
+        client, admin_id = _login_admin(flask_app, sqlite_db)
+        self._run(sqlite_db, "UPDATE users SET is_active = 0 WHERE id = ?", (admin_id,))
+        
+        response = client.get('/admin/dashboard')
+        assert response.status_code == 302
+    
+    def test_deleted_admin_denied(self, flask_app, sqlite_db):
+        """Test a deleted admin loses access"""
+        client, admin_id = _login_admin(flask_app, sqlite_db)
+        self._run(sqlite_db, "DELETE FROM users WHERE id = ?", (admin_id,))
+        
+        response = client.get('/admin/dashboard')
+        assert response.status_code == 302
+
+class TestAdminPagination:
+    """Test admin list pages clamp ?per_page="""
+    
+    @pytest.mark.parametrize('per_page, expected', [('-1', 1), ('0', 1), ('25', 25), ('100000', 200)])
+    def test_users_per_page_clamped(self, flask_app, sqlite_db, per_page, expected):
+        """Test per_page stays within 1..MAX_PER_PAGE for the user list"""
+        client, _ = _login_admin(flask_app, sqlite_db)
+        with patch('backend.controllers.admin_controller.User.get_all_users', return_value=[]) as mock_get:
+            client.get(f'/admin/users?page=2&per_page={per_page}')
+        mock_get.assert_called_once_with(limit=expected, offset=expected)
+    
+    @pytest.mark.parametrize('per_page, expected', [('-1', 1), ('0', 1), ('100000', 200)])
+    def test_notifications_per_page_clamped(self, flask_app, sqlite_db, per_page, expected):
+        """Test per_page stays within 1..MAX_PER_PAGE for notifications"""
+        client, admin_id = _login_admin(flask_app, sqlite_db)
+        with patch('backend.controllers.admin_controller.Notification.get_user_notifications',
+                   return_value=[]) as mock_get:
+            client.get(f'/admin/notifications?per_page={per_page}')
+        mock_get.assert_called_once_with(admin_id, limit=expected, offset=0)
+    
+    def test_non_numeric_page_args_use_defaults(self, flask_app, sqlite_db):
+        """Test ?page=abc&per_page=xyz falls back to the first page of 50 on both lists"""
+        client, admin_id = _login_admin(flask_app, sqlite_db)
+        with patch('backend.controllers.admin_controller.render_template', return_value='ok'), \
+             patch('backend.controllers.admin_controller.User.get_all_users', return_value=[]) as mock_users, \
+             patch('backend.controllers.admin_controller.Notification.get_user_notifications',
+                   return_value=[]) as mock_notifications:
+            users_response = client.get('/admin/users?page=abc&per_page=xyz')
+            notifications_response = client.get('/admin/notifications?page=abc&per_page=xyz')
+        
+        assert users_response.status_code == 200
+        mock_users.assert_called_once_with(limit=50, offset=0)
+        assert notifications_response.status_code == 200
+        mock_notifications.assert_called_once_with(admin_id, limit=50, offset=0)
+
+class TestAdminDashboardSections:
+    """Test a failing dashboard section is logged and does not blank the page"""
+    
+    def test_section_failure_logged(self, flask_app, sqlite_db, caplog):
+        """Test _safe logs the traceback and renders the remaining sections"""
+        client, _ = _login_admin(flask_app, sqlite_db)
+        with patch('backend.controllers.admin_controller.SubjectTeacher.get_all_pending_invitations',
+                   side_effect=RuntimeError('boom')):
+            response = client.get('/admin/dashboard')
+        
+        assert response.status_code == 200
+        failures = [r for r in caplog.records if r.getMessage() == 'Admin dashboard section failed']
+        assert failures and failures[0].exc_info[0] is RuntimeError
+
+class TestProfileAvatarUpload:
+    """Test avatar uploads report the real outcome of the write and profile update"""
+    
+    def _client(self, flask_app, sqlite_db, avatar_dir):
+        flask_app.config['AVATAR_DIR'] = str(avatar_dir)
+        conn = sqlite_db()
+        user_id = conn.execute(
+            "INSERT INTO users (username, password, role) VALUES ('pic', 'x', 'student')"
+        ).lastrowid
+        conn.commit()
+        conn.close()
+        
+        client = flask_app.test_client()
+        with client.session_transaction() as sess:
+            sess['user_id'] = user_id
+            sess['role'] = 'student'
+        return client, user_id
+    
+    def _upload(self, client, data=b'\x89PNG' + b'x' * 3_000_000):
+        from io import BytesIO
+        return client.post('/profile/upload_avatar', data={
+            'profile_picture': (BytesIO(data), 'me.png')
+        }, content_type='multipart/form-data')
+    
+    def test_upload_stored_before_success(self, flask_app, sqlite_db, tmp_path):
+        """Test the file and profile row exist when success is reported"""
+        avatar_dir = tmp_path / 'avatars'
+        avatar_dir.mkdir()
+        client, user_id = self._client(flask_app, sqlite_db, avatar_dir)
+        payload = b'\x89PNG' + b'x' * 3_000_000
+        response = self._upload(client, payload)
+        
+        body = response.get_json()
+        assert body['success'] is True
+        stored = avatar_dir / os.path.basename(body['file_path'])
+        assert stored.read_bytes() == payload
+        
+        conn = sqlite_db()
+        picture = conn.execute("SELECT profile_picture FROM users WHERE id = ?", (user_id,)).fetchone()[0]
+        conn.close()
+        assert picture == body['file_path']
+    
+    def test_profile_update_failure_reported(self, flask_app, sqlite_db, tmp_path):
+        """Test a failed profile update is reported and leaves no file behind"""
+        avatar_dir = tmp_path / 'avatars'
+        avatar_dir.mkdir()
+        client, _ = self._client(flask_app, sqlite_db, avatar_dir)
+        with patch('backend.controllers.profile_controller.User.update_profile', return_value=False):
+            response = self._upload(client)
+        
+        assert response.get_json()['success'] is False
+        assert list(avatar_dir.iterdir()) == []
+    
+    def test_disk_write_failure_reported(self, flask_app, sqlite_db, tmp_path):
+        """Test a failed disk write is reported and the profile is not updated"""
+        client, _ = self._client(flask_app, sqlite_db, tmp_path / 'missing')
+        with patch('backend.controllers.profile_controller.User.update_profile') as mock_update:
+            response = self._upload(client)
+        
+        assert response.get_json()['success'] is False
+        mock_update.assert_not_called()
+
+@pytest.fixture
+def backend_log_level():
+    """Restore the backend package log level that create_app sets"""
+    import logging
+    backend_logger = logging.getLogger('backend')
+    level = backend_logger.level
+    yield backend_logger
+    backend_logger.setLevel(level)
+
+class TestAuthLogging:
+    """Test the log level comes from app config and OTP codes stay out of the logs"""
+    
+    def test_log_level_from_environment(self, sqlite_db, backend_log_level, monkeypatch):
+        """Test LOG_LEVEL overrides the config class level"""
+        import logging
+        from backend import create_app
+        monkeypatch.setenv('LOG_LEVEL', 'warning')
+        app = create_app()
+        assert app.config['LOG_LEVEL'] == 'warning'
+        assert backend_log_level.level == logging.WARNING
+        assert not logging.getLogger('backend.controllers.auth_controller').isEnabledFor(logging.INFO)
+    
+    def test_unknown_log_level_falls_back_to_info(self, sqlite_db, backend_log_level, monkeypatch):
+        """Test an unknown LOG_LEVEL does not stop the app from booting"""
+        import logging
+        from backend import create_app
+        monkeypatch.setenv('LOG_LEVEL', 'VERBOSE')
+        create_app()
+        assert backend_log_level.level == logging.INFO
+    
+    def test_otp_codes_not_logged(self, flask_app, backend_log_level, caplog):
+        """Test sending and checking OTPs logs neither the sent nor the submitted code"""
+        import logging
+        backend_log_level.setLevel(logging.DEBUG)
+        client = flask_app.test_client()
+        with caplog.at_level(logging.DEBUG, logger='backend'):
+            with patch('backend.utils.otp_utils.generate_otp', return_value='482913'), \
+                 patch('backend.utils.otp_utils.send_otp_via_email', return_value=True):
+                response = client.post('/send_email_otp', json={'email': 'otp@example.com'})
+                assert response.get_json()['success'] is True
+                client.post('/send_forgot_password_email_otp', json={'email': 'otp@example.com'})
+            client.post('/register', data={
+                'username': 'otpuser', 'password': 'Secret123!', 'confirm_password': 'Secret123!',
+                'role': 'student', 'email': 'otp@example.com', 'email_otp': '771205'
+            })
+        
+        messages = '\n'.join(record.getMessage() for record in caplog.records)
+        assert 'Email OTP sent to otp@example.com' in messages
+        assert 'Invalid OTP code' in messages
+        assert '482913' not in messages
+        assert '771205' not in messages
+
+class TestQueryBudget:
+    """Test the development query budget counts queries and warns when one is exceeded"""
+    
+    def _student_client(self, sqlite_db, monkeypatch):
+        from backend import create_app
+        monkeypatch.setenv('FLASK_ENV', 'development')
+        app = create_app()
+        conn = sqlite_db()
+        student_id = conn.execute(
+            "INSERT INTO users (username, password, role) VALUES ('counted', 'x', 'student')"
+        ).lastrowid
+        conn.commit()
+        conn.close()
+        
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['user_id'] = student_id
+            sess['role'] = 'student'
+        return client
+    
+    def test_query_count_header(self, sqlite_db, backend_log_level, monkeypatch, caplog):
+        """Test a budgeted endpoint reports its query count and stays within budget"""
+        client = self._student_client(sqlite_db, monkeypatch)
+        response = client.get('/my_classes')
+        
+        assert response.status_code == 200
+        assert response.headers['X-Query-Count'] == '1'
+        assert 'Query budget exceeded' not in caplog.text
+    
+    def test_over_budget_logs_warning(self, sqlite_db, backend_log_level, monkeypatch, caplog):
+        """Test going over the endpoint's budget logs a warning"""
+        from backend.config import query_budget
+        monkeypatch.setitem(query_budget.QUERY_BUDGETS, 'classes.my_classes', 0)
+        client = self._student_client(sqlite_db, monkeypatch)
+        response = client.get('/my_classes')
+        
+        assert response.headers['X-Query-Count'] == '1'
+        warnings = [r.getMessage() for r in caplog.records if r.levelname == 'WARNING']
+        assert "Query budget exceeded: GET /my_classes (classes.my_classes) ran 1 queries, budget 0" in warnings
+    
+    def test_not_installed_outside_development(self, sqlite_db, backend_log_level, monkeypatch):
+        """Test other environments get no counting or header"""
+        from backend import create_app
+        monkeypatch.setenv('FLASK_ENV', 'production')
+        response = create_app().test_client().get('/login')
+        assert 'X-Query-Count' not in response.headers
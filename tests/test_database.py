@@ -0,0 +1,188 @@
+"""
+Database Tests
+Tests for connection handling and schema/seed bookkeeping
+"""
+
+import sqlite3
+import pytest
+from backend.config.database_optimized import DatabaseManager, SEED_VERSION, SEED_VERSION_KEY
+
+class TestDatabaseManagerSeed:
+    """Test DatabaseManager seeding markers"""
+
+    def test_seed_runs_when_user_version_already_set(self, tmp_path):
+        """Test seeding is not skipped because database.py stamped PRAGMA user_version"""
+        path = tmp_path / 'seed.db'
+        conn = sqlite3.connect(path)
+        conn.execute('PRAGMA user_version = 2')
+        conn.commit()
+        conn.close()
+
+        DatabaseManager(f'sqlite:///{path}')
+
+        conn = sqlite3.connect(path)
+        assert conn.execute('SELECT COUNT(*) FROM users').fetchone()[0] == 3
+        assert conn.execute('SELECT value FROM db_meta WHERE key = ?',
+                            (SEED_VERSION_KEY,)).fetchone()[0] == SEED_VERSION
+        # The migration version owned by database.py is left alone
+        assert conn.execute('PRAGMA user_version').fetchone()[0] == 2
+        conn.close()
+
+    def test_seed_runs_once(self, tmp_path):
+        """Test a second manager on the same file does not seed again"""
+        path = tmp_path / 'seed.db'
+        DatabaseManager(f'sqlite:///{path}')
+
+        conn = sqlite3.connect(path)
+        conn.execute("DELETE FROM classes")
+        conn.commit()
+        conn.close()
+
+        DatabaseManager(f'sqlite:///{path}')
+
+        conn = sqlite3.connect(path)
+        assert conn.execute('SELECT COUNT(*) FROM classes').fetchone()[0] == 0
+        conn.close()
+
+@pytest.fixture
+def request_app(sqlite_db):
+    """Bare Flask app with the per-request connection teardown installed"""
+    from flask import Flask
+    from backend.config.database import close_request_connection
+    app = Flask(__name__)
+    app.teardown_appcontext(close_request_connection)
+    return app
+
+def _count_users(open_connection, username):
+    conn = open_connection()
+    try:
+        return conn.execute("SELECT COUNT(*) FROM users WHERE username = ?", (username,)).fetchone()[0]
+    finally:
+        conn.close()
+
+def _insert_user(conn, username):
+    conn.execute("INSERT INTO users (username, password) VALUES (?, 'x')", (username,))
+
+class TestRequestConnection:
+    """Test the connection shared by model calls within one app context"""
+
+    def test_nested_close_keeps_outer_writes(self, request_app, sqlite_db):
+        """Test an inner caller's close() does not roll back the outer caller's pending writes"""
+        from backend.config.database import get_db_connection
+        with request_app.app_context():
+            outer = get_db_connection()
+            _insert_user(outer, 'outer')
+
+            inner = get_db_connection()
+            assert inner is outer
+            inner.execute("SELECT 1").fetchone()
+            inner.close()
+
+            outer.commit()
+            outer.close()
+
+        assert _count_users(sqlite_db, 'outer') == 1
+
+    def test_outermost_close_rolls_back(self, request_app, sqlite_db):
+        """Test the outermost close() drops uncommitted work like closing a private connection"""
+        from backend.config.database import get_db_connection
+        with request_app.app_context():
+            conn = get_db_connection()
+            _insert_user(conn, 'dropped')
+            conn.close()
+
+            conn = get_db_connection()
+            assert conn.execute("SELECT COUNT(*) FROM users WHERE username = 'dropped'").fetchone()[0] == 0
+            conn.close()
+
+    def test_extra_close_does_not_go_negative(self, request_app, sqlite_db):
+        """Test an unmatched close() leaves the open count at zero"""
+        from backend.config.database import get_db_connection
+        with request_app.app_context():
+            conn = get_db_connection()
+            conn.close()
+            conn.close()
+            assert conn._opens == 0
+
+            conn = get_db_connection()
+            _insert_user(conn, 'after')
+            inner = get_db_connection()
+            inner.close()
+            conn.commit()
+            conn.close()
+
+        assert _count_users(sqlite_db, 'after') == 1
+
+    def test_teardown_rolls_back_unclosed_work(self, request_app, sqlite_db):
+        """Test uncommitted work left open at the end of the app context is rolled back"""
+        from flask import g
+        from backend.config.database import get_db_connection
+        with request_app.app_context():
+            conn = get_db_connection()
+            _insert_user(conn, 'leaked')
+        assert _count_users(sqlite_db, 'leaked') == 0
+
+        with request_app.app_context():
+            assert g.get('db') is None
+            conn = get_db_connection()
+            assert conn.execute("SELECT COUNT(*) FROM users WHERE username = 'leaked'").fetchone()[0] == 0
+            conn.close()
+
+    def test_connection_reused_across_requests(self, request_app, sqlite_db):
+        """Test consecutive requests on one thread share the underlying connection"""
+        from backend.config.database import get_db_connection
+        with request_app.test_request_context('/first'):
+            first = get_db_connection()
+            underlying = first._conn
+            first.close()
+
+        with request_app.test_request_context('/second'):
+            second = get_db_connection()
+            assert second is not first
+            assert second._conn is underlying
+            assert second._opens == 1
+            # Still usable after the previous request's teardown
+            assert second.execute("SELECT 1").fetchone()[0] == 1
+            second.close()
+
+    def test_outside_app_context_opens_private_connections(self, sqlite_db):
+        """Test calls outside an app context get their own connection, really closed by close()"""
+        import sqlite3
+        from flask import has_app_context
+        from backend.config.database import get_db_connection, get_shared_connection
+        assert not has_app_context()
+
+        first = get_db_connection()
+        second = get_db_connection()
+        assert isinstance(first, sqlite3.Connection)
+        assert first is not second
+        assert first is not get_shared_connection()
+
+        _insert_user(first, 'private')
+        first.commit()
+        first.close()
+        with pytest.raises(sqlite3.ProgrammingError):
+            first.execute("SELECT 1")
+
+        assert second.execute("SELECT COUNT(*) FROM users WHERE username = 'private'").fetchone()[0] == 1
+        second.close()
+
+    def test_broken_connection_replaced(self, request_app, sqlite_db, caplog):
+        """Test a connection whose teardown rollback fails is logged and not reused"""
+        import logging
+        from backend.config.database import get_db_connection
+        with caplog.at_level(logging.WARNING, logger='backend.config.database'):
+            with request_app.app_context():
+                broken = get_db_connection()
+                underlying = broken._conn
+                # Closing it behind the wrapper's back makes the teardown rollback raise
+                underlying.close()
+
+        assert any('Discarding broken database connection' in record.getMessage()
+                   for record in caplog.records)
+
+        with request_app.app_context():
+            conn = get_db_connection()
+            assert conn._conn is not underlying
+            assert conn.execute("SELECT 1").fetchone()[0] == 1
+            conn.close()
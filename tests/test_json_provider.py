@@ -0,0 +1,42 @@
+"""
+JSON Provider Tests
+OrjsonProvider output must match Flask's DefaultJSONProvider byte for byte
+"""
+
+import pytest
+from datetime import datetime
+from flask import Flask
+
+pytest.importorskip('orjson')
+
+from backend.config.json_provider import OrjsonProvider
+
+PAYLOAD = {'b': [1, 2], 'a': {'c': None, 'when': datetime(2024, 1, 2, 3, 4, 5)}, 'name': 'Soil Science'}
+
+def _response_body(app, provider_class=None):
+    if provider_class is not None:
+        app.json = provider_class(app)
+    with app.app_context():
+        return app.json.response(PAYLOAD).get_data()
+
+class TestOrjsonProvider:
+    """Test OrjsonProvider against the stdlib provider"""
+
+    @pytest.mark.parametrize('debug', [False, True])
+    def test_response_matches_default_provider(self, debug):
+        """Test compact output normally and indented output in debug mode"""
+        orjson_app, default_app = Flask('orjson_app'), Flask('default_app')
+        orjson_app.debug = default_app.debug = debug
+
+        expected = _response_body(default_app)
+        assert _response_body(orjson_app, OrjsonProvider) == expected
+        assert (b'\n  ' in expected) is debug
+
+    def test_compact_false_pretty_prints(self):
+        """Test compact = False indents outside debug mode too"""
+        app = Flask('orjson_app')
+        app.json = OrjsonProvider(app)
+        app.json.compact = False
+        with app.app_context():
+            body = app.json.response(PAYLOAD).get_data()
+        assert body.startswith(b'{\n  "a": {')
@@ -262,8 +262,9 @@ class TestClassModel:
         if classes:
             class_id = classes[0]['id']
             
-            result = Class.enroll_student(user['id'], class_id)
-            assert result is True
+            created, class_name, existing_status = Class.enroll_student(user['id'], class_id)
+            assert created is True
+            assert existing_status is None
             
             # Check enrollment status
             status = Class.get_student_enrollment_status(user['id'], class_id)
@@ -418,3 +419,294 @@ class TestResultModel:
         results = Result.get_quiz_results(quiz_id)
         assert isinstance(results, list)
 
+
+class TestUserCreateIfAbsent:
+    """Test single-statement registration with User.create_user_if_absent"""
+    
+    def test_new_user_created(self, sqlite_db):
+        """Test a free username is inserted with a hashed password and display id"""
+        created, existed = User.create_user_if_absent('newbie', 'Secret123!', role='student',
+                                                      email='newbie@example.com')
+        assert (created, existed) == (True, False)
+        
+        user = User.get_user_by_username('newbie')
+        assert user['role'] == 'student'
+        assert user['email'] == 'newbie@example.com'
+        assert user['full_name'] == 'newbie'
+        assert user['user_id'] == 'S001'
+        assert user['is_active'] == 1
+        assert user['password'] != 'Secret123!'
+    
+    def test_taken_username_not_overwritten(self, sqlite_db):
+        """Test a duplicate username reports existed and keeps the first row"""
+        User.create_user_if_absent('dup', 'First123!', role='student', email='first@example.com')
+        created, existed = User.create_user_if_absent('dup', 'Second123!', role='teacher',
+                                                      email='second@example.com')
+        assert (created, existed) == (False, True)
+        
+        user = User.get_user_by_username('dup')
+        assert user['role'] == 'student'
+        assert user['email'] == 'first@example.com'
+        
+        conn = sqlite_db()
+        assert conn.execute("SELECT COUNT(*) FROM users WHERE username = 'dup'").fetchone()[0] == 1
+        conn.close()
+    
+    def test_display_ids_follow_role_counts(self, sqlite_db):
+        """Test user_id numbering is per role"""
+        User.create_user_if_absent('t1', 'Secret123!', role='teacher')
+        User.create_user_if_absent('s1', 'Secret123!', role='student')
+        User.create_user_if_absent('t2', 'Secret123!', role='teacher')
+        assert User.get_user_by_username('t2')['user_id'] == 'T002'
+        assert User.get_user_by_username('s1')['user_id'] == 'S001'
+
+def _add_class(sqlite_db, name='Soil Basics'):
+    conn = sqlite_db()
+    class_id = conn.execute("INSERT INTO classes (name) VALUES (?)", (name,)).lastrowid
+    conn.commit()
+    conn.close()
+    return class_id
+
+def _add_students(sqlite_db, count):
+    conn = sqlite_db()
+    conn.executemany("INSERT INTO users (username, password, role) VALUES (?, 'x', 'student')",
+                     ((f'student{i}',) for i in range(count)))
+    conn.commit()
+    ids = [row[0] for row in conn.execute("SELECT id FROM users WHERE role = 'student' ORDER BY id")]
+    conn.close()
+    return ids
+
+class TestClassEnrollment:
+    """Test Class.enroll_student's (created, class_name, existing_status) result"""
+    
+    def test_new_request(self, sqlite_db):
+        """Test a first request is created as pending"""
+        class_id = _add_class(sqlite_db)
+        [student_id] = _add_students(sqlite_db, 1)
+        
+        assert Class.enroll_student(student_id, class_id) == (True, 'Soil Basics', None)
+        assert Class.get_student_enrollment_status(student_id, class_id)['status'] == 'pending'
+    
+    def test_duplicate_pending_request(self, sqlite_db):
+        """Test a repeated request reports the existing pending status"""
+        class_id = _add_class(sqlite_db)
+        [student_id] = _add_students(sqlite_db, 1)
+        Class.enroll_student(student_id, class_id)
+        
+        assert Class.enroll_student(student_id, class_id) == (False, 'Soil Basics', 'pending')
+    
+    def test_duplicate_approved_request(self, sqlite_db):
+        """Test a request for an approved class reports approved and is not reset to pending"""
+        class_id = _add_class(sqlite_db)
+        [student_id] = _add_students(sqlite_db, 1)
+        Class.enroll_student(student_id, class_id)
+        Class.approve_student(student_id, class_id)
+        
+        assert Class.enroll_student(student_id, class_id) == (False, 'Soil Basics', 'approved')
+        assert Class.get_student_enrollment_status(student_id, class_id)['status'] == 'approved'
+    
+    def test_unknown_class(self, sqlite_db):
+        """Test a request for a missing class creates nothing"""
+        [student_id] = _add_students(sqlite_db, 1)
+        
+        assert Class.enroll_student(student_id, 999) == (False, None, None)
+        assert Class.get_student_enrollment_status(student_id, 999) is None
+
+class TestHasAnyEnrollment:
+    """Test Class.has_any_enrollment and its per-request memo"""
+    
+    def test_approved_pending_and_none(self, sqlite_db):
+        """Test only an approved class counts as enrolled"""
+        class_id = _add_class(sqlite_db)
+        approved, pending, unenrolled = _add_students(sqlite_db, 3)
+        Class.enroll_student(approved, class_id)
+        Class.approve_student(approved, class_id)
+        Class.enroll_student(pending, class_id)
+        
+        assert Class.has_any_enrollment(approved) is True
+        assert Class.has_any_enrollment(pending) is False
+        assert Class.has_any_enrollment(unenrolled) is False
+    
+    def test_memo_lasts_one_request(self, flask_app, sqlite_db):
+        """Test a rejection (e.g. served by another worker) is seen by the next request"""
+        class_id = _add_class(sqlite_db)
+        [student_id] = _add_students(sqlite_db, 1)
+        Class.enroll_student(student_id, class_id)
+        Class.approve_student(student_id, class_id)
+        
+        with flask_app.app_context():
+            assert Class.has_any_enrollment(student_id) is True
+            # Deleted behind the model's back, as another worker process would
+            conn = sqlite_db()
+            conn.execute("DELETE FROM student_classes WHERE student_id = ?", (student_id,))
+            conn.commit()
+            conn.close()
+            # Same request: the memoized answer stands
+            assert Class.has_any_enrollment(student_id) is True
+        
+        with flask_app.app_context():
+            assert Class.has_any_enrollment(student_id) is False
+
+class TestClassBulkEnrollment:
+    """Test bulk approve/reject of pending class enrollments"""
+    
+    def _request_all(self, class_id, student_ids):
+        for student_id in student_ids:
+            Class.enroll_student(student_id, class_id)
+    
+    def test_bulk_approve_only_pending(self, sqlite_db):
+        """Test only the listed pending requests of the class are approved"""
+        class_id = _add_class(sqlite_db)
+        other_class_id = _add_class(sqlite_db, 'Other')
+        a, b, c = _add_students(sqlite_db, 3)
+        self._request_all(class_id, (a, b))
+        self._request_all(other_class_id, (c,))
+        
+        approved = Class.bulk_approve_students(class_id, [a, a, c, 999])
+        
+        assert approved == [a]
+        assert Class.get_student_enrollment_status(a, class_id)['status'] == 'approved'
+        assert Class.get_student_enrollment_status(b, class_id)['status'] == 'pending'
+        assert Class.get_student_enrollment_status(c, other_class_id)['status'] == 'pending'
+        # Already approved: not reported again
+        assert Class.bulk_approve_students(class_id, [a]) == []
+    
+    def test_bulk_reject_only_pending(self, sqlite_db):
+        """Test rejecting deletes pending requests and leaves approved ones"""
+        class_id = _add_class(sqlite_db)
+        a, b, c = _add_students(sqlite_db, 3)
+        self._request_all(class_id, (a, b, c))
+        Class.approve_student(c, class_id)
+        
+        rejected = Class.bulk_reject_students(class_id, [a, b, c])
+        
+        assert sorted(rejected) == [a, b]
+        assert Class.get_student_enrollment_status(a, class_id) is None
+        assert Class.get_student_enrollment_status(c, class_id)['status'] == 'approved'
+    
+    def test_bulk_empty_list(self, sqlite_db):
+        """Test an empty id list touches nothing"""
+        class_id = _add_class(sqlite_db)
+        assert Class.bulk_approve_students(class_id, []) == []
+        assert Class.bulk_reject_students(class_id, []) == []
+    
+    def test_bulk_approve_chunks_large_id_lists(self, sqlite_db, monkeypatch):
+        """Test ids are sent in BULK_CHUNK_SIZE IN-lists within one transaction"""
+        from backend.config import database
+        class_id = _add_class(sqlite_db)
+        student_ids = _add_students(sqlite_db, 2 * Class.BULK_CHUNK_SIZE + 1)
+        conn = sqlite_db()
+        conn.executemany("INSERT INTO student_classes (student_id, class_id) VALUES (?, ?)",
+                         ((student_id, class_id) for student_id in student_ids))
+        conn.commit()
+        conn.close()
+        
+        statements = []
+        open_connection = database._open_connection
+        def traced_connection():
+            conn = open_connection()
+            conn.set_trace_callback(statements.append)
+            return conn
+        monkeypatch.setattr(database, '_open_connection', traced_connection)
+        
+        approved = Class.bulk_approve_students(class_id, student_ids)
+        
+        assert sorted(approved) == student_ids
+        updates = [sql for sql in statements if sql.lstrip().startswith('UPDATE student_classes')]
+        assert len(updates) == 3
+        assert Class.get_pending_enrollments_for_class(class_id) == []
+
+class TestResultScoring:
+    """Test submissions scored in SQL by Result.save_result_with_answers"""
+    
+    def _quiz_with_questions(self, sqlite_db):
+        """Quiz with four questions whose correct options are 1, 2, 3 and 4"""
+        conn = sqlite_db()
+        teacher_id = conn.execute(
+            "INSERT INTO users (username, password, role) VALUES ('teach', 'x', 'teacher')"
+        ).lastrowid
+        student_id = conn.execute(
+            "INSERT INTO users (username, password, role) VALUES ('learner', 'x', 'student')"
+        ).lastrowid
+        subject_id = conn.execute("SELECT id FROM subjects ORDER BY id LIMIT 1").fetchone()[0]
+        conn.commit()
+        conn.close()
+        
+        quiz_id = Quiz.create_quiz('Soil pH', subject_id, teacher_id)
+        Quiz.add_questions_bulk(quiz_id, [
+            (f'Question {n}', 'a', 'b', 'c', 'd', n, '') for n in range(1, 5)
+        ])
+        _, questions = Quiz.get_quiz_with_questions(quiz_id)
+        return student_id, quiz_id, [question['id'] for question in questions]
+    
+    def _answer_count(self, sqlite_db, where, params):
+        conn = sqlite_db()
+        count = conn.execute(f"SELECT COUNT(*) FROM answers WHERE {where}", params).fetchone()[0]
+        conn.close()
+        return count
+    
+    def test_score_counts_correct_answers_only(self, sqlite_db):
+        """Test correct, wrong and unanswered questions are scored and stored"""
+        from backend.controllers.quiz_controller import build_detailed_results
+        student_id, quiz_id, (q1, q2, q3, q4) = self._quiz_with_questions(sqlite_db)
+        
+        # q1 and q3 right, q2 wrong, q4 unanswered
+        result_id, score = Result.save_result_with_answers(student_id, quiz_id,
+                                                           [(q1, 1), (q2, 3), (q3, 3)], 4)
+        
+        assert score == 2
+        stored = Result.get_user_quiz_result(student_id, quiz_id)
+        assert stored['id'] == result_id
+        assert stored['score'] == 2
+        assert stored['total_questions'] == 4
+        assert Result.get_answers(result_id) == {q1: 1, q2: 3, q3: 3}
+        
+        _, questions = Quiz.get_quiz_with_questions(quiz_id)
+        detailed = build_detailed_results(questions, Result.get_answers(result_id))
+        assert [row['is_correct'] for row in detailed] == [True, False, True, None]
+        assert [row['user_answer'] for row in detailed] == [1, 3, 3, None]
+    
+    def test_no_answers_scores_zero(self, sqlite_db):
+        """Test an empty submission is stored with score 0"""
+        student_id, quiz_id, _ = self._quiz_with_questions(sqlite_db)
+        result_id, score = Result.save_result_with_answers(student_id, quiz_id, [], 4)
+        assert score == 0
+        assert Result.get_answers(result_id) == {}
+    
+    def test_failed_submission_rolled_back(self, sqlite_db):
+        """Test a failing answer insert leaves no result row behind"""
+        import sqlite3
+        student_id, quiz_id, (q1, *_) = self._quiz_with_questions(sqlite_db)
+        with pytest.raises(sqlite3.IntegrityError):
+            Result.save_result_with_answers(student_id, quiz_id, [(q1, 1), (q1, 2)], 4)
+        assert not Result.user_has_attempted(student_id, quiz_id)
+    
+    def test_delete_result_removes_its_answers(self, sqlite_db):
+        """Test delete_result removes only that result's answers"""
+        student_id, quiz_id, (q1, q2, *_) = self._quiz_with_questions(sqlite_db)
+        first_id, _ = Result.save_result_with_answers(student_id, quiz_id, [(q1, 1), (q2, 2)], 4)
+        second_id, _ = Result.save_result_with_answers(student_id, quiz_id, [(q1, 2)], 4)
+        
+        Result.delete_result(first_id)
+        
+        assert self._answer_count(sqlite_db, "result_id = ?", (first_id,)) == 0
+        assert Result.get_answers(second_id) == {q1: 2}
+    
+    def test_delete_question_removes_its_answers(self, sqlite_db):
+        """Test delete_question removes the answers to that question only"""
+        student_id, quiz_id, (q1, q2, *_) = self._quiz_with_questions(sqlite_db)
+        result_id, _ = Result.save_result_with_answers(student_id, quiz_id, [(q1, 1), (q2, 2)], 4)
+        
+        Quiz.delete_question(q1)
+        
+        assert Result.get_answers(result_id) == {q2: 2}
+    
+    def test_delete_quiz_removes_answers(self, sqlite_db):
+        """Test delete_quiz removes the quiz's results and their answers"""
+        student_id, quiz_id, (q1, q2, *_) = self._quiz_with_questions(sqlite_db)
+        result_id, _ = Result.save_result_with_answers(student_id, quiz_id, [(q1, 1), (q2, 2)], 4)
+        
+        Quiz.delete_quiz(quiz_id)
+        
+        assert self._answer_count(sqlite_db, "result_id = ?", (result_id,)) == 0
+        assert not Result.user_has_attempted(student_id, quiz_id)
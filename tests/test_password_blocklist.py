@@ -0,0 +1,111 @@
+"""
+Password Blocklist Tests
+Bloom-filtered common password list and its loading paths
+"""
+
+import pytest
+from backend.utils import password_blocklist
+from backend.utils.password_blocklist import (
+    BUILTIN_COMMON_PASSWORDS, BloomFilter, build_bloom_filter, init_common_passwords,
+    is_common_password, load_bloom_file,
+)
+
+LISTED = [f'listed-password-{i}' for i in range(5000)]
+UNLISTED = [f'unrelated-{i}-Xq9!' for i in range(2000)]
+
+@pytest.fixture(autouse=True)
+def reset_blocklist():
+    """Leave no configured filter behind for other tests"""
+    yield
+    password_blocklist._bloom = None
+
+@pytest.fixture
+def password_list(tmp_path):
+    """Plain list with mixed case, blank lines and a duplicate"""
+    path = tmp_path / 'common_passwords.txt'
+    path.write_text('\n'.join([' Summer2024 ', '', *LISTED, 'summer2024']) + '\n', encoding='utf-8')
+    return path
+
+@pytest.fixture
+def prebuilt_filter(password_list, tmp_path):
+    path = tmp_path / 'common_passwords.bloom'
+    build_bloom_filter(password_list).save(path)
+    return path
+
+class TestBloomFilter:
+    """Test the Bloom filter itself"""
+
+    def test_no_false_negatives(self):
+        """Test every added entry is reported as present"""
+        bloom = BloomFilter(len(LISTED))
+        for entry in LISTED:
+            bloom.add(entry)
+        assert all(entry in bloom for entry in LISTED)
+
+    def test_false_positive_rate_near_target(self):
+        """Test unrelated entries are rarely reported (target 1%)"""
+        bloom = BloomFilter(len(LISTED))
+        for entry in LISTED:
+            bloom.add(entry)
+        false_positives = sum(entry in bloom for entry in UNLISTED)
+        assert false_positives < len(UNLISTED) * 0.03
+
+    def test_saved_filter_round_trips(self, tmp_path):
+        """Test a memory-mapped prebuilt filter answers like the one that was saved"""
+        bloom = BloomFilter(len(LISTED))
+        for entry in LISTED:
+            bloom.add(entry)
+        bloom.save(tmp_path / 'f.bloom')
+
+        loaded = load_bloom_file(tmp_path / 'f.bloom')
+        assert (loaded.num_bits, loaded.num_hashes) == (bloom.num_bits, bloom.num_hashes)
+        assert all(entry in loaded for entry in LISTED)
+        assert [entry in loaded for entry in UNLISTED] == [entry in bloom for entry in UNLISTED]
+
+class TestCommonPasswordCheck:
+    """Test is_common_password with and without a configured list"""
+
+    @pytest.mark.parametrize('source', ['password_list', 'prebuilt_filter'])
+    def test_builtin_and_file_entries_blocked(self, request, source):
+        """Test built-in and listed passwords (lowercased, trimmed) are blocked"""
+        init_common_passwords(str(request.getfixturevalue(source)))
+        assert password_blocklist._bloom is not None
+
+        assert all(is_common_password(password) for password in BUILTIN_COMMON_PASSWORDS)
+        assert all(is_common_password(password) for password in LISTED)
+        assert is_common_password('summer2024')
+
+    def test_unrelated_password_not_blocked(self, prebuilt_filter):
+        """Test a strong password outside the list passes"""
+        init_common_passwords(str(prebuilt_filter))
+        assert not is_common_password('correct-horse-battery-staple-71')
+
+    def test_unset_file_uses_builtins(self, monkeypatch):
+        """Test nothing breaks when COMMON_PASSWORDS_FILE is unset"""
+        monkeypatch.delenv('COMMON_PASSWORDS_FILE', raising=False)
+        assert init_common_passwords() is None
+        assert is_common_password('password')
+        assert not is_common_password(LISTED[0])
+
+    def test_missing_file_uses_builtins(self, monkeypatch, tmp_path, caplog):
+        """Test a missing file is logged and only the built-in list applies"""
+        monkeypatch.setenv('COMMON_PASSWORDS_FILE', str(tmp_path / 'missing.txt'))
+        assert init_common_passwords() is None
+        assert 'not loaded' in caplog.text
+        assert is_common_password('qwerty')
+        assert not is_common_password(LISTED[0])
+
+    def test_truncated_prebuilt_filter_ignored(self, prebuilt_filter):
+        """Test a cut-off prebuilt file is rejected instead of read out of bounds"""
+        data = prebuilt_filter.read_bytes()
+        prebuilt_filter.write_bytes(data[:len(data) // 2])
+        assert init_common_passwords(str(prebuilt_filter)) is None
+        assert is_common_password('admin')
+
+    def test_create_app_loads_configured_list(self, sqlite_db, prebuilt_filter, monkeypatch):
+        """Test the list is loaded at startup, not on the first password check"""
+        from backend import create_app
+        monkeypatch.setenv('COMMON_PASSWORDS_FILE', str(prebuilt_filter))
+        create_app()
+        assert password_blocklist._bloom is not None
+        assert is_common_password(LISTED[-1])